@@ -1,24 +1,87 @@
+import json
+import logging
+import math
 import os
 import re
 import time
+import uuid
+from contextlib import ExitStack
+from typing import TYPE_CHECKING
+
+from config.config import Config, load_env
+from logging_utils.logger import configure_logging
+from security.auth import AuthManager
+from security.quota import get_quota_manager
+from utils.ai_processor import parse_insight_rows
+from utils.concurrency import PRIORITY_BATCH, PRIORITY_INTERACTIVE, get_ai_scheduler
+from utils.cpu_executor import get_cpu_executor
+from utils.error_handler import (
+    CircuitOpenError,
+    RateLimitedError,
+    TranscriptNotAvailableError,
+    UpstreamError,
+    get_circuit_breaker,
+)
+from utils.incremental import get_incremental_extractor
+from utils.lazy import lazy_imports
+from utils.prefetch import cache_key, get_prefetcher
+from utils.rendering import format_wisdom_output
+from utils.summarize import presummarize
+from utils.tracing import (
+    is_enabled as tracing_enabled,
+    recent_spans,
+    span,
+    stage_summary,
+    start_metrics_server,
+    traced,
+)
 
-import markdown
-import requests
-import streamlit as st
-from dotenv import load_dotenv
-from youtube_transcript_api import (
-    NoTranscriptFound,
-    TranscriptsDisabled,
-    YouTubeTranscriptApi,
+if TYPE_CHECKING:
+    import requests
+    import streamlit as st
+    from youtube_transcript_api import (
+        NoTranscriptFound,
+        TranscriptsDisabled,
+        YouTubeTranscriptApi,
+    )
+    from youtube_transcript_api.formatters import TextFormatter
+
+    from utils.dedup import get_duplicate_index
+    from utils.keywords import get_keyword_extractor, insight_topics
+
+# Streamlit, requests and the transcript API take most of the import time, and
+# batch workers that only use the helpers below never need Streamlit.
+__getattr__, _require = lazy_imports(
+    globals(),
+    {
+        "requests": "requests",
+        "st": "streamlit",
+        "NoTranscriptFound": "youtube_transcript_api:NoTranscriptFound",
+        "TranscriptsDisabled": "youtube_transcript_api:TranscriptsDisabled",
+        "YouTubeTranscriptApi": "youtube_transcript_api:YouTubeTranscriptApi",
+        "TextFormatter": "youtube_transcript_api.formatters:TextFormatter",
+        "get_duplicate_index": "utils.dedup:get_duplicate_index",
+        "get_keyword_extractor": "utils.keywords:get_keyword_extractor",
+        "insight_topics": "utils.keywords:insight_topics",
+    },
 )
-from youtube_transcript_api.formatters import TextFormatter
 
 # Load environment variables
-_ = load_dotenv()
+load_env()
+
+logger = logging.getLogger(__name__)
 
 # OpenRouter API configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_API_URL = os.getenv(
+    "OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions"
+)
+
+OPENROUTER_MODEL = "google/gemini-2.0-flash-exp:free"
+
+# Base URL of a transcript service serving `/transcripts/<video_id>`, such as
+# `loadtest.fake_upstream`. When unset, transcripts come from YouTube.
+TRANSCRIPT_API_URL = os.getenv("TRANSCRIPT_API_URL", "")
 
 # Wisdom extraction prompt
 WISDOM_PROMPT = """# IDENTITY and PURPOSE
@@ -95,41 +158,58 @@ def is_valid_youtube_url(url: str) -> bool:
     return bool(youtube_regex_match)
 
 
+@traced("url_parsing")
 def extract_video_id(url: str) -> str | None:
     """Extract video ID from YouTube URL."""
     if not is_valid_youtube_url(url):
-        print(f"[DEBUG] Invalid YouTube URL: {url}")
+        logger.debug("Invalid YouTube URL: %s", url)
         return None
 
     # Handle youtu.be URLs
     if "youtu.be" in url:
         video_id = url.split("/")[-1].split("?")[0]
-        print(f"[DEBUG] Extracted video_id from youtu.be: {video_id}")
+        logger.debug("Extracted video_id from youtu.be: %s", video_id)
         return video_id
 
     # Handle youtube.com URLs
     if "youtube.com" in url:
         if "v=" in url:
             video_id = url.split("v=")[1].split("&")[0]
-            print(f"[DEBUG] Extracted video_id from youtube.com (v=): {video_id}")
+            logger.debug("Extracted video_id from youtube.com (v=): %s", video_id)
             return video_id
         elif "embed/" in url:
             video_id = url.split("embed/")[1].split("?")[0]
-            print(f"[DEBUG] Extracted video_id from youtube.com (embed/): {video_id}")
+            logger.debug("Extracted video_id from youtube.com (embed/): %s", video_id)
             return video_id
         elif "/v/" in url:
             video_id = url.split("/v/")[1].split("?")[0]
-            print(f"[DEBUG] Extracted video_id from youtube.com (/v/): {video_id}")
+            logger.debug("Extracted video_id from youtube.com (/v/): %s", video_id)
             return video_id
-    print(f"[DEBUG] Could not extract video_id from URL: {url}")
+    logger.debug("Could not extract video_id from URL: %s", url)
     return None
 
 
-def get_transcript(video_id: str, retries: int = 3, delay: int = 2) -> str | None:
-    """Get transcript from YouTube video with retry mechanism."""
-    print(f"[DEBUG] Attempting to fetch transcript for video_id: {video_id}")
-    attempt = 0
-    while attempt < retries:
+def fetch_transcript(video_id: str) -> str:
+    """
+    Fetch and format a transcript with a single call through the YouTube
+    circuit breaker.
+
+    Raises:
+        TranscriptNotAvailableError: If the video has no usable transcript.
+        CircuitOpenError: If YouTube is failing and the breaker is open.
+        UpstreamError: If the request failed in a way that can be classified.
+    """
+
+    def fetch() -> str:
+        _require(
+            "TextFormatter",
+            "YouTubeTranscriptApi",
+            "TranscriptsDisabled",
+            "NoTranscriptFound",
+        )
+        if TRANSCRIPT_API_URL:
+            transcript = _fetch_transcript_from_service(video_id)
+            return TextFormatter().format_transcript(transcript)
         try:
             # Try to get transcript with auto-generated captions
             transcript = YouTubeTranscriptApi.get_transcript(
@@ -137,91 +217,332 @@ def get_transcript(video_id: str, retries: int = 3, delay: int = 2) -> str | Non
                 languages=["en", "en-US", "en-GB"],  # Try different English variants
                 preserve_formatting=True,
             )
-            formatter = TextFormatter()
-            formatted = formatter.format_transcript(transcript)
-            print(
-                f"[DEBUG] Successfully fetched transcript for video_id: {video_id}, length: {len(formatted)} characters"
+        except TranscriptsDisabled as e:
+            raise TranscriptNotAvailableError(
+                "This video has transcripts disabled."
+            ) from e
+        except NoTranscriptFound as e:
+            raise TranscriptNotAvailableError(
+                "No transcript found for this video. The video might not have captions available."
+            ) from e
+        formatter = TextFormatter()
+        return formatter.format_transcript(transcript)
+
+    with span("transcript_fetch", upstream="youtube"):
+        return get_circuit_breaker("youtube").call(fetch)
+
+
+def _fetch_transcript_from_service(video_id: str) -> list:
+    """Fetch transcript segments from the service at `TRANSCRIPT_API_URL`."""
+    _require("requests")
+    response = requests.get(
+        f"{TRANSCRIPT_API_URL.rstrip('/')}/transcripts/{video_id}", timeout=30
+    )
+    if response.status_code == 404:
+        raise TranscriptNotAvailableError(
+            "No transcript found for this video. The video might not have captions available."
+        )
+    response.raise_for_status()
+    return response.json()
+
+
+def get_transcript(video_id: str, retries: int = 3, delay: int = 2) -> str | None:
+    """Get transcript from YouTube video with retry mechanism."""
+    logger.debug("Attempting to fetch transcript for video_id: %s", video_id)
+    attempt = 0
+    while attempt < retries:
+        try:
+            formatted = fetch_transcript(video_id)
+            logger.debug(
+                "Successfully fetched transcript for video_id: %s, length: %d characters",
+                video_id,
+                len(formatted),
             )
             return formatted
-        except TranscriptsDisabled:
-            print(f"[DEBUG] Transcripts are disabled for video_id: {video_id}")
-            return "Error: This video has transcripts disabled."
-        except NoTranscriptFound:
-            print(f"[DEBUG] No transcript found for video_id: {video_id}")
-            return "Error: No transcript found for this video. The video might not have captions available."
+        except TranscriptNotAvailableError as e:
+            logger.info("Transcript not available for video_id: %s: %s", video_id, e)
+            return f"Error: {e}"
+        except CircuitOpenError as e:
+            logger.warning("Not fetching transcript for video_id: %s: %s", video_id, e)
+            return f"Error getting transcript: {e}"
         except Exception as e:
-            print(
-                f"[DEBUG] Exception while fetching transcript for video_id: {video_id} (attempt {attempt + 1}): {e}"
+            logger.warning(
+                "Exception while fetching transcript for video_id: %s (attempt %d): %s",
+                video_id,
+                attempt + 1,
+                e,
             )
             attempt += 1
-            if attempt < retries:
-                print(f"[DEBUG] Retrying in {delay} seconds...")
+            retryable = not isinstance(e, UpstreamError) or e.retryable
+            if retryable and attempt < retries:
+                logger.debug("Retrying in %s seconds...", delay)
                 time.sleep(delay)
             else:
-                return f"Error getting transcript after {retries} attempts: {str(e)}"
+                return f"Error getting transcript after {attempt} attempts: {str(e)}"
 
 
-def process_with_ai(text: str) -> str:
-    """Process text with OpenRouter AI."""
+def process_with_ai(
+    text: str, priority: int = PRIORITY_INTERACTIVE, tenant: str = "default"
+) -> str:
+    """
+    Process text with OpenRouter AI.
+
+    The request waits for a slot from the shared AI scheduler, so interactive
+    users are served ahead of batch jobs and tenants share capacity fairly. While
+    the provider keeps failing, its circuit breaker rejects requests immediately
+    instead of letting each one queue and time out. Long texts are first
+    shrunk by the pre-summary mode set in `PRESUMMARY_MODE`.
+    """
     if text.startswith("Error"):
         return text
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    data = {
-        "model": "google/gemini-2.0-flash-exp:free",
-        "messages": [
-            {"role": "system", "content": WISDOM_PROMPT},
-            {"role": "user", "content": text},
-        ],
-    }
-
     try:
-        response = requests.post(OPENROUTER_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        data = {
+            "model": OPENROUTER_MODEL,
+            "messages": [
+                {"role": "system", "content": WISDOM_PROMPT},
+                {"role": "user", "content": presummarize(text)},
+            ],
+        }
+        return get_circuit_breaker("openrouter").call(
+            _post_with_key_pool, data, priority=priority, tenant=tenant
+        )
     except Exception as e:
         return f"Error processing with AI: {str(e)}"
 
 
-def format_wisdom_output(markdown_text: str) -> str:
-    """Convert markdown to HTML with proper styling."""
-    # Configure markdown extensions
-    extensions = [
-        "markdown.extensions.fenced_code",
-        "markdown.extensions.tables",
-        "markdown.extensions.nl2br",
-        "markdown.extensions.sane_lists",
-    ]
-
-    # Convert markdown to HTML
-    html = markdown.markdown(markdown_text, extensions=extensions)
-
-    # Split into sections and wrap each in a styled div
-    sections = html.split("<h3>")
-    formatted_html = sections[0]  # Keep any content before the first h3
-
-    for section in sections[1:]:
-        if section.strip():
-            # Find the next h3 tag or end of content
-            next_section_start = section.find("<h3>")
-            if next_section_start != -1:
-                # Split at the next h3
-                current_section = section[:next_section_start]
-                formatted_html += (
-                    f'<div class="wisdom-section"><h3>{current_section}</div>'
-                )
-            else:
-                # This is the last section
-                formatted_html += f'<div class="wisdom-section"><h3>{section}</div>'
+def process_incrementally(
+    video_id: str,
+    transcript: str,
+    priority: int = PRIORITY_INTERACTIVE,
+    tenant: str = "default",
+) -> str:
+    """
+    Process a transcript chunk by chunk, sending only chunks without a stored
+    result to the AI and merging the chunk results. After a video's captions
+    are edited, only the chunks containing edits are processed again.
+    """
+    if transcript.startswith("Error"):
+        return transcript
+    result = get_incremental_extractor().extract(
+        video_id,
+        transcript,
+        lambda chunk: process_with_ai(chunk, priority=priority, tenant=tenant),
+        prompt_key=cache_key(WISDOM_PROMPT, OPENROUTER_MODEL),
+    )
+    logger.info(
+        "Extracted video_id: %s incrementally: %d of %d chunks reused",
+        video_id,
+        result.reused,
+        result.chunks,
+    )
+    return result.wisdom
+
+
+def find_duplicate_wisdom(video_id: str, transcript: str) -> str | None:
+    """
+    Return the wisdom extracted from another video whose transcript is a
+    near-duplicate of this one, if it was extracted with the current prompt
+    and model.
+
+    Only whole-video duplicates such as reuploads reach the similarity
+    threshold. A clip or a compilation shares too small a part of its shingles
+    with the source video and is extracted on its own.
+    """
+    _require("get_duplicate_index")
+    prompt_key = cache_key(WISDOM_PROMPT, OPENROUTER_MODEL)
+    for match in get_duplicate_index("transcript").query(transcript, exclude=video_id):
+        stored = json.loads(match.payload)
+        if stored["prompt"] == prompt_key:
+            logger.info(
+                "Reusing wisdom of video_id: %s for near-duplicate video_id: %s "
+                "(similarity %.2f)",
+                match.item_id,
+                video_id,
+                match.similarity,
+            )
+            return stored["wisdom"]
+    return None
+
+
+def index_wisdom(video_id: str, transcript: str, wisdom: str) -> int:
+    """
+    Index a video's transcript and extracted wisdom for near-duplicate lookups.
+    Insights that near-duplicate one already stored, from this video or any
+    other, are recorded as aliases of it instead of being stored again. The
+    insights indexed for the video before are replaced.
+
+    Returns:
+        int: Number of insights stored as new.
+    """
+    _require("get_duplicate_index")
+    payload = json.dumps(
+        {"prompt": cache_key(WISDOM_PROMPT, OPENROUTER_MODEL), "wisdom": wisdom}
+    )
+    get_duplicate_index("transcript").add(video_id, transcript, payload)
+    insights = get_duplicate_index("insight", shingle_size=2)
+    insights.remove_prefixed(f"{video_id}:")
+    added = 0
+    for position, (text, _, _) in enumerate(parse_insight_rows(wisdom)):
+        if insights.add_unique(f"{video_id}:{position}", text, text) is None:
+            added += 1
+    return added
+
+
+def index_keywords(video_id: str, transcript: str, wisdom: str) -> list[str]:
+    """
+    Extract a video's keywords locally by TF-IDF, updating the corpus document
+    frequencies, and record its insights for the topics view.
+
+    Returns:
+        list[str]: The keywords, best first.
+    """
+    _require("get_keyword_extractor")
+    extractor = get_keyword_extractor()
+    keywords = extractor.extract(video_id, transcript)
+    extractor.store.set_insights(
+        video_id, [text for text, _, _ in parse_insight_rows(wisdom)]
+    )
+    return keywords
 
-    return formatted_html
+
+def _compute_wisdom(
+    transcript: str, priority: int, tenant: str, video_id: str | None
+) -> str:
+    dedup = (
+        Config.NEAR_DUPLICATE_REUSE and video_id and not transcript.startswith("Error")
+    )
+    if dedup:
+        duplicate = find_duplicate_wisdom(video_id, transcript)
+        if duplicate is not None:
+            return duplicate
+    if Config.INCREMENTAL_EXTRACTION and video_id:
+        wisdom = process_incrementally(video_id, transcript, priority, tenant)
+    else:
+        wisdom = process_with_ai(transcript, priority=priority, tenant=tenant)
+    if dedup and not wisdom.startswith("Error"):
+        _ = index_wisdom(video_id, transcript, wisdom)
+    return wisdom
+
+
+def prefetch_wisdom(transcript: str, tenant: str, video_id: str | None = None) -> bool:
+    """
+    Start extracting wisdom from a transcript in the background, so a later
+    `extract_wisdom` call for it returns at once or joins the running call.
+
+    Speculative calls run at batch priority and within the `SPECULATIVE_*`
+    limits. They do not count against the user's quota; the click does.
+
+    Returns:
+        bool: True if a speculative call was started.
+    """
+    return get_prefetcher().prefetch(
+        cache_key(transcript),
+        lambda: _compute_wisdom(transcript, PRIORITY_BATCH, tenant, video_id),
+        tenant,
+    )
+
+
+def extract_wisdom(
+    transcript: str, tenant: str = "default", video_id: str | None = None
+) -> str:
+    """
+    Process a transcript with AI, reusing a prefetched or cached result when
+    speculative prefetching is enabled. When the video is known, the result of
+    a near-duplicate video is reused if near-duplicate reuse is enabled, and
+    stored per-chunk results if incremental extraction is enabled.
+    """
+    compute = lambda: _compute_wisdom(  # noqa: E731
+        transcript, PRIORITY_INTERACTIVE, tenant, video_id
+    )
+    if not Config.SPECULATIVE_PREFETCH:
+        return compute()
+    return get_prefetcher().get_or_compute(cache_key(transcript), compute)
+
+
+def _post_with_key_pool(
+    data: dict, priority: int = PRIORITY_INTERACTIVE, tenant: str = "default"
+) -> str:
+    """
+    Send a chat completion request using a key from the OpenRouter key pool.
+    A 429/401/403 benches the key and the request is retried on another one.
+
+    The key is leased before a scheduler slot is taken, and waiting for one is
+    bounded by `Config.KEY_LEASE_TIMEOUT`: when every key is benched, the call
+    fails fast instead of sleeping in the script thread while holding a slot
+    other users need.
+
+    Raises:
+        RateLimitedError: If no key became available in time.
+    """
+    _require("requests")
+    pool = AuthManager.get_key_pool()
+    attempts = max(1, len(pool))
+    for attempt in range(attempts):
+        with ExitStack() as stack:
+            try:
+                lease = stack.enter_context(
+                    pool.lease(timeout=Config.KEY_LEASE_TIMEOUT)
+                )
+            except TimeoutError as e:
+                raise RateLimitedError(
+                    "No OpenRouter API key available: all keys are rate limited "
+                    "or were rejected",
+                    upstream="openrouter",
+                ) from e
+            headers = {
+                "Authorization": f"Bearer {lease.key or OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+            }
+            with get_ai_scheduler().slot(priority=priority, tenant=tenant):
+                with span("ai_call", upstream="openrouter"):
+                    response = requests.post(
+                        OPENROUTER_API_URL,
+                        headers=headers,
+                        json=data,
+                        timeout=Config.AI_REQUEST_TIMEOUT,
+                    )
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if isinstance(status, int):
+                    retry_after = e.response.headers.get("Retry-After", "")
+                    lease.report(
+                        status, float(retry_after) if retry_after.isdigit() else None
+                    )
+                if status in (401, 403, 429) and attempt + 1 < attempts:
+                    continue
+                raise
+            return response.json()["choices"][0]["message"]["content"]
+
+
+def quota_identity() -> str:
+    """
+    Identify the user a request is charged to.
+
+    A new browser tab starts a new session, so the signed-in user is preferred,
+    then the client address reported by the proxy in `QUOTA_CLIENT_IP_HEADER`
+    (its last entry, which the nearest proxy appended and the client cannot
+    forge), then the address of the connection. The session id is the last
+    resort. The header is ignored unless configured, since without a proxy
+    that overwrites or appends to it, clients choose its value.
+    """
+    _require("st")
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return f"user:{st.user.get('email')}"
+    address = None
+    if Config.QUOTA_CLIENT_IP_HEADER:
+        forwarded = st.context.headers.get(Config.QUOTA_CLIENT_IP_HEADER) or ""
+        address = forwarded.split(",")[-1].strip()
+    address = address or st.context.ip_address
+    if address:
+        return f"ip:{address}"
+    return f"session:{st.session_state.session_id}"
 
 
 def main():
+    _require("st")
     st.title("Wisdom Extractor")
     st.write("Extract wisdom and insights from YouTube videos using AI")
 
@@ -261,10 +582,15 @@ def main():
     if "is_processing" not in st.session_state:
         st.session_state.is_processing = False
 
+    # Identify the session so AI calls are fair-shared between users
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
     # Input for YouTube URL
     youtube_url = st.text_input("Enter YouTube URL:")
 
     # Process new URL if provided and not currently processing
+    video_id = None
     if youtube_url and not st.session_state.is_processing:
         if not is_valid_youtube_url(youtube_url):
             st.error("Please enter a valid YouTube URL")
@@ -278,7 +604,14 @@ def main():
                     _ = st.error(transcript)
                     st.session_state.transcript = None
                 else:
+                    # Every rerun fetches the transcript again; only prefetch
+                    # when it is new, not on the click that will use it.
+                    is_new = transcript != st.session_state.transcript
                     st.session_state.transcript = transcript
+                    if Config.SPECULATIVE_PREFETCH and is_new:
+                        prefetch_wisdom(
+                            transcript, st.session_state.session_id, video_id
+                        )
 
     # Display transcript if available
     if (
@@ -289,12 +622,26 @@ def main():
 
         # Extract Wisdom button
         if st.button("Extract Wisdom", disabled=st.session_state.is_processing):
+            quota = get_quota_manager().check(quota_identity())
+            if not quota.allowed:
+                st.error(
+                    "You have reached your extraction limit. "
+                    f"Please try again in {math.ceil(quota.retry_after / 60)} minutes."
+                )
+                return
+            _ = st.caption(
+                f"Remaining extractions: {int(quota.remaining)} of {int(quota.capacity)}"
+            )
             try:
                 st.session_state.is_processing = True
                 with st.spinner("Processing with AI..."):
                     # Use the stored transcript directly
                     stored_transcript = st.session_state.transcript
-                    wisdom = process_with_ai(stored_transcript)
+                    wisdom = extract_wisdom(
+                        stored_transcript,
+                        tenant=st.session_state.session_id,
+                        video_id=video_id,
+                    )
                     if wisdom.startswith("Error"):
                         st.error(wisdom)
                         _ = st.info(
@@ -302,11 +649,84 @@ def main():
                         )
                     else:
                         # Format the wisdom output using proper markdown parsing
-                        formatted_wisdom = format_wisdom_output(wisdom)
+                        with span("rendering"):
+                            formatted_wisdom = get_cpu_executor().run(
+                                format_wisdom_output, wisdom
+                            )
                         _ = st.markdown(formatted_wisdom, unsafe_allow_html=True)
+                        if Config.LOCAL_KEYWORDS and video_id:
+                            keywords = index_keywords(
+                                video_id, stored_transcript, wisdom
+                            )
+                            _ = st.caption("Keywords: " + ", ".join(keywords))
             finally:
                 st.session_state.is_processing = False
 
+    if Config.LOCAL_KEYWORDS:
+        render_topics_panel()
+    if tracing_enabled():
+        render_debug_panel()
+
+
+def render_topics_panel() -> None:
+    """Show the topics that insights across all processed videos fall into."""
+    _require("st", "insight_topics", "get_keyword_extractor")
+    with st.sidebar.expander("Topics", expanded=False):
+        if not st.button("Cluster insights"):
+            _ = st.caption("Group the insights of all processed videos by topic.")
+            return
+        topics = insight_topics(get_keyword_extractor().store, Config.TOPIC_COUNT)
+        if not topics:
+            _ = st.caption("No insights recorded yet.")
+            return
+        _ = st.table(
+            [
+                {
+                    "topic": ", ".join(topic.terms),
+                    "insights": topic.size,
+                    "videos": topic.videos,
+                    "example": topic.examples[0] if topic.examples else "",
+                }
+                for topic in topics
+            ]
+        )
+
+
+def render_debug_panel() -> None:
+    """Show per-stage latency percentiles and the latest spans in the sidebar."""
+    _require("st")
+    with st.sidebar.expander("Performance", expanded=False):
+        rows = [
+            {
+                "stage": row["stage"],
+                "upstream": row.get("upstream", ""),
+                "count": row["count"],
+                "p50 (ms)": round(row["p50"] * 1000, 1),
+                "p95 (ms)": round(row["p95"] * 1000, 1),
+                "p99 (ms)": round(row["p99"] * 1000, 1),
+            }
+            for row in stage_summary()
+        ]
+        if rows:
+            _ = st.table(rows)
+        else:
+            _ = st.caption("No spans recorded yet.")
+        _ = st.caption("Latest spans")
+        _ = st.table(
+            [
+                {
+                    "stage": record.name,
+                    "parent": record.parent or "",
+                    "ms": round(record.duration * 1000, 1),
+                    "error": record.error,
+                }
+                for record in recent_spans(10)
+            ]
+        )
+
 
 if __name__ == "__main__":
+    _ = configure_logging()
+    if tracing_enabled():
+        _ = start_metrics_server()
     main()
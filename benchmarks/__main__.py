@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+
+from benchmarks.suite import (
+    DEFAULT_BASELINE,
+    compare,
+    format_comparison,
+    format_results,
+    load_report,
+    run_suite,
+    save_report,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run the micro-benchmark suite and compare it to a baseline.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the suite")
+    run_parser.add_argument("-k", "--pattern", help="only run matching benchmarks")
+    run_parser.add_argument("--rounds", type=int, default=7)
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+    run_parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        metavar="FILE",
+        help=f"store the results as the baseline (default {DEFAULT_BASELINE})",
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="flag regressions against a baseline"
+    )
+    compare_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    compare_parser.add_argument(
+        "current", nargs="?", help="results file; runs the suite when omitted"
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative slowdown tolerated before failing (default 0.10)",
+    )
+    compare_parser.add_argument(
+        "-k", "--pattern", help="only run and compare matching benchmarks"
+    )
+    compare_parser.add_argument("--rounds", type=int, default=7)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_suite(args.pattern, args.rounds)
+        print(format_results(report))
+        for path in filter(None, (args.output, args.save_baseline)):
+            save_report(report, path)
+            print(f"Saved results to {path}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        # Timings only mean something on the machine that made them, so no
+        # baseline is committed; each machine saves its own first.
+        print(
+            f"No baseline at {args.baseline}. Record one on this machine with "
+            "`python -m benchmarks run --save-baseline` first.",
+            file=sys.stderr,
+        )
+        return 2
+    baseline = load_report(args.baseline)
+    if args.current:
+        current = load_report(args.current)
+    else:
+        current = run_suite(args.pattern, args.rounds)
+    rows = compare(baseline, current, args.threshold, args.pattern)
+    print(format_comparison(rows))
+    regressions = [row.name for row in rows if row.status == "regression"]
+    if regressions:
+        print(
+            f"\n{len(regressions)} benchmark(s) regressed by more than "
+            f"{args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
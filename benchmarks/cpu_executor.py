@@ -0,0 +1,101 @@
+"""
+Compare inline, thread and process execution of the CPU-bound stages.
+
+Run with `python -m benchmarks.cpu_executor [--docs N] [--workers N]`.
+
+Single-call latency shows the fixed cost of each mode (inline has none, the
+process pool pays for serialization and an IPC round trip). Batch throughput
+shows where a process pool wins: many independent documents on a multi-core
+machine, where the thread pool is serialized by the GIL.
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Callable
+
+from utils.ai_processor import parse_insight_rows
+from utils.cpu_executor import MODES, CPUExecutor
+from utils.rendering import format_wisdom_output
+
+SECTIONS = ["IDEAS", "INSIGHTS", "QUOTES", "HABITS", "FACTS", "RECOMMENDATIONS"]
+
+
+def make_wisdom_markdown(items_per_section: int = 50) -> str:
+    """Build an AI response of realistic size: several sections of bullets."""
+    words = "insight about learning technology reading habits and the future"
+    lines = ["### SUMMARY", "", "A presenter discusses " + words, ""]
+    for section in SECTIONS:
+        lines += [f"### {section}", ""]
+        lines += [
+            f"- {section.title()} {n}: {words} {words}"
+            for n in range(items_per_section)
+        ]
+        lines.append("")
+    return "\n".join(lines)
+
+
+STAGES: dict[str, Callable[[str], Any]] = {
+    "format_wisdom_output": format_wisdom_output,
+    "parse_insight_rows": parse_insight_rows,
+}
+
+
+def _time(func: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(docs: int, workers: int, repeat: int = 20) -> list[dict[str, Any]]:
+    """
+    Measure every stage in every mode.
+
+    Args:
+        docs: Number of documents in the batch measurement.
+        workers: Pool size for the thread and process modes.
+        repeat: Number of single calls to average.
+
+    Returns:
+        One result row per (stage, mode).
+    """
+    document = make_wisdom_markdown()
+    batch = [document] * docs
+    rows = []
+    for mode in MODES:
+        executor = CPUExecutor(mode, max_workers=workers)
+        executor.warm_up()
+        try:
+            for name, stage in STAGES.items():
+                single = _time(lambda: executor.run(stage, document), repeat)
+                batch_time = _time(lambda: executor.map(stage, batch), 1)
+                rows.append(
+                    {
+                        "stage": name,
+                        "mode": mode,
+                        "single_ms": single * 1000,
+                        "batch_docs_per_s": docs / batch_time,
+                    }
+                )
+        finally:
+            executor.shutdown()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'stage':<22} {'mode':<8} {'single (ms)':>12} {'batch (docs/s)':>15}")
+    for row in run(args.docs, args.workers):
+        print(
+            f"{row['stage']:<22} {row['mode']:<8} "
+            f"{row['single_ms']:>12.3f} {row['batch_docs_per_s']:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
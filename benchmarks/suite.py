@@ -0,0 +1,368 @@
+"""
+Micro-benchmarks for the hot paths of the pipeline, with JSON baselines.
+
+Run with `python -m benchmarks run [-k PATTERN] [--output FILE] [--save-baseline]`
+and check for regressions with `python -m benchmarks compare [BASELINE] [CURRENT]
+[--threshold 0.1]`. Without CURRENT, `compare` runs the suite first. It exits with
+status 1 when any benchmark's median got slower than the threshold allows.
+
+Inputs are sized like production: a 3-hour transcript and AI responses with 50
+items per section.
+"""
+
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "baseline.json")
+
+URLS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s&list=PL123",
+    "https://youtu.be/dQw4w9WgXcQ?si=abcdef",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ?autoplay=1",
+    "https://www.youtube.com/v/dQw4w9WgXcQ",
+    "youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://example.com/watch?v=dQw4w9WgXcQ",
+    "not a url at all",
+]
+
+# A benchmark's setup gets a scratch directory and returns the zero-argument
+# callable to time. Setup work is not timed.
+Setup = Callable[[str], Callable[[], Any]]
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark setup function under `name`."""
+
+    def decorator(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _transcript_segments(hours: int = 3) -> List[Dict[str, Any]]:
+    from loadtest.fake_upstream import synthetic_transcript
+
+    return synthetic_transcript("benchmark", hours * 60)
+
+
+def _wisdom_markdown(items: int = 50) -> str:
+    from benchmarks.cpu_executor import make_wisdom_markdown
+
+    return make_wisdom_markdown(items)
+
+
+@benchmark("url.extract_video_id")
+def _extract_video_id(workdir: str) -> Callable[[], Any]:
+    from app import extract_video_id
+
+    return lambda: [extract_video_id(url) for url in URLS]
+
+
+@benchmark("url.is_valid_youtube_url")
+def _is_valid_youtube_url(workdir: str) -> Callable[[], Any]:
+    from app import is_valid_youtube_url
+
+    return lambda: [is_valid_youtube_url(url) for url in URLS]
+
+
+@benchmark("render.format_wisdom_output")
+def _format_wisdom_output(workdir: str) -> Callable[[], Any]:
+    from utils.rendering import format_wisdom_output
+
+    wisdom = _wisdom_markdown()
+    return lambda: format_wisdom_output(wisdom)
+
+
+@benchmark("ai.parse_insights")
+def _parse_insights(workdir: str) -> Callable[[], Any]:
+    from utils.ai_processor import AIProcessor
+
+    # Parsing does not touch the API client, so skip building one.
+    processor = AIProcessor.__new__(AIProcessor)
+    wisdom = _wisdom_markdown()
+    return lambda: processor._parse_insights(wisdom)
+
+
+@benchmark("transcript.format")
+def _format_transcript(workdir: str) -> Callable[[], Any]:
+    from youtube_transcript_api.formatters import TextFormatter
+
+    segments = _transcript_segments()
+    formatter = TextFormatter()
+    return lambda: formatter.format_transcript(segments)
+
+
+def _insights_database(workdir: str, rows: int) -> Any:
+    from persistence.database import Database
+
+    db = Database(os.path.join(workdir, "bench.db"))
+    db.create_table(
+        "insights",
+        "id INTEGER PRIMARY KEY, video_id TEXT, category TEXT, text TEXT",
+    )
+    db.insert_many(
+        "insights",
+        [
+            {"video_id": f"vid{n % 20}", "category": "ideas", "text": f"Insight {n}"}
+            for n in range(rows)
+        ],
+    )
+    return db
+
+
+@benchmark("db.insert_data")
+def _insert_data(workdir: str) -> Callable[[], Any]:
+    db = _insights_database(workdir, 0)
+    row = {"video_id": "vid0", "category": "ideas", "text": "An insight " * 10}
+    return lambda: db.insert_data("insights", row)
+
+
+@benchmark("db.fetch_data")
+def _fetch_data(workdir: str) -> Callable[[], Any]:
+    db = _insights_database(workdir, 1000)
+    return lambda: db.fetch_data("insights", "video_id = ?", ("vid7",))
+
+
+def _extraction_document() -> Dict[str, Any]:
+    segments = _transcript_segments()
+    return {
+        "video_id": "dQw4w9WgXcQ",
+        "transcript": " ".join(segment["text"] for segment in segments),
+        "insights": [
+            {"text": line[2:], "category": "ideas", "timestamp": 0.0}
+            for line in _wisdom_markdown().splitlines()
+            if line.startswith("- ")
+        ],
+    }
+
+
+@benchmark("storage.save_json")
+def _save_json(workdir: str) -> Callable[[], Any]:
+    from persistence.storage import StorageManager
+
+    document = _extraction_document()
+    path = os.path.join(workdir, "extraction.json")
+    return lambda: StorageManager.save_json(document, path)
+
+
+@benchmark("storage.load_json")
+def _load_json(workdir: str) -> Callable[[], Any]:
+    from persistence.storage import StorageManager
+
+    path = os.path.join(workdir, "extraction.json")
+    StorageManager.save_json(_extraction_document(), path)
+    return lambda: StorageManager.load_json(path)
+
+
+@dataclass
+class Measurement:
+    """Per-call timings of one benchmark, in seconds."""
+
+    median: float
+    mean: float
+    min: float
+    stdev: float
+    number: int
+    rounds: int
+
+
+def measure(
+    func: Callable[[], Any], rounds: int = 7, min_round_time: float = 0.05
+) -> Measurement:
+    """
+    Time `func` like `timeit`: pick a call count per round that takes at least
+    `min_round_time`, then take the per-call time of several rounds. The
+    median is the figure baselines are compared on, as it is robust to the
+    occasional noisy round.
+    """
+    func()  # Warm caches and lazy imports
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time:
+            break
+        number *= 10 if elapsed < min_round_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return Measurement(
+        median=statistics.median(samples),
+        mean=statistics.fmean(samples),
+        min=min(samples),
+        stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        number=number,
+        rounds=rounds,
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    pattern: Optional[str] = None, rounds: int = 7, min_round_time: float = 0.05
+) -> Dict[str, Any]:
+    """
+    Run every registered benchmark whose name matches `pattern`.
+
+    Args:
+        pattern: Regular expression matched against benchmark names.
+        rounds: Timed rounds per benchmark.
+        min_round_time: Minimum duration of a round, in seconds.
+
+    Returns:
+        A JSON-serializable report with environment metadata and one
+        `Measurement` per benchmark under `"results"`.
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and not re.search(pattern, name):
+            continue
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+            func = setup(workdir)
+            results[name] = asdict(measure(func, rounds, min_round_time))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+@dataclass
+class Comparison:
+    """How one benchmark moved between a baseline and a current run."""
+
+    name: str
+    baseline: Optional[float]
+    current: Optional[float]
+    change: Optional[float]  # Relative change of the median, e.g. 0.25 = 25% slower
+    status: str  # "regression", "improvement", "ok", "new" or "missing"
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.10,
+    pattern: Optional[str] = None,
+) -> List[Comparison]:
+    """
+    Compare the medians of two reports.
+
+    Args:
+        baseline: A report from `run_suite`, typically loaded from a baseline file.
+        current: A report from `run_suite`.
+        threshold: Relative slowdown tolerated before flagging a regression; the
+            same margin in the other direction counts as an improvement.
+        pattern: Regular expression limiting the comparison to matching
+            benchmarks, as passed to `run_suite` for the current report.
+
+    Returns:
+        One comparison per benchmark present in either report.
+    """
+    before = baseline.get("results", {})
+    after = current.get("results", {})
+    names = set(before) | set(after)
+    if pattern:
+        names = {name for name in names if re.search(pattern, name)}
+    rows = []
+    for name in sorted(names):
+        if name not in after:
+            rows.append(Comparison(name, before[name]["median"], None, None, "missing"))
+            continue
+        if name not in before:
+            rows.append(Comparison(name, None, after[name]["median"], None, "new"))
+            continue
+        old, new = before[name]["median"], after[name]["median"]
+        change = new / old - 1 if old else 0.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append(Comparison(name, old, new, change, status))
+    return rows
+
+
+def save_report(report: Dict[str, Any], file_path: str) -> None:
+    """Write a report as indented JSON, creating its directory if needed."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_report(file_path: str) -> Dict[str, Any]:
+    """Read a report written by `save_report`."""
+    with open(file_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _format_time(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def format_results(report: Dict[str, Any]) -> str:
+    """Render a report as a table of per-call medians."""
+    lines = [f"{'benchmark':<30} {'median':>10} {'stdev':>10} {'calls':>8}"]
+    for name, result in report["results"].items():
+        lines.append(
+            f"{name:<30} {_format_time(result['median']):>10} "
+            f"{_format_time(result['stdev']):>10} {result['number']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Comparison]) -> str:
+    """Render comparisons as a table, flagging regressions."""
+    lines = [
+        f"{'benchmark':<30} {'baseline':>10} {'current':>10} {'change':>8}  status"
+    ]
+    for row in rows:
+        change = "-" if row.change is None else f"{row.change:+.1%}"
+        flag = "  <-- REGRESSION" if row.status == "regression" else ""
+        lines.append(
+            f"{row.name:<30} {_format_time(row.baseline):>10} "
+            f"{_format_time(row.current):>10} {change:>8}  {row.status}{flag}"
+        )
+    return "\n".join(lines)
@@ -1,9 +1,47 @@
 import os
+import threading
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """
+    Load environment variables from the `.env` file, once per process.
+
+    Every module that needs `.env` values calls this instead of
+    `dotenv.load_dotenv()`, so the file is located and parsed only once.
+    Variables already set in the environment take precedence.
+    """
+    global _env_loaded
+    with _env_lock:
+        if _env_loaded:
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
 
-from dotenv import load_dotenv
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
+
+# Pre-summary modes understood by utils.summarize.presummarize
+PRESUMMARY_MODES = ("off", "textrank")
+
+
+def _choice(name: str, default: str, choices: tuple) -> str:
+    """
+    Read a setting that must be one of `choices`, so a typo fails at startup
+    instead of on the first request that uses it.
+
+    Raises:
+        ValueError: If the variable holds another value.
+    """
+    value = os.getenv(name, default)
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {choices}, not {value!r}")
+    return value
 
 
 class Config:
@@ -27,6 +65,9 @@ class Config:
     # Logging Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0))
+    LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", 0)) or None  # per minute
 
     # Database Configuration
     DB_NAME = os.getenv("DB_NAME", "wisdom_extractor.db")
@@ -44,6 +85,77 @@ class Config:
     ).split(",")
     MAX_INSIGHT_LENGTH = int(os.getenv("MAX_INSIGHT_LENGTH", 500))
 
+    # AI call scheduling
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 4))
+    # Seconds a request waits for a pooled API key before failing
+    KEY_LEASE_TIMEOUT = float(os.getenv("KEY_LEASE_TIMEOUT", 5))
+    # Seconds an AI request may take, so a hung call cannot hold a slot forever
+    AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", 120))
+
+    # Speculative AI extraction while the user reviews the transcript
+    SPECULATIVE_PREFETCH = os.getenv("SPECULATIVE_PREFETCH", "false").lower() in (
+        "1",
+        "true",
+    )
+    SPECULATIVE_MAX_IN_FLIGHT = int(os.getenv("SPECULATIVE_MAX_IN_FLIGHT", 2))
+    SPECULATIVE_CALLS_PER_HOUR = float(os.getenv("SPECULATIVE_CALLS_PER_HOUR", 30))
+    # Seconds a click waits for a running speculative call before making its own
+    SPECULATIVE_JOIN_TIMEOUT = float(os.getenv("SPECULATIVE_JOIN_TIMEOUT", 10))
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 128))
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 3600))
+
+    # Incremental re-extraction: per-chunk results reused across transcript edits
+    INCREMENTAL_EXTRACTION = os.getenv("INCREMENTAL_EXTRACTION", "false").lower() in (
+        "1",
+        "true",
+    )
+    INCREMENTAL_DB_PATH = os.getenv("INCREMENTAL_DB_PATH", "chunk_results.db")
+    INCREMENTAL_CHUNK_CHARS = int(os.getenv("INCREMENTAL_CHUNK_CHARS", 8000))
+
+    # Near-duplicate detection across videos (MinHash LSH); catches reuploads
+    # of whole videos, not clips
+    NEAR_DUPLICATE_REUSE = os.getenv("NEAR_DUPLICATE_REUSE", "false").lower() in (
+        "1",
+        "true",
+    )
+    DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", "dedup.db")
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 128))
+    DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", 16))
+
+    # Extractive pre-summarization of long transcripts: "off" or "textrank"
+    PRESUMMARY_MODE = _choice("PRESUMMARY_MODE", "off", PRESUMMARY_MODES)
+    PRESUMMARY_TOKEN_BUDGET = int(os.getenv("PRESUMMARY_TOKEN_BUDGET", 24000))
+
+    # Local TF-IDF keywords and insight topics, without AI calls
+    LOCAL_KEYWORDS = os.getenv("LOCAL_KEYWORDS", "false").lower() in ("1", "true")
+    KEYWORDS_DB_PATH = os.getenv("KEYWORDS_DB_PATH", "keywords.db")
+    KEYWORDS_TOP_K = int(os.getenv("KEYWORDS_TOP_K", 10))
+    TOPIC_COUNT = int(os.getenv("TOPIC_COUNT", 8))
+
+    # Per-user request quotas
+    QUOTA_CAPACITY = float(os.getenv("QUOTA_CAPACITY", 20))
+    QUOTA_REFILL_PER_HOUR = float(os.getenv("QUOTA_REFILL_PER_HOUR", 20))
+    QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", "")
+    QUOTA_SYNC_INTERVAL = float(os.getenv("QUOTA_SYNC_INTERVAL", 5))
+    # Header carrying the client address, e.g. X-Forwarded-For. Set it only
+    # behind a proxy that overwrites or appends to it; clients can send any value
+    QUOTA_CLIENT_IP_HEADER = os.getenv("QUOTA_CLIENT_IP_HEADER", "")
+
+    # CPU-bound post-processing: "inline", "thread" or "process"
+    CPU_EXECUTOR_MODE = os.getenv("CPU_EXECUTOR_MODE", "inline")
+    CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", 0)) or None
+
+    # Circuit breakers around upstream services
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))
+    BREAKER_MINIMUM_CALLS = int(os.getenv("BREAKER_MINIMUM_CALLS", 10))
+    BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", 60))
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", 30))
+
+    # Stage tracing and the local Prometheus endpoint
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 9464))
+
 
 # Initialize configuration
 config = Config()
@@ -0,0 +1,435 @@
+"""
+A local stand-in for YouTube transcripts and OpenAI-compatible chat completions.
+
+Run with `python -m loadtest.fake_upstream [--port 8089] [--latency lognormal:0.3:0.5]
+[--rate-429 0.05] [--rate-5xx 0.02] [--tokens-per-second 200] [--recordings DIR]`,
+then point the app at it:
+
+    OPENROUTER_API_URL=http://127.0.0.1:8089/v1/chat/completions
+    OPENAI_API_URL=http://127.0.0.1:8089/v1/chat/completions
+    TRANSCRIPT_API_URL=http://127.0.0.1:8089
+
+Routes:
+    GET  /transcripts/<video_id>  Transcript segments, shaped like
+                                  `YouTubeTranscriptApi.get_transcript` output.
+    POST /v1/chat/completions     Chat completion, streamed as server-sent
+                                  events when the body has `"stream": true`.
+
+Recordings are optional: `<dir>/transcripts/<video_id>.json` files are served
+as-is and `<dir>/completions/*.md` are served round-robin. Without them, content
+is generated deterministically from the video ID.
+"""
+
+import argparse
+import glob
+import http.server
+import itertools
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+SECTIONS = ["IDEAS", "INSIGHTS", "QUOTES", "HABITS", "FACTS", "RECOMMENDATIONS"]
+WORDS = (
+    "learning reading technology habits future humans meaning purpose books "
+    "memes improvement focus sleep practice attention craft writing curiosity"
+).split()
+
+
+@dataclass
+class LatencyModel:
+    """
+    A distribution of response latencies in seconds.
+
+    Kinds and their parameters:
+        fixed:SECONDS, uniform:LOW:HIGH, normal:MEAN:STDDEV,
+        lognormal:MEDIAN:SIGMA, exponential:MEAN
+    """
+
+    kind: str = "fixed"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Build a model from a `kind:param[:param]` string, e.g. `uniform:0.1:0.5`."""
+        kind, *params = spec.split(":")
+        expected = {
+            "fixed": 1,
+            "uniform": 2,
+            "normal": 2,
+            "lognormal": 2,
+            "exponential": 1,
+        }
+        if kind not in expected:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        if len(params) != expected[kind]:
+            raise ValueError(f"{kind} takes {expected[kind]} parameter(s)")
+        return cls(kind, [float(p) for p in params])
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency, never negative."""
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(p[0]), p[1]) if p[0] > 0 else 0.0
+        else:
+            value = rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+@dataclass
+class UpstreamBehavior:
+    """
+    How the fake upstream misbehaves.
+
+    Attributes:
+        latency: Time to first byte for every request.
+        rate_429: Fraction of requests answered with 429 Too Many Requests.
+        rate_5xx: Fraction of requests answered with a random 500/502/503.
+        retry_after: Retry-After seconds sent with 429s.
+        tokens_per_second: Completion generation speed; 0 means instant.
+        stream_chunk_tokens: Tokens per server-sent event when streaming.
+        transcript_minutes: Length of generated transcripts.
+        completion_items: Bullets per section in generated completions.
+    """
+
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: int = 1
+    tokens_per_second: float = 0.0
+    stream_chunk_tokens: int = 8
+    transcript_minutes: int = 30
+    completion_items: int = 20
+
+
+def synthetic_transcript(video_id: str, minutes: int) -> List[Dict[str, Any]]:
+    """Generate a deterministic transcript of ~150 spoken words per minute."""
+    rng = random.Random(video_id)
+    segments = []
+    start = 0.0
+    while start < minutes * 60:
+        duration = round(rng.uniform(2.5, 5.0), 2)
+        text = " ".join(rng.choice(WORDS) for _ in range(int(duration * 2.5)))
+        segments.append({"text": text, "start": round(start, 2), "duration": duration})
+        start += duration
+    return segments
+
+
+def synthetic_wisdom(seed: str, items: int) -> str:
+    """Generate a deterministic Markdown response with the app's sections."""
+    rng = random.Random(seed)
+    lines = ["# SUMMARY", "", " ".join(rng.choice(WORDS) for _ in range(25)), ""]
+    for section in SECTIONS:
+        lines += [f"# {section}", ""]
+        for _ in range(items):
+            lines.append("- " + " ".join(rng.choice(WORDS) for _ in range(16)))
+        lines.append("")
+    return "\n".join(lines)
+
+
+class FakeUpstream:
+    """An in-process fake upstream server running on a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        behavior: Optional[UpstreamBehavior] = None,
+        recordings: Optional[str] = None,
+        seed: int = 0,
+    ):
+        """
+        Initialize the server; call `start` (or use it as a context manager).
+
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to listen on; 0 picks a free port.
+            behavior (UpstreamBehavior): Latency, fault and throttling settings. It
+                can be modified while the server runs.
+            recordings (str): Directory of recorded transcripts and completions.
+            seed (int): Seed for latency and fault injection.
+        """
+        self.behavior = behavior or UpstreamBehavior()
+        self.recordings = recordings
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._completions = itertools.cycle(self._load_completions() or [None])
+        self._stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.upstream = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, e.g. `http://127.0.0.1:8089`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def chat_completions_url(self) -> str:
+        """URL to use for `OPENROUTER_API_URL` and `OPENAI_API_URL`."""
+        return f"{self.url}/v1/chat/completions"
+
+    def start(self) -> "FakeUpstream":
+        """Start serving on a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-upstream", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeUpstream":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """Return request counts keyed by `"<route> <status>"`."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, route: str, status: int) -> None:
+        key = f"{route} {status}"
+        with self._stats_lock:
+            self._stats[key] = self._stats.get(key, 0) + 1
+
+    def _draw(self) -> tuple[float, Optional[int]]:
+        """Pick this request's latency and injected error status, if any."""
+        behavior = self.behavior
+        with self._rng_lock:
+            latency = behavior.latency.sample(self._rng)
+            roll = self._rng.random()
+            status = None
+            if roll < behavior.rate_429:
+                status = 429
+            elif roll < behavior.rate_429 + behavior.rate_5xx:
+                status = self._rng.choice((500, 502, 503))
+        return latency, status
+
+    def _load_completions(self) -> List[str]:
+        if not self.recordings:
+            return []
+        completions = []
+        pattern = os.path.join(self.recordings, "completions", "*.md")
+        for path in sorted(glob.glob(pattern)):
+            with open(path, encoding="utf-8") as f:
+                completions.append(f.read())
+        return completions
+
+    def transcript_for(self, video_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the recorded or generated transcript, or None if not recorded."""
+        if self.recordings:
+            path = os.path.join(self.recordings, "transcripts", f"{video_id}.json")
+            if not os.path.exists(path):
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return synthetic_transcript(video_id, self.behavior.transcript_minutes)
+
+    def completion_for(self, body: Dict[str, Any]) -> str:
+        """Return the next recorded completion, or one generated from the prompt."""
+        recorded = next(self._completions)
+        if recorded is not None:
+            return recorded
+        prompt = json.dumps(body.get("messages", []))[-200:]
+        return synthetic_wisdom(prompt, self.behavior.completion_items)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def upstream(self) -> FakeUpstream:
+        return self.server.upstream  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        if not path.startswith("/transcripts/"):
+            self._send_json(404, {"error": "not found"}, "unknown")
+            return
+        if self._delay_or_fail("transcripts"):
+            return
+        transcript = self.upstream.transcript_for(path.rsplit("/", 1)[1])
+        if transcript is None:
+            self._send_json(404, {"error": "no transcript"}, "transcripts")
+        else:
+            self._send_json(200, transcript, "transcripts")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"}, "unknown")
+            return
+        if self._delay_or_fail("completions"):
+            return
+        content = self.upstream.completion_for(body)
+        model = body.get("model", "fake-model")
+        if body.get("stream"):
+            self._stream_completion(content, model)
+            return
+        completion_tokens = len(content.split())
+        prompt_tokens = len(json.dumps(body.get("messages", [])).split())
+        self._throttle(completion_tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        response = {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        self._send_json(200, response, "completions")
+
+    def _delay_or_fail(self, route: str) -> bool:
+        """Apply the drawn latency; send an injected error and return True if any."""
+        latency, status = self.upstream._draw()
+        if latency:
+            time.sleep(latency)
+        if status is None:
+            return False
+        headers = {}
+        if status == 429:
+            headers["Retry-After"] = str(self.upstream.behavior.retry_after)
+        self._send_json(
+            status, {"error": {"message": "injected fault"}}, route, headers
+        )
+        return True
+
+    def _throttle(self, tokens: int) -> None:
+        rate = self.upstream.behavior.tokens_per_second
+        if rate > 0 and tokens:
+            time.sleep(tokens / rate)
+
+    def _stream_completion(self, content: str, model: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        # Split on spaces but keep them, so the chunks concatenate back exactly.
+        tokens = content.split(" ")
+        size = max(1, self.upstream.behavior.stream_chunk_tokens)
+        for start in range(0, len(tokens), size):
+            chunk = tokens[start : start + size]
+            text = " ".join(chunk) + (" " if start + size < len(tokens) else "")
+            self._throttle(len(chunk))
+            self._send_event(completion_id, model, {"content": text}, None)
+        self._send_event(completion_id, model, {}, "stop")
+        # Counted before the last write, so a client that has read the whole
+        # response always finds it in the stats.
+        self.upstream._count("completions", 200)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_event(
+        self,
+        completion_id: str,
+        model: str,
+        delta: Dict[str, str],
+        finish_reason: Optional[str],
+    ) -> None:
+        event = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+        self.wfile.flush()
+
+    def _send_json(
+        self,
+        status: int,
+        payload: Any,
+        route: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.upstream._count(route, status)
+        self.wfile.write(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument(
+        "--latency", default="fixed:0", help="e.g. fixed:0.2, lognormal:0.3:0.5"
+    )
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--transcript-minutes", type=int, default=30)
+    parser.add_argument("--completion-items", type=int, default=20)
+    parser.add_argument("--recordings", help="directory of recorded responses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    behavior = UpstreamBehavior(
+        latency=LatencyModel.parse(args.latency),
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        tokens_per_second=args.tokens_per_second,
+        transcript_minutes=args.transcript_minutes,
+        completion_items=args.completion_items,
+    )
+    server = FakeUpstream(args.host, args.port, behavior, args.recordings, args.seed)
+    print(f"Fake upstream listening on {server.url}")
+    print(f"  OPENROUTER_API_URL={server.chat_completions_url}")
+    print(f"  OPENAI_API_URL={server.chat_completions_url}")
+    print(f"  TRANSCRIPT_API_URL={server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Simulate concurrent users of the Streamlit app against the fake upstream.
+
+Run with `python -m loadtest.load_generator [--users 8] [--sessions 3]
+[--think-time 0.5] [--latency lognormal:0.5:0.4] [--tokens-per-second 300]
+[--output report.json]`.
+
+Every simulated user replays the script runs a browser session triggers:
+entering a URL runs `app.main()` (URL checks and transcript fetch), and
+clicking "Extract Wisdom" runs it again (the same steps, then the quota check,
+the AI call and rendering). `app.main()` itself runs, with `app.st` replaced by
+a stand-in that answers each thread's widgets for its own session and records
+what would be shown. Users run as threads in one process, sharing the AI
+scheduler, key pool, circuit breakers and quota store the way sessions share a
+Streamlit server process. Streamlit's `AppTest` harness is not used because it
+swaps a process-global runtime on every run, so concurrent instances break each
+other. Transcripts and completions come from `loadtest.fake_upstream`, started
+in-process unless `--upstream` points at a running one.
+
+The report gives throughput, per-step latency percentiles, AI scheduler
+queueing, upstream request counts and memory per live session, which is what
+is needed to size containers and `AI_MAX_CONCURRENCY`.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from loadtest.fake_upstream import FakeUpstream, LatencyModel, UpstreamBehavior
+
+DEFAULT_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@dataclass
+class LoadTestConfig:
+    """
+    Shape of the simulated load.
+
+    Attributes:
+        users: Number of concurrent users.
+        sessions_per_user: Sessions each user runs back to back.
+        think_time: Seconds a user waits between entering the URL and clicking.
+        ramp_up: Seconds over which user start times are spread.
+        urls: Video URLs, assigned to sessions round-robin.
+        trace_memory: Measure Python allocations with `tracemalloc`. This slows
+            every allocation down considerably, so latencies from such runs
+            are not representative; without it only the process RSS is
+            reported.
+        warm_up: Run one untimed session first, so imports and connection
+            setup do not land in the percentiles.
+    """
+
+    users: int = 4
+    sessions_per_user: int = 1
+    think_time: float = 0.0
+    ramp_up: float = 0.0
+    urls: List[str] = field(default_factory=lambda: [DEFAULT_URL])
+    trace_memory: bool = False
+    warm_up: bool = True
+
+
+@dataclass
+class SessionResult:
+    """Timings and outcome of one simulated session."""
+
+    user: int
+    transcript_seconds: float = 0.0
+    wisdom_seconds: float = 0.0
+    total_seconds: float = 0.0
+    state_bytes: int = 0
+    error: Optional[str] = None
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": max(values)}
+
+
+def _queue_delta(after: Any, before: Any) -> Dict[str, float]:
+    admitted = after.admitted - (before.admitted if before else 0)
+    total_wait = after.total_wait - (before.total_wait if before else 0.0)
+    return {
+        "admitted": admitted,
+        "avg": total_wait / admitted if admitted else 0.0,
+        # The maximum cannot be un-merged; the earlier calls only count if
+        # they waited longer than any call of this run.
+        "max": after.max_wait,
+    }
+
+
+def _state_size(session_state: Dict[str, Any]) -> int:
+    """Approximate bytes held in a session's state."""
+    total = 0
+    for value in session_state.values():
+        if isinstance(value, str):
+            total += len(value.encode("utf-8"))
+        else:
+            total += sys.getsizeof(value)
+    return total
+
+
+class SessionState(dict):
+    """A stand-in for `st.session_state`, which supports `in` and attributes."""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+class _ScriptRun:
+    """
+    The parts of the Streamlit API that `app.main()` uses, answering for one
+    run of one session: the text input holds `url`, "Extract Wisdom" is
+    clicked if `clicked`, and errors and rendered markdown are recorded.
+    Calls that only display something are ignored.
+    """
+
+    def __init__(self, session_state: SessionState, url: str, clicked: bool):
+        self.session_state = session_state
+        self.url = url
+        self.clicked = clicked
+        self.errors: List[str] = []
+        self.markdown_blocks: List[str] = []
+        # An anonymous user connecting directly, so quotas fall back to the
+        # session id.
+        self.user: Dict[str, Any] = {}
+        self.context = SimpleNamespace(headers={}, ip_address=None)
+        self.sidebar = self
+
+    def text_input(self, label: str, *args: Any, **kwargs: Any) -> str:
+        return self.url
+
+    def button(self, label: str, *args: Any, **kwargs: Any) -> bool:
+        return self.clicked and label == "Extract Wisdom"
+
+    def error(self, body: Any, *args: Any, **kwargs: Any) -> None:
+        self.errors.append(str(body))
+
+    def markdown(self, body: str, *args: Any, **kwargs: Any) -> None:
+        self.markdown_blocks.append(body)
+
+    def spinner(self, *args: Any, **kwargs: Any) -> contextlib.AbstractContextManager:
+        return contextlib.nullcontext()
+
+    expander = spinner
+
+    def __getattr__(self, name: str) -> Any:
+        return lambda *args, **kwargs: None
+
+
+class _Streamlit(threading.local):
+    """Installed as `app.st`; forwards to the calling thread's `_ScriptRun`."""
+
+    run: Optional[_ScriptRun] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self.run is None:
+            raise RuntimeError("app.main() called outside script_run()")
+        return getattr(self.run, name)
+
+
+_streamlit = _Streamlit()
+
+
+@contextlib.contextmanager
+def streamlit_stand_in() -> Iterator[None]:
+    """Replace `app.st` with the per-thread stand-in while the block runs."""
+    import app
+
+    previous = app.__dict__.get("st")
+    app.st = _streamlit
+    try:
+        yield
+    finally:
+        if previous is None:
+            del app.st
+        else:
+            app.st = previous
+
+
+def script_run(session_state: SessionState, url: str, clicked: bool) -> None:
+    """
+    Run `app.main()` for a session, inside `streamlit_stand_in()`.
+
+    Args:
+        session_state: The session's state, standing in for `st.session_state`.
+        url: The URL in the text input.
+        clicked: Whether this run was triggered by the "Extract Wisdom" button.
+
+    Raises:
+        RuntimeError: With the first message the app showed via `st.error`.
+    """
+    import app
+
+    run = _ScriptRun(session_state, url, clicked)
+    _streamlit.run = run
+    try:
+        app.main()
+    finally:
+        _streamlit.run = None
+    if run.errors:
+        raise RuntimeError(run.errors[0])
+
+
+def run_session(user: int, url: str, config: LoadTestConfig) -> tuple:
+    """
+    Run one session of the main flow.
+
+    Returns:
+        The `SessionResult` and the session's state, which the caller may keep
+        alive to stand in for a connected browser tab.
+    """
+    result = SessionResult(user=user)
+    session_state = SessionState()
+    start = time.perf_counter()
+    try:
+        script_run(session_state, url, clicked=False)
+        result.transcript_seconds = time.perf_counter() - start
+        time.sleep(config.think_time)
+        clicked = time.perf_counter()
+        script_run(session_state, url, clicked=True)
+        result.wisdom_seconds = time.perf_counter() - clicked
+    except Exception as e:
+        result.error = str(e) if isinstance(e, RuntimeError) else repr(e)
+    result.total_seconds = time.perf_counter() - start - config.think_time
+    result.state_bytes = _state_size(session_state)
+    return result, session_state
+
+
+def run_load_test(config: LoadTestConfig) -> Dict[str, Any]:
+    """
+    Run the simulated users and build the report.
+
+    The app must already point at the upstream: call `point_app_at` before
+    `app` is first imported, since it reads its endpoints at import time.
+
+    Returns:
+        A JSON-serializable report.
+    """
+    with streamlit_stand_in():
+        return _run_load_test(config)
+
+
+def _run_load_test(config: LoadTestConfig) -> Dict[str, Any]:
+    from utils import tracing
+    from utils.concurrency import get_ai_scheduler
+
+    if config.warm_up:
+        run_session(-1, config.urls[0], config)
+    tracing.registry.reset()
+    tracing.enable_tracing(True)
+    scheduler = get_ai_scheduler()
+    # The scheduler's counters are cumulative; report only this run's share.
+    before = scheduler.stats().queue_time
+    results: List[SessionResult] = []
+    results_lock = threading.Lock()
+    live_sessions: List[Any] = [None] * config.users
+
+    def user_loop(user: int) -> None:
+        if config.users > 1:
+            time.sleep(config.ramp_up * user / (config.users - 1))
+        for n in range(config.sessions_per_user):
+            url = config.urls[(user + n * config.users) % len(config.urls)]
+            result, session_state = run_session(user, url, config)
+            # Keep the latest session alive, like an open browser tab.
+            live_sessions[user] = session_state
+            with results_lock:
+                results.append(result)
+
+    if config.trace_memory:
+        tracemalloc.start()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=user_loop, args=(user,), name=f"user-{user}")
+        for user in range(config.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    memory: Dict[str, Any] = {
+        # ru_maxrss is in kilobytes on Linux
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "session_state_bytes": _percentiles([r.state_bytes for r in results]),
+    }
+    if config.trace_memory:
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory["peak_bytes"] = peak - baseline_memory
+        memory["retained_per_session_bytes"] = (retained - baseline_memory) / max(
+            1, config.users
+        )
+    live_sessions.clear()
+
+    ok = [r for r in results if r.error is None]
+    stats = scheduler.stats()
+    report = {
+        "config": asdict(config),
+        "sessions": len(results),
+        "errors": len(results) - len(ok),
+        "error_samples": sorted({r.error for r in results if r.error})[:5],
+        "wall_seconds": wall,
+        "throughput_sessions_per_second": len(ok) / wall if wall else 0.0,
+        "latency_seconds": {
+            "transcript": _percentiles([r.transcript_seconds for r in results]),
+            "wisdom": _percentiles([r.wisdom_seconds for r in ok]),
+            "session": _percentiles([r.total_seconds for r in ok]),
+        },
+        "ai_queue": {
+            "max_concurrency": stats.max_concurrency,
+            "wait_seconds": {
+                str(priority): _queue_delta(queue, before.get(priority))
+                for priority, queue in stats.queue_time.items()
+            },
+        },
+        "stages": tracing.stage_summary(),
+        "memory": memory,
+    }
+    tracing.enable_tracing(False)
+    return report
+
+
+def point_app_at(upstream_url: str) -> None:
+    """Point the app's transcript and AI endpoints at an upstream base URL."""
+    os.environ["TRANSCRIPT_API_URL"] = upstream_url
+    os.environ["OPENROUTER_API_URL"] = f"{upstream_url}/v1/chat/completions"
+    os.environ["OPENAI_API_URL"] = f"{upstream_url}/v1/chat/completions"
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render the headline numbers of a report as text."""
+
+    def ms(value: float) -> str:
+        return f"{value * 1000:.0f} ms"
+
+    lines = [
+        f"Sessions: {report['sessions']} ({report['errors']} failed) "
+        f"in {report['wall_seconds']:.1f}s, "
+        f"{report['throughput_sessions_per_second']:.2f} sessions/s",
+        "",
+        f"{'step':<12} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}",
+    ]
+    for step, values in report["latency_seconds"].items():
+        lines.append(
+            f"{step:<12} {ms(values['p50']):>10} {ms(values['p95']):>10} "
+            f"{ms(values['p99']):>10} {ms(values['max']):>10}"
+        )
+    queue = report["ai_queue"]
+    lines += ["", f"AI scheduler: max concurrency {queue['max_concurrency']}"]
+    for priority, wait in queue["wait_seconds"].items():
+        lines.append(
+            f"  priority {priority}: {wait['admitted']} admitted, "
+            f"avg wait {ms(wait['avg'])}, max wait {ms(wait['max'])}"
+        )
+    lines += ["", f"{'stage':<28} {'count':>6} {'p50':>10} {'p95':>10} {'p99':>10}"]
+    for stage in report["stages"]:
+        name = stage["stage"] + (
+            f" ({stage['upstream']})" if "upstream" in stage else ""
+        )
+        lines.append(
+            f"{name:<28} {stage['count']:>6} {ms(stage['p50']):>10} "
+            f"{ms(stage['p95']):>10} {ms(stage['p99']):>10}"
+        )
+    memory = report["memory"]
+    lines += [
+        "",
+        f"Memory: max RSS {memory['max_rss_bytes'] / 1e6:.1f} MB, "
+        f"session_state p50 {memory['session_state_bytes']['p50'] / 1e3:.0f} kB",
+    ]
+    if "peak_bytes" in memory:
+        lines.append(
+            f"Traced: peak {memory['peak_bytes'] / 1e6:.1f} MB, retained per live "
+            f"session {memory['retained_per_session_bytes'] / 1e6:.2f} MB"
+        )
+    if "upstream_requests" in report:
+        lines.append(f"Upstream requests: {report['upstream_requests']}")
+    for sample in report["error_samples"]:
+        lines.append(f"Error: {sample}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=1, help="sessions per user")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--ramp-up", type=float, default=0.0)
+    parser.add_argument("--url", action="append", dest="urls")
+    parser.add_argument("--upstream", help="base URL of a running fake upstream")
+    parser.add_argument("--latency", default="lognormal:0.3:0.4")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--transcript-minutes", type=int, default=60)
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="measure allocations with tracemalloc (slows the run down)",
+    )
+    parser.add_argument("--no-warm-up", dest="warm_up", action="store_false")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Settings the app reads at import time must be in place before it loads.
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LOG_FILE", os.devnull)
+    # Outside a Streamlit server, st.cache_* and friends warn on every call.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils").setLevel(logging.ERROR)
+
+    server = None
+    if args.upstream:
+        point_app_at(args.upstream.rstrip("/"))
+    else:
+        behavior = UpstreamBehavior(
+            latency=LatencyModel.parse(args.latency),
+            rate_429=args.rate_429,
+            rate_5xx=args.rate_5xx,
+            tokens_per_second=args.tokens_per_second,
+            transcript_minutes=args.transcript_minutes,
+        )
+        server = FakeUpstream(behavior=behavior).start()
+        point_app_at(server.url)
+
+    config = LoadTestConfig(
+        users=args.users,
+        sessions_per_user=args.sessions,
+        think_time=args.think_time,
+        ramp_up=args.ramp_up,
+        urls=args.urls or [DEFAULT_URL],
+        trace_memory=args.trace_memory,
+        warm_up=args.warm_up,
+    )
+    try:
+        report = run_load_test(config)
+        if server is not None:
+            report["upstream_requests"] = server.stats()
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Profile the memory each stage of the extraction pipeline uses on one video.
+
+Run with `python -m loadtest.memory_profile [--video-id ID]
+[--transcript-minutes 180] [--upstream URL] [--top 5] [--frames 1]
+[--output report.json]`.
+
+The stages are the ones a session goes through in `app.main()`: fetching the
+transcript segments, formatting them to text, the AI call (request body and
+response JSON), rendering the markdown to HTML, and serializing the widgets
+Streamlit sends to the browser. For each stage the report shows the peak and
+retained traced memory and the lines that allocated what was retained, which
+is where redundant copies of a long transcript show up. Transcripts and
+completions come from `loadtest.fake_upstream`, started in a subprocess unless
+`--upstream` points at a running one; `tracemalloc` traces the whole process,
+so an in-process server's allocations would be counted against the stages.
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import Any, Dict, Tuple
+
+from loadtest.load_generator import point_app_at
+from utils.profiling import MemoryProfiler, format_stages
+
+
+def _widget_messages(transcript: str, html: str) -> bytes:
+    """Serialize the transcript text area and wisdom markdown like `st` does."""
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    text_area = ForwardMsg()
+    text_area.delta.new_element.text_area.label = "Transcript:"
+    text_area.delta.new_element.text_area.default = transcript
+    markdown = ForwardMsg()
+    markdown.delta.new_element.markdown.body = html
+    markdown.delta.new_element.markdown.allow_html = True
+    return text_area.SerializeToString() + markdown.SerializeToString()
+
+
+def _start_upstream(transcript_minutes: int) -> Tuple[subprocess.Popen, str]:
+    """Start the fake upstream in a subprocess and return it with its URL."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-u",
+            "-m",
+            "loadtest.fake_upstream",
+            "--port",
+            "0",
+            "--transcript-minutes",
+            str(transcript_minutes),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    # First line: "Fake upstream listening on http://host:port"
+    banner = process.stdout.readline()
+    if not banner:
+        process.wait()
+        raise RuntimeError("The fake upstream exited before it started listening")
+    return process, banner.split()[-1]
+
+
+def profile_pipeline(video_id: str, profiler: MemoryProfiler) -> Dict[str, Any]:
+    """
+    Run the pipeline for `video_id` with each stage measured by `profiler`.
+
+    The app must already point at a transcript service (see `point_app_at`).
+    Each stage's output is kept until the end, as a session would keep it, so
+    retained memory adds up across stages.
+
+    Returns:
+        Sizes of the stage outputs in characters or bytes.
+
+    Raises:
+        RuntimeError: If the AI call fails.
+    """
+    import app
+    from youtube_transcript_api.formatters import TextFormatter
+
+    with profiler.stage("transcript_fetch"):
+        segments = app._fetch_transcript_from_service(video_id)
+    with profiler.stage("transcript_format"):
+        transcript = TextFormatter().format_transcript(segments)
+        # The app does not keep the segments once they are formatted.
+        segment_count = len(segments)
+        del segments
+    with profiler.stage("ai_call"):
+        wisdom = app.process_with_ai(transcript)
+    if wisdom.startswith("Error"):
+        raise RuntimeError(wisdom)
+    with profiler.stage("rendering"):
+        html = app.format_wisdom_output(wisdom)
+    with profiler.stage("display"):
+        messages = _widget_messages(transcript, html)
+    return {
+        "segments": segment_count,
+        "transcript_chars": len(transcript),
+        "wisdom_chars": len(wisdom),
+        "html_chars": len(html),
+        "message_bytes": len(messages),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--video-id", default="dQw4w9WgXcQ")
+    parser.add_argument("--transcript-minutes", type=int, default=180)
+    parser.add_argument("--upstream", help="base URL of a running fake upstream")
+    parser.add_argument("--top", type=int, default=5, help="allocation sites per stage")
+    parser.add_argument(
+        "--frames", type=int, default=1, help="stack frames kept per allocation"
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LOG_FILE", os.devnull)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils").setLevel(logging.ERROR)
+
+    process = None
+    if args.upstream:
+        point_app_at(args.upstream.rstrip("/"))
+    else:
+        process, url = _start_upstream(args.transcript_minutes)
+        point_app_at(url)
+
+    try:
+        # An unmeasured first run imports the modules each stage loads lazily
+        # and fills the regex and connection caches.
+        with MemoryProfiler() as warm_up:
+            profile_pipeline(args.video_id, warm_up)
+        with MemoryProfiler(top=args.top, frames=args.frames) as profiler:
+            sizes = profile_pipeline(args.video_id, profiler)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(format_stages(profiler.stages, sites=args.top))
+    print("\nOutput sizes: " + ", ".join(f"{k} {v}" for k, v in sizes.items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"sizes": sizes, "stages": profiler.report()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
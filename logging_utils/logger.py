@@ -1,57 +1,277 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "taskName"}
+
+
+class lazy:
+    """
+    Defer an expensive computation until a log record is actually formatted.
+
+    Pass it as a logging argument: `logger.debug("size %s", lazy(len, text))`.
+    When the record is filtered out, `func` is never called.
+    """
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable[..., Any], *args: Any):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+    def __repr__(self) -> str:
+        return repr(self.func(*self.args))
+
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as a single JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `limit` records per message template every `period`
+    seconds. The next record let through after a suppression carries a
+    `suppressed` count, which is also appended to its message.
+    """
+
+    def __init__(
+        self,
+        limit: int = 10,
+        period: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (logger, template) -> [window start, records passed, records suppressed]
+        self._windows: Dict[Tuple[str, Any], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.msg)
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every `1 / rate` records at or below `max_level` (DEBUG by
+    default); more severe records always pass.
+    """
+
+    def __init__(self, rate: float = 1.0, max_level: int = logging.DEBUG):
+        super().__init__()
+        if not 0 < rate <= 1:
+            raise ValueError("rate must be in (0, 1]")
+        self.rate = rate
+        self.max_level = max_level
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or self.rate >= 1:
+            return True
+        # Accumulate fractional credit so exactly `rate` of records pass,
+        # evenly spread, without needing a random number per record.
+        with self._lock:
+            self._credit += self.rate
+            if self._credit >= 1:
+                self._credit -= 1
+                return True
+        return False
+
+
+class _LoggerSetup:
+    """The queue plumbing installed on one logger by `setup_logger`."""
+
+    def __init__(self, handler: QueueHandler, listener: QueueListener, key: tuple):
+        self.handler = handler
+        self.listener = listener
+        self.key = key
+
+
+_setups: Dict[str, _LoggerSetup] = {}
+_setups_lock = threading.Lock()
 
 
 def setup_logger(
-    name: str = "wisdom_extractor", log_file: str = "app.log", level: int = logging.INFO
+    name: str = "wisdom_extractor",
+    log_file: str = "app.log",
+    level: Union[int, str] = logging.INFO,
+    json_format: bool = False,
+    debug_sample_rate: float = 1.0,
+    rate_limit: Optional[int] = None,
+    rate_limit_period: float = 60.0,
 ) -> logging.Logger:
     """
-    Configures and returns a logger with both file and console handlers.
+    Configures and returns a logger that writes to a rotating file and the
+    console without blocking the caller.
+
+    The logger gets a single `QueueHandler`; a background `QueueListener` does
+    the formatting and I/O. Filtering (sampling, rate limiting) happens before a
+    record is queued, so dropped records cost almost nothing. Calling this again
+    for the same logger only updates its level; handlers are never duplicated.
+    Pass an empty name to configure the root logger.
 
     Args:
         name: Name of the logger.
         log_file: Path to the log file.
         level: Logging level (e.g., logging.INFO, logging.DEBUG).
+        json_format: Write one JSON object per line instead of plain text.
+        debug_sample_rate: Fraction of DEBUG records to keep.
+        rate_limit: Maximum records per message template every
+            `rate_limit_period` seconds, or None for no limit.
+        rate_limit_period: Length of the rate-limiting window in seconds.
 
     Returns:
         Configured logger instance.
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    key = (log_file, json_format, debug_sample_rate, rate_limit, rate_limit_period)
 
-    # Create a directory for logs if it doesn't exist
-    log_dir = os.path.dirname(log_file)
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    # File handler with rotation
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=1024 * 1024,  # 1 MB
-        backupCount=5,
-        encoding="utf-8",
-    )
-    file_handler.setLevel(level)
+    with _setups_lock:
+        existing = _setups.get(name)
+        if existing is not None:
+            if existing.key == key:
+                return logger
+            _teardown(logger, existing)
 
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
+        # Create a directory for logs if it doesn't exist
+        log_dir = os.path.dirname(log_file)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
 
-    # Formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+        # File handler with rotation
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=1024 * 1024,  # 1 MB
+            backupCount=5,
+            encoding="utf-8",
+            delay=True,
+        )
+
+        # Console handler
+        console_handler = logging.StreamHandler()
+
+        formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
+
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        if debug_sample_rate < 1:
+            queue_handler.addFilter(SamplingFilter(debug_sample_rate))
+        if rate_limit is not None:
+            queue_handler.addFilter(RateLimitFilter(rate_limit, rate_limit_period))
 
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+        listener = QueueListener(
+            queue_handler.queue,
+            file_handler,
+            console_handler,
+            respect_handler_level=True,
+        )
+        listener.start()
+        logger.addHandler(queue_handler)
+        _setups[name] = _LoggerSetup(queue_handler, listener, key)
 
     return logger
 
 
+def get_listener(name: str = "wisdom_extractor") -> Optional[QueueListener]:
+    """
+    Return the background listener `setup_logger` started for a logger.
+
+    Args:
+        name: Name of the logger.
+
+    Returns:
+        The listener, or None if the logger was not set up.
+    """
+    setup = _setups.get(name)
+    return setup.listener if setup else None
+
+
+def configure_logging() -> logging.Logger:
+    """
+    Configure the root logger from the `LOG_*` settings in `Config`, so every
+    module logger created with `logging.getLogger(__name__)` is routed through
+    the queue. At the default INFO level, debug calls return after a level check.
+    """
+    from config.config import Config
+
+    return setup_logger(
+        "",
+        Config.LOG_FILE,
+        Config.LOG_LEVEL.upper(),
+        json_format=Config.LOG_FORMAT == "json",
+        debug_sample_rate=Config.LOG_DEBUG_SAMPLE_RATE,
+        rate_limit=Config.LOG_RATE_LIMIT,
+    )
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop every listener started by `setup_logger`."""
+    with _setups_lock:
+        for name, setup in list(_setups.items()):
+            _teardown(logging.getLogger(name), setup)
+        _setups.clear()
+
+
+def _teardown(logger: logging.Logger, setup: _LoggerSetup) -> None:
+    logger.removeHandler(setup.handler)
+    setup.listener.stop()
+    for handler in setup.listener.handlers:
+        handler.close()
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the given name.
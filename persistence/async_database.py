@@ -0,0 +1,110 @@
+import asyncio
+import concurrent.futures
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
+
+from persistence.database import Database
+
+
+class AsyncDatabase:
+    """
+    Awaitable facade over `Database` for asyncio code paths.
+
+    Blocking SQLite work runs on a small dedicated thread pool so coroutines never
+    stall the event loop. The number of outstanding operations is capped; callers
+    beyond the cap wait for a slot, which gives producers natural backpressure.
+    Cancelling an awaiting coroutine cancels work that has not started yet.
+    """
+
+    def __init__(self, database: Database, max_workers: int = 2, max_pending: int = 32):
+        """
+        Initialize the facade.
+
+        Args:
+            database (Database): The blocking database to wrap.
+            max_workers (int): Number of threads dedicated to database work.
+            max_pending (int): Maximum number of operations queued or running at once.
+        """
+        self.database = database
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="async-db"
+        )
+        self._slots = asyncio.Semaphore(max_pending)
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def execute(
+        self, query: str, params: tuple[Any, ...] = (), fetch: bool = False
+    ) -> Optional[list[dict[str, Any]]]:
+        """
+        Execute a SQL query without blocking the event loop.
+
+        Args:
+            query (str): SQL query to execute.
+            params (tuple): Parameters for the query.
+            fetch (bool): Whether to fetch results.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Fetched results if `fetch` is True, else None.
+        """
+        return await self._run(self.database.execute_query, query, params, fetch)
+
+    async def insert_many(
+        self, table_name: str, rows: Sequence[dict[str, Any]]
+    ) -> None:
+        """
+        Insert several rows into a table in a single transaction.
+
+        Args:
+            table_name (str): Name of the table.
+            rows (List[Dict[str, Any]]): Rows to insert.
+        """
+        await self._run(self.database.insert_many, table_name, rows)
+
+    async def iter_rows(
+        self, query: str, params: tuple[Any, ...] = (), batch_size: int = 500
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream the rows of a query.
+
+        Rows are fetched one batch at a time, and the next batch is only fetched
+        once the consumer has taken the previous one.
+
+        Args:
+            query (str): SQL query to execute.
+            params (tuple): Parameters for the query.
+            batch_size (int): Number of rows fetched per round trip to the executor.
+
+        Yields:
+            Dict[str, Any]: The next row.
+        """
+        batches = self.database.iter_batches(query, params, batch_size)
+        pending: Optional[concurrent.futures.Future] = None
+        try:
+            while True:
+                async with self._slots:
+                    pending = self._executor.submit(next, batches, None)
+                    batch = await asyncio.wrap_future(pending)
+                if batch is None:
+                    return
+                for row in batch:
+                    yield row
+        finally:
+            # The generator cannot be closed while a fetch is still running in
+            # the executor, so let that fetch settle first.
+            if pending is not None and not pending.done():
+                _ = await asyncio.wrap_future(pending)
+            await asyncio.wrap_future(self._executor.submit(batches.close))
+
+    async def close(self) -> None:
+        """Wait for outstanding work and shut down the executor."""
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._executor.shutdown, True
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        async with self._slots:
+            return await asyncio.wrap_future(self._executor.submit(func, *args))
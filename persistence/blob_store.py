@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import io
+import os
+import time
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+from persistence.database import Database
+from persistence.storage import StorageManager
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # Optional, gzip is used when missing
+    zstandard = None
+
+_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+
+
+class TranscriptStore:
+    """
+    A compressed, content-addressed blob store for transcripts.
+
+    Each transcript is stored once per distinct content, named by the SHA-256 of
+    its UTF-8 bytes and sharded into `objects/<aa>/<bb>/` directories so no single
+    directory grows large. Identical re-uploads share a blob. A small SQLite index
+    maps each video ID to its blob. Blobs are compressed with zstd when the
+    `zstandard` package is installed, otherwise with gzip.
+    """
+
+    def __init__(self, root: str = "transcripts", codec: Optional[str] = None):
+        """
+        Initialize the store, creating its directories and index if needed.
+
+        Args:
+            root (str): Root directory of the store.
+            codec (str): "zstd" or "gzip". Defaults to zstd when available.
+        """
+        if codec is None:
+            codec = "zstd" if zstandard is not None else "gzip"
+        if codec not in _EXTENSIONS:
+            raise ValueError(f"Unsupported codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("The zstd codec requires the zstandard package")
+        self.root = root
+        self.codec = codec
+        self._objects_dir = os.path.join(root, "objects")
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self.index = Database(os.path.join(root, "index.db"))
+        self.index.create_table(
+            "transcript_blobs",
+            "video_id TEXT PRIMARY KEY, digest TEXT NOT NULL, codec TEXT NOT NULL, "
+            "size INTEGER NOT NULL, updated_at REAL NOT NULL",
+        )
+
+    def put(self, video_id: str, text: str) -> str:
+        """
+        Store a transcript and point the video's index entry at it.
+
+        Args:
+            video_id (str): YouTube video ID.
+            text (str): Transcript text.
+
+        Returns:
+            str: The content digest of the stored blob.
+        """
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._find_blob(digest) or self._write_blob(digest, raw)
+        codec = "zstd" if path.endswith(_EXTENSIONS["zstd"]) else "gzip"
+        _ = self.index.execute_query(
+            "INSERT OR REPLACE INTO transcript_blobs "
+            "(video_id, digest, codec, size, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (video_id, digest, codec, len(raw), time.time()),
+        )
+        return digest
+
+    def get(self, video_id: str) -> Optional[str]:
+        """
+        Read a whole transcript.
+
+        Args:
+            video_id (str): YouTube video ID.
+
+        Returns:
+            Optional[str]: The transcript text, or None if the video is not stored.
+        """
+        if self.digest_for(video_id) is None:
+            return None
+        with self.open(video_id) as stream:
+            return stream.read()
+
+    @contextmanager
+    def open(self, video_id: str) -> Iterator[IO[str]]:
+        """
+        Open a transcript as a text stream that decompresses as it is read.
+
+        Args:
+            video_id (str): YouTube video ID.
+
+        Yields:
+            IO[str]: A readable text stream.
+
+        Raises:
+            KeyError: If the video is not stored.
+        """
+        path = self.path_for(video_id)
+        if path is None:
+            raise KeyError(video_id)
+        with open(path, "rb") as raw:
+            if path.endswith(_EXTENSIONS["zstd"]):
+                if zstandard is None:
+                    raise ImportError(
+                        "Reading zstd blobs requires the zstandard package"
+                    )
+                binary = zstandard.ZstdDecompressor().stream_reader(raw)
+            else:
+                binary = gzip.GzipFile(fileobj=raw, mode="rb")
+            with io.TextIOWrapper(binary, encoding="utf-8") as stream:
+                yield stream
+
+    def digest_for(self, video_id: str) -> Optional[str]:
+        """
+        Look up the content digest stored for a video.
+
+        Args:
+            video_id (str): YouTube video ID.
+
+        Returns:
+            Optional[str]: The digest, or None if the video is not stored.
+        """
+        rows = self.index.fetch_data("transcript_blobs", "video_id = ?", (video_id,))
+        return rows[0]["digest"] if rows else None
+
+    def path_for(self, video_id: str) -> Optional[str]:
+        """
+        Resolve the blob file backing a video's transcript.
+
+        Args:
+            video_id (str): YouTube video ID.
+
+        Returns:
+            Optional[str]: Path to the blob, or None if the video is not stored.
+        """
+        digest = self.digest_for(video_id)
+        return self._find_blob(digest) if digest else None
+
+    def _blob_dir(self, digest: str) -> str:
+        return os.path.join(self._objects_dir, digest[:2], digest[2:4])
+
+    def _find_blob(self, digest: str) -> Optional[str]:
+        """Return the existing blob for a digest in any codec, if present."""
+        for extension in _EXTENSIONS.values():
+            path = os.path.join(self._blob_dir(digest), digest + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _write_blob(self, digest: str, raw: bytes) -> str:
+        if self.codec == "zstd":
+            payload = zstandard.ZstdCompressor(level=10).compress(raw)
+        else:
+            payload = gzip.compress(raw, mtime=0)
+        directory = self._blob_dir(digest)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, digest + _EXTENSIONS[self.codec])
+        StorageManager.atomic_write(path, payload)
+        return path
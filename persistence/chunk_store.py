@@ -0,0 +1,107 @@
+import time
+from typing import Dict, Iterable, List
+
+from persistence.database import Database
+
+# SQLite limits the number of parameters in one statement.
+_MAX_PARAMS = 500
+
+
+class ChunkResultStore:
+    """
+    Per-chunk AI extraction results, keyed by the chunk's content digest and the
+    prompt that produced them.
+
+    Results are shared by every video containing the same chunk text, and a
+    prompt change never serves results produced by the old prompt. The store
+    also remembers each video's current list of chunks, so results no video
+    refers to any more can be pruned.
+    """
+
+    def __init__(self, db_path: str = "chunk_results.db"):
+        """
+        Initialize the store, creating its tables if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file.
+        """
+        self.db = Database(db_path)
+        self.db.create_table(
+            "chunk_results",
+            "digest TEXT NOT NULL, prompt TEXT NOT NULL, result TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (digest, prompt)",
+        )
+        self.db.create_table(
+            "video_chunks",
+            "video_id TEXT NOT NULL, position INTEGER NOT NULL, digest TEXT NOT NULL, "
+            "PRIMARY KEY (video_id, position)",
+        )
+
+    def get_many(self, digests: Iterable[str], prompt: str) -> Dict[str, str]:
+        """
+        Look up stored results.
+
+        Args:
+            digests: Chunk digests to look up.
+            prompt (str): Key of the prompt the results must come from.
+
+        Returns:
+            Dict[str, str]: Results by digest, for the digests that have one.
+        """
+        wanted = list(dict.fromkeys(digests))
+        found: Dict[str, str] = {}
+        for start in range(0, len(wanted), _MAX_PARAMS):
+            batch = wanted[start : start + _MAX_PARAMS]
+            rows = self.db.fetch_data(
+                "chunk_results",
+                f"prompt = ? AND digest IN ({', '.join('?' * len(batch))})",
+                (prompt, *batch),
+            )
+            found.update((row["digest"], row["result"]) for row in rows)
+        return found
+
+    def put(self, digest: str, prompt: str, result: str) -> None:
+        """Store the result of one chunk, replacing any earlier one."""
+        _ = self.db.execute_query(
+            "INSERT OR REPLACE INTO chunk_results (digest, prompt, result, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (digest, prompt, result, time.time()),
+        )
+
+    def set_video_chunks(self, video_id: str, digests: List[str]) -> None:
+        """Record the chunks a video's current transcript consists of, in order."""
+        with self.db.get_connection() as conn:
+            _ = conn.execute("DELETE FROM video_chunks WHERE video_id = ?", (video_id,))
+            _ = conn.executemany(
+                "INSERT INTO video_chunks (video_id, position, digest) VALUES (?, ?, ?)",
+                [
+                    (video_id, position, digest)
+                    for position, digest in enumerate(digests)
+                ],
+            )
+            conn.commit()
+
+    def video_chunks(self, video_id: str) -> List[str]:
+        """Return the chunk digests last recorded for a video, in order."""
+        rows = self.db.execute_query(
+            "SELECT digest FROM video_chunks WHERE video_id = ? ORDER BY position",
+            (video_id,),
+            fetch=True,
+        )
+        return [row["digest"] for row in rows or []]
+
+    def prune(self) -> int:
+        """
+        Delete results of chunks no video refers to any more, e.g. after a
+        transcript was re-captioned.
+
+        Returns:
+            int: Number of results deleted.
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM chunk_results WHERE digest NOT IN "
+                "(SELECT digest FROM video_chunks)"
+            )
+            conn.commit()
+            return cursor.rowcount
@@ -1,6 +1,9 @@
 import sqlite3
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from persistence.writer import DatabaseWriter
+from utils.tracing import span
 
 
 class Database:
@@ -9,22 +12,31 @@ class Database:
     Provides methods for connecting to the database, executing queries, and managing transactions.
     """
 
-    def __init__(self, db_path: str = "wisdom_extractor.db"):
+    def __init__(
+        self,
+        db_path: str = "wisdom_extractor.db",
+        writer: Optional[DatabaseWriter] = None,
+    ):
         """
         Initialize the database connection.
 
         Args:
             db_path (str): Path to the SQLite database file.
+            writer (DatabaseWriter): Optional single-writer queue. When set, all
+                non-fetch queries are routed through it instead of opening a
+                write connection per call.
         """
         self.db_path = db_path
+        self.writer = writer
 
     @contextmanager
     def get_connection(self):
         """
         Context manager for handling database connections.
-        Ensures the connection is closed after use.
+        Ensures the connection is closed after use. Connections are never shared
+        between concurrent callers, so they may be handed across threads.
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
         try:
             yield conn
         finally:
@@ -44,14 +56,18 @@ class Database:
         Returns:
             Optional[List[Dict[str, Any]]]: Fetched results if `fetch` is True, else None.
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            _ = cursor.execute(query, params)
-            if fetch:
-                columns = [column[0] for column in cursor.description]
-                results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                return results
-            conn.commit()
+        with span("db_read" if fetch else "db_write"):
+            if self.writer is not None and not fetch:
+                _ = self.writer.submit(query, params, wait=True)
+                return None
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                _ = cursor.execute(query, params)
+                if fetch:
+                    columns = [column[0] for column in cursor.description]
+                    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    return results
+                conn.commit()
 
     def create_table(self, table_name: str, schema: str) -> None:
         """
@@ -78,6 +94,70 @@ class Database:
         params = tuple(data.values()) if data.values() else ()
         _ = self.execute_query(query, params)
 
+    def insert_many(self, table_name: str, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Insert several rows into a table in a single transaction.
+
+        Args:
+            table_name (str): Name of the table.
+            rows (List[Dict[str, Any]]): Rows to insert. All rows must share the
+                keys of the first row.
+        """
+        if not rows:
+            return
+        keys = list(rows[0].keys())
+        columns = ", ".join(keys)
+        placeholders = ", ".join(["?"] * len(keys))
+        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        params = [tuple(row[key] for key in keys) for row in rows]
+        with span("db_write"):
+            if self.writer is not None:
+                _ = self.writer.submit_many(query, params, wait=True)
+                return
+            with self.get_connection() as conn:
+                _ = conn.executemany(query, params)
+                conn.commit()
+
+    def iter_batches(
+        self, query: str, params: tuple[Any, ...] = (), batch_size: int = 500
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Execute a query and yield its results in batches without loading them all.
+
+        Args:
+            query (str): SQL query to execute.
+            params (tuple): Parameters for the query.
+            batch_size (int): Maximum number of rows per batch.
+
+        Yields:
+            List[Dict[str, Any]]: The next batch of rows.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(zip(columns, row)) for row in rows]
+
+    def iter_rows(
+        self, query: str, params: tuple[Any, ...] = (), batch_size: int = 500
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Execute a query and yield its rows one at a time.
+
+        Args:
+            query (str): SQL query to execute.
+            params (tuple): Parameters for the query.
+            batch_size (int): Number of rows fetched from the cursor at a time.
+
+        Yields:
+            Dict[str, Any]: The next row.
+        """
+        for batch in self.iter_batches(query, params, batch_size):
+            yield from batch
+
     def fetch_data(
         self, table_name: str, condition: Optional[str] = None, params: tuple = ()
     ) -> list[dict[str, Any]]:
@@ -0,0 +1,204 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from persistence.database import Database
+
+# SQLite limits the number of parameters in one statement.
+_MAX_PARAMS = 500
+
+
+class MinHashStore:
+    """
+    MinHash signatures and LSH buckets for near-duplicate lookups.
+
+    Items are grouped by `kind` (e.g. transcripts and insights), so one
+    database can hold several indexes. Each item is stored with its signature,
+    an optional payload such as the extraction result, and one bucket per LSH
+    band. Buckets are indexed, so finding candidates costs one indexed lookup
+    per band regardless of how many items are stored. Items found to be
+    duplicates of a stored item are recorded as aliases instead of being
+    stored again. Aliases keep their signature and payload, so one can take
+    the place of its canonical item if that is removed.
+    """
+
+    def __init__(self, db_path: str = "dedup.db"):
+        """
+        Initialize the store, creating its tables if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file.
+        """
+        self.db = Database(db_path)
+        self.db.create_table(
+            "minhash_items",
+            "kind TEXT NOT NULL, item_id TEXT NOT NULL, signature BLOB NOT NULL, "
+            "payload TEXT NOT NULL DEFAULT '', PRIMARY KEY (kind, item_id)",
+        )
+        self.db.create_table(
+            "minhash_buckets",
+            "kind TEXT NOT NULL, bucket INTEGER NOT NULL, item_id TEXT NOT NULL",
+        )
+        self.db.create_table(
+            "minhash_aliases",
+            "kind TEXT NOT NULL, item_id TEXT NOT NULL, canonical_id TEXT NOT NULL, "
+            "signature BLOB NOT NULL, payload TEXT NOT NULL DEFAULT '', "
+            "PRIMARY KEY (kind, item_id)",
+        )
+        _ = self.db.execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_minhash_buckets "
+            "ON minhash_buckets (kind, bucket)"
+        )
+
+    def add(
+        self,
+        kind: str,
+        item_id: str,
+        signature: bytes,
+        buckets: List[int],
+        payload: str = "",
+    ) -> None:
+        """
+        Store an item, replacing an earlier version with the same id.
+
+        Args:
+            kind (str): Index the item belongs to.
+            item_id (str): Item identifier, unique within `kind`.
+            signature (bytes): Serialized MinHash signature.
+            buckets (List[int]): One bucket key per LSH band.
+            payload (str): Data returned along with the item on lookups.
+        """
+        with self.db.get_connection() as conn:
+            _ = conn.execute(
+                "DELETE FROM minhash_buckets WHERE kind = ? AND item_id = ?",
+                (kind, item_id),
+            )
+            _ = conn.execute(
+                "INSERT OR REPLACE INTO minhash_items (kind, item_id, signature, payload) "
+                "VALUES (?, ?, ?, ?)",
+                (kind, item_id, signature, payload),
+            )
+            _ = conn.executemany(
+                "INSERT INTO minhash_buckets (kind, bucket, item_id) VALUES (?, ?, ?)",
+                [(kind, bucket, item_id) for bucket in buckets],
+            )
+            conn.commit()
+
+    def candidates(self, kind: str, buckets: Iterable[int]) -> Dict[str, int]:
+        """
+        Find items sharing at least one bucket.
+
+        Returns:
+            Dict[str, int]: Number of shared buckets by item id.
+        """
+        wanted = list(dict.fromkeys(buckets))
+        found: Dict[str, int] = {}
+        for start in range(0, len(wanted), _MAX_PARAMS):
+            batch = wanted[start : start + _MAX_PARAMS]
+            rows = self.db.execute_query(
+                "SELECT item_id, COUNT(*) AS shared FROM minhash_buckets "
+                f"WHERE kind = ? AND bucket IN ({', '.join('?' * len(batch))}) "
+                "GROUP BY item_id",
+                (kind, *batch),
+                fetch=True,
+            )
+            for row in rows or []:
+                found[row["item_id"]] = found.get(row["item_id"], 0) + row["shared"]
+        return found
+
+    def items(self, kind: str, item_ids: Iterable[str]) -> Dict[str, Tuple[bytes, str]]:
+        """
+        Look up stored items.
+
+        Returns:
+            Dict[str, Tuple[bytes, str]]: `(signature, payload)` by item id, for
+            the ids that are stored.
+        """
+        wanted = list(dict.fromkeys(item_ids))
+        found: Dict[str, Tuple[bytes, str]] = {}
+        for start in range(0, len(wanted), _MAX_PARAMS):
+            batch = wanted[start : start + _MAX_PARAMS]
+            rows = self.db.fetch_data(
+                "minhash_items",
+                f"kind = ? AND item_id IN ({', '.join('?' * len(batch))})",
+                (kind, *batch),
+            )
+            found.update(
+                (row["item_id"], (row["signature"], row["payload"])) for row in rows
+            )
+        return found
+
+    def remove_prefixed(self, kind: str, prefix: str) -> List[Tuple[str, bytes, str]]:
+        """
+        Remove the items, buckets and aliases of a kind whose id starts with
+        `prefix`, e.g. every insight of one video before it is indexed again.
+
+        Aliases of removed items that do not match `prefix` themselves would be
+        left pointing at nothing, so they are removed as well and returned for
+        the caller to index again.
+
+        Returns:
+            List[Tuple[str, bytes, str]]: `(item_id, signature, payload)` of the
+            orphaned aliases, by item id.
+        """
+        # substr() rather than LIKE, since ids may contain `_` and `%`.
+        match = "kind = ? AND substr(item_id, 1, ?) = ?"
+        params = (kind, len(prefix), prefix)
+        orphaned = (
+            "kind = ? AND substr(canonical_id, 1, ?) = ? "
+            "AND substr(item_id, 1, ?) != ?"
+        )
+        orphaned_params = (*params, len(prefix), prefix)
+        with self.db.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT item_id, signature, payload FROM minhash_aliases "
+                f"WHERE {orphaned} ORDER BY item_id",
+                orphaned_params,
+            ).fetchall()
+            _ = conn.execute(
+                f"DELETE FROM minhash_aliases WHERE {orphaned}", orphaned_params
+            )
+            for table in ("minhash_buckets", "minhash_items", "minhash_aliases"):
+                _ = conn.execute(f"DELETE FROM {table} WHERE {match}", params)
+            conn.commit()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    def add_alias(
+        self,
+        kind: str,
+        item_id: str,
+        canonical_id: str,
+        signature: bytes,
+        payload: str = "",
+    ) -> None:
+        """
+        Record that `item_id` is a near-duplicate of the stored `canonical_id`.
+
+        Args:
+            kind (str): Index the item belongs to.
+            item_id (str): Item identifier, unique within `kind`.
+            canonical_id (str): The stored item it duplicates.
+            signature (bytes): Serialized MinHash signature of the item.
+            payload (str): Data to store with the item if it is ever promoted.
+        """
+        _ = self.db.execute_query(
+            "INSERT OR REPLACE INTO minhash_aliases "
+            "(kind, item_id, canonical_id, signature, payload) VALUES (?, ?, ?, ?, ?)",
+            (kind, item_id, canonical_id, signature, payload),
+        )
+
+    def canonical_id(self, kind: str, item_id: str) -> Optional[str]:
+        """Return the stored item `item_id` was collapsed into, if any."""
+        rows = self.db.execute_query(
+            "SELECT canonical_id FROM minhash_aliases WHERE kind = ? AND item_id = ?",
+            (kind, item_id),
+            fetch=True,
+        )
+        return rows[0]["canonical_id"] if rows else None
+
+    def count(self, kind: str) -> int:
+        """Return the number of stored (not aliased) items of a kind."""
+        rows = self.db.execute_query(
+            "SELECT COUNT(*) AS n FROM minhash_items WHERE kind = ?",
+            (kind,),
+            fetch=True,
+        )
+        return rows[0]["n"] if rows else 0
@@ -0,0 +1,229 @@
+import csv
+import dataclasses
+import os
+import tempfile
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from persistence.storage import replacement_mode
+
+# Columns with few distinct values that compress well as dictionaries.
+DEFAULT_DICTIONARY_COLUMNS = ("category", "video_id")
+
+# Rows read past the first batch to find the type of a column it leaves empty.
+_TYPE_LOOKAHEAD = 10000
+
+
+def _as_dict(row: Any) -> Dict[str, Any]:
+    """Normalize a dict, dataclass or pydantic model into a plain dict."""
+    if isinstance(row, dict):
+        return row
+    if dataclasses.is_dataclass(row):
+        return dataclasses.asdict(row)
+    if hasattr(row, "model_dump"):
+        return row.model_dump()
+    raise TypeError(f"Cannot export row of type {type(row).__name__}")
+
+
+@contextmanager
+def _atomic_path(file_path: str) -> Iterator[str]:
+    """
+    Yield a temporary path that replaces `file_path` only on success. If nothing
+    was written to it (no rows), any existing file is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    os.close(fd)
+    try:
+        yield tmp_path
+        if os.path.getsize(tmp_path) > 0:
+            os.chmod(tmp_path, replacement_mode(file_path))
+            os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def export_csv(
+    rows: Iterable[Any],
+    file_path: str,
+    fieldnames: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Stream rows to a CSV file without holding them in memory.
+
+    Args:
+        rows: Iterable of dicts, dataclasses or pydantic models, e.g. straight from
+            `Database.iter_rows`.
+        file_path: Path to the CSV file.
+        fieldnames: Column order. Defaults to the keys of the first row; later rows
+            may omit columns but must not add new ones.
+
+    Returns:
+        Number of rows written.
+    """
+    iterator = (_as_dict(row) for row in rows)
+    first = next(iterator, None)
+    if first is None:
+        return 0
+
+    count = 0
+    with _atomic_path(file_path) as tmp_path:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(fieldnames or first.keys()))
+            writer.writeheader()
+            writer.writerow(first)
+            count = 1
+            for row in iterator:
+                writer.writerow(row)
+                count += 1
+    return count
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow  # type: ignore
+    except ImportError as e:
+        raise ImportError(
+            "Columnar export requires pyarrow; install it with `pip install pyarrow`"
+        ) from e
+    return pyarrow
+
+
+def _iter_tables(
+    rows: Iterable[Any],
+    batch_size: int,
+    dictionary_columns: Sequence[str],
+) -> Iterator[Any]:
+    """
+    Group rows into Arrow tables of at most `batch_size` rows sharing one schema.
+
+    The schema is inferred from the first batch. A column that is None
+    throughout it is typed from its first non-null value in the next
+    `_TYPE_LOOKAHEAD` rows, which are held until then; a column that is still
+    empty after them keeps the null type.
+    """
+    pa = _require_pyarrow()
+    iterator = (_as_dict(row) for row in rows)
+    first: List[Dict[str, Any]] = list(islice(iterator, batch_size))
+    if not first:
+        return
+    columns = list(first[0].keys())
+    inferred = pa.Table.from_pylist(first).schema
+    untyped = {
+        name
+        for name in columns
+        if pa.types.is_null(inferred.field(name).type)
+        and name not in dictionary_columns
+    }
+    samples: Dict[str, Any] = {}
+    lookahead: List[Dict[str, Any]] = []
+    if untyped:
+        for row in islice(iterator, _TYPE_LOOKAHEAD):
+            lookahead.append(row)
+            for name in untyped - samples.keys():
+                if row.get(name) is not None:
+                    samples[name] = row[name]
+            if len(samples) == len(untyped):
+                break
+
+    def field(name: str) -> Any:
+        if name in dictionary_columns:
+            return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+        if name in samples:
+            return pa.field(name, pa.array([samples[name]]).type)
+        return inferred.field(name)
+
+    schema = pa.schema([field(name) for name in columns])
+    yield pa.Table.from_pylist(first, schema=schema)
+    remaining = chain(lookahead, iterator)
+    while True:
+        batch: List[Dict[str, Any]] = list(islice(remaining, batch_size))
+        if not batch:
+            return
+        yield pa.Table.from_pylist(batch, schema=schema)
+
+
+def export_parquet(
+    rows: Iterable[Any],
+    file_path: str,
+    row_group_size: int = 65536,
+    dictionary_columns: Sequence[str] = DEFAULT_DICTIONARY_COLUMNS,
+    compression: str = "zstd",
+) -> int:
+    """
+    Stream rows to a Parquet file, one row group at a time.
+
+    Memory use is bounded by `row_group_size`, so arbitrarily many rows can be
+    exported. Columns named in `dictionary_columns` are dictionary-encoded; the
+    remaining column types are inferred from the first row group, looking
+    further ahead for columns that are empty in it.
+
+    Args:
+        rows: Iterable of dicts, dataclasses or pydantic models.
+        file_path: Path to the Parquet file.
+        row_group_size: Number of rows per row group.
+        dictionary_columns: Columns to store as dictionary-encoded strings.
+        compression: Parquet compression codec.
+
+    Returns:
+        Number of rows written.
+    """
+    _require_pyarrow()
+    import pyarrow.parquet as pq  # type: ignore
+
+    count = 0
+    writer = None
+    with _atomic_path(file_path) as tmp_path:
+        try:
+            for table in _iter_tables(rows, row_group_size, dictionary_columns):
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        tmp_path, table.schema, compression=compression
+                    )
+                writer.write_table(table, row_group_size=row_group_size)
+                count += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+    return count
+
+
+def export_arrow(
+    rows: Iterable[Any],
+    file_path: str,
+    batch_size: int = 65536,
+    dictionary_columns: Sequence[str] = DEFAULT_DICTIONARY_COLUMNS,
+) -> int:
+    """
+    Stream rows to an Arrow IPC stream file, one record batch at a time.
+
+    The IPC streaming format is used because, unlike the random-access file
+    format, it allows each batch to carry its own dictionary. Read it back with
+    `pyarrow.ipc.open_stream`.
+
+    Args:
+        rows: Iterable of dicts, dataclasses or pydantic models.
+        file_path: Path to the Arrow file.
+        batch_size: Number of rows per record batch.
+        dictionary_columns: Columns to store as dictionary-encoded strings.
+
+    Returns:
+        Number of rows written.
+    """
+    pa = _require_pyarrow()
+
+    count = 0
+    writer = None
+    with _atomic_path(file_path) as tmp_path:
+        try:
+            for table in _iter_tables(rows, batch_size, dictionary_columns):
+                if writer is None:
+                    writer = pa.ipc.new_stream(tmp_path, table.schema)
+                writer.write_table(table, max_chunksize=batch_size)
+                count += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+    return count
@@ -0,0 +1,123 @@
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from persistence.database import Database
+
+# SQLite limits the number of parameters in one statement.
+_MAX_PARAMS = 500
+
+
+class KeywordStore:
+    """
+    Corpus-wide document frequencies for TF-IDF, and the insights of every
+    video for topic analytics.
+
+    The term set of each document is kept alongside the counts, so adding a
+    document again, e.g. after its captions were edited, replaces its
+    contribution instead of counting it twice. Updates only touch the terms
+    of the documents added; nothing is recomputed over the corpus.
+    """
+
+    def __init__(self, db_path: str = "keywords.db"):
+        """
+        Initialize the store, creating its tables if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file.
+        """
+        self.db = Database(db_path)
+        self.db.create_table(
+            "document_frequencies",
+            "term TEXT PRIMARY KEY, doc_count INTEGER NOT NULL",
+        )
+        self.db.create_table(
+            "keyword_documents",
+            "doc_id TEXT PRIMARY KEY, terms TEXT NOT NULL",
+        )
+        self.db.create_table(
+            "video_insights",
+            "video_id TEXT NOT NULL, position INTEGER NOT NULL, text TEXT NOT NULL, "
+            "PRIMARY KEY (video_id, position)",
+        )
+
+    def add_documents(self, documents: Mapping[str, Iterable[str]]) -> None:
+        """
+        Count the terms of documents, replacing earlier versions of them, in
+        a single transaction.
+
+        Args:
+            documents: The distinct terms of each document, by document id.
+        """
+        new_terms = {doc_id: sorted(set(terms)) for doc_id, terms in documents.items()}
+        with self.db.get_connection() as conn:
+            delta: Counter = Counter()
+            ids = list(new_terms)
+            for start in range(0, len(ids), _MAX_PARAMS):
+                batch = ids[start : start + _MAX_PARAMS]
+                rows = conn.execute(
+                    "SELECT terms FROM keyword_documents "
+                    f"WHERE doc_id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                for (terms,) in rows:
+                    delta.subtract(terms.split("\n") if terms else [])
+            for terms in new_terms.values():
+                delta.update(terms)
+
+            _ = conn.executemany(
+                "INSERT INTO document_frequencies (term, doc_count) VALUES (?, ?) "
+                "ON CONFLICT (term) DO UPDATE SET doc_count = doc_count + excluded.doc_count",
+                [(term, change) for term, change in delta.items() if change],
+            )
+            _ = conn.execute("DELETE FROM document_frequencies WHERE doc_count <= 0")
+            _ = conn.executemany(
+                "INSERT OR REPLACE INTO keyword_documents (doc_id, terms) VALUES (?, ?)",
+                [(doc_id, "\n".join(terms)) for doc_id, terms in new_terms.items()],
+            )
+            conn.commit()
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        """
+        Look up in how many documents each term appears.
+
+        Returns:
+            Dict[str, int]: Counts by term, for the terms that appear at all.
+        """
+        wanted = list(dict.fromkeys(terms))
+        found: Dict[str, int] = {}
+        with self.db.get_connection() as conn:
+            for start in range(0, len(wanted), _MAX_PARAMS):
+                batch = wanted[start : start + _MAX_PARAMS]
+                rows = conn.execute(
+                    "SELECT term, doc_count FROM document_frequencies "
+                    f"WHERE term IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                found.update(rows)
+        return found
+
+    def document_count(self) -> int:
+        """Return the number of documents counted."""
+        rows = self.db.execute_query(
+            "SELECT COUNT(*) AS n FROM keyword_documents", fetch=True
+        )
+        return rows[0]["n"] if rows else 0
+
+    def set_insights(self, video_id: str, insights: List[str]) -> None:
+        """Record the insights extracted from a video, replacing earlier ones."""
+        with self.db.get_connection() as conn:
+            _ = conn.execute(
+                "DELETE FROM video_insights WHERE video_id = ?", (video_id,)
+            )
+            _ = conn.executemany(
+                "INSERT INTO video_insights (video_id, position, text) VALUES (?, ?, ?)",
+                [(video_id, position, text) for position, text in enumerate(insights)],
+            )
+            conn.commit()
+
+    def iter_insights(self) -> Iterator[Tuple[str, str]]:
+        """Yield `(video_id, text)` for every stored insight, video by video."""
+        for row in self.db.iter_rows(
+            "SELECT video_id, text FROM video_insights ORDER BY video_id, position"
+        ):
+            yield row["video_id"], row["text"]
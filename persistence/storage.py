@@ -1,7 +1,63 @@
 import json
 import os
 import pickle
-from typing import Any, Dict, List, Optional
+import stat
+import tempfile
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # Optional fast JSON backend
+    orjson = None
+
+
+def _dumps_compact(data: Any) -> bytes:
+    """
+    Serialize data to compact UTF-8 JSON, using orjson when installed. Keys
+    that are not strings are converted like the stdlib does, and data orjson
+    cannot serialize falls back to the stdlib. Unlike the stdlib, orjson
+    writes NaN and infinities as null.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Read once: querying the umask means briefly changing it, which is not
+# thread-safe.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def replacement_mode(file_path: str) -> int:
+    """
+    Return the permissions a file replacing `file_path` should get: those of
+    the existing file, or the umask default for a new one. `mkstemp` creates
+    files readable only by their owner.
+    """
+    try:
+        return stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _loads(raw: bytes) -> Any:
+    """
+    Parse UTF-8 JSON, using orjson when installed. Documents orjson rejects,
+    such as the `NaN` and `Infinity` the stdlib writes, are parsed by the
+    stdlib instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
 
 
 class StorageManager:
@@ -11,16 +67,22 @@ class StorageManager:
     """
 
     @staticmethod
-    def save_json(data: Dict[str, Any], file_path: str) -> None:
+    def save_json(data: Dict[str, Any], file_path: str, compact: bool = False) -> None:
         """
-        Save data to a JSON file.
+        Save data to a JSON file. The file is replaced atomically, so readers never
+        observe a partially written file.
 
         Args:
             data: The data to be saved.
             file_path: Path to the JSON file.
+            compact: Write compact JSON through the fast serializer instead of
+                pretty-printing it.
         """
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        if compact:
+            payload = _dumps_compact(data)
+        else:
+            payload = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+        StorageManager.atomic_write(file_path, payload)
 
     @staticmethod
     def load_json(file_path: str) -> Dict[str, Any]:
@@ -37,8 +99,8 @@ class StorageManager:
             FileNotFoundError: If the file does not exist.
             json.JSONDecodeError: If the file is not valid JSON.
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(file_path, "rb") as f:
+            return _loads(f.read())
 
     @staticmethod
     def save_pickle(data: Any, file_path: str) -> None:
@@ -73,7 +135,9 @@ class StorageManager:
     @staticmethod
     def save_csv(data: List[Dict[str, Any]], file_path: str) -> None:
         """
-        Save a list of dictionaries to a CSV file.
+        Save a list of dictionaries to a CSV file. The header is the union of all
+        row keys in first-seen order. For iterators or very large exports use
+        `persistence.export.export_csv`, which streams rows instead.
 
         Args:
             data: List of dictionaries where keys are column headers.
@@ -82,12 +146,34 @@ class StorageManager:
         if not data:
             return
 
-        import csv
+        from persistence.export import export_csv
+
+        fieldnames = list(dict.fromkeys(key for row in data for key in row))
+        _ = export_csv(data, file_path, fieldnames=fieldnames)
+
+    @staticmethod
+    def atomic_write(file_path: str, payload: bytes) -> None:
+        """
+        Write bytes to a file atomically via a temporary file and rename. The
+        file keeps its permissions, or gets the umask default if it is new.
 
-        with open(file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
+        Args:
+            file_path: Path to the destination file.
+            payload: The bytes to write.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, replacement_mode(file_path))
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
 
     @staticmethod
     def ensure_directory_exists(directory_path: str) -> None:
@@ -98,3 +184,119 @@ class StorageManager:
             directory_path: Path to the directory.
         """
         os.makedirs(directory_path, exist_ok=True)
+
+
+class JsonlLog:
+    """
+    An append-only JSON Lines log with an offset index.
+
+    Each record is one compact JSON line. A sidecar index file (`<log>.idx`) stores
+    the byte offset of every record as unsigned 64-bit integers, so a single record
+    can be read by position without parsing the rest of the log. A torn trailing
+    line left by a crash is discarded when the log is opened.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Open or create a log.
+
+        Args:
+            file_path: Path to the JSONL log file.
+        """
+        self.file_path = file_path
+        self.index_path = file_path + ".idx"
+        self._lock = threading.Lock()
+        self._offsets = array("Q")
+        self._recover()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, record: Any) -> int:
+        """
+        Append a record to the log.
+
+        Args:
+            record: JSON-serializable record.
+
+        Returns:
+            The position of the appended record.
+        """
+        return self.extend([record])
+
+    def extend(self, records: List[Any]) -> int:
+        """
+        Append several records with a single write.
+
+        Args:
+            records: JSON-serializable records.
+
+        Returns:
+            The position of the last appended record.
+        """
+        lines = [_dumps_compact(record) + b"\n" for record in records]
+        with self._lock:
+            with open(self.file_path, "ab") as f:
+                offset = f.tell()
+                new_offsets = array("Q")
+                for line in lines:
+                    new_offsets.append(offset)
+                    offset += len(line)
+                f.write(b"".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.index_path, "ab") as f:
+                new_offsets.tofile(f)
+            self._offsets.extend(new_offsets)
+            return len(self._offsets) - 1
+
+    def read(self, position: int) -> Any:
+        """
+        Read a single record by position.
+
+        Args:
+            position: Zero-based record position; negative values count from the end.
+
+        Returns:
+            The decoded record.
+
+        Raises:
+            IndexError: If there is no record at that position.
+        """
+        offset = self._offsets[position]
+        with open(self.file_path, "rb") as f:
+            f.seek(offset)
+            return _loads(f.readline())
+
+    def __iter__(self) -> Iterator[Any]:
+        with open(self.file_path, "rb") as f:
+            f.seek(0)
+            for _ in range(len(self._offsets)):
+                yield _loads(f.readline())
+
+    def _recover(self) -> None:
+        """Load the index, then re-index or truncate whatever it does not cover."""
+        if not os.path.exists(self.file_path):
+            open(self.file_path, "ab").close()
+        size = os.path.getsize(self.file_path)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                raw = f.read()
+            self._offsets.frombytes(raw[: len(raw) - len(raw) % self._offsets.itemsize])
+            while self._offsets and self._offsets[-1] >= size:
+                self._offsets.pop()
+
+        start = self._offsets.pop() if self._offsets else 0
+        with open(self.file_path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._offsets.append(offset)
+                offset += len(line)
+        if offset != size:
+            with open(self.file_path, "r+b") as f:
+                f.truncate(offset)
+        StorageManager.atomic_write(self.index_path, self._offsets.tobytes())
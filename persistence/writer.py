@@ -0,0 +1,373 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class WriteOperation:
+    """A single queued write: one statement, run once or once per parameter set."""
+
+    query: str
+    params: Sequence[Any] = ()
+    many: bool = False
+    future: Optional[Future] = None
+
+
+@dataclass
+class WriterStats:
+    """Snapshot of the writer's queue and commit metrics."""
+
+    queue_depth: int
+    batches_committed: int
+    writes_committed: int
+    writes_failed: int
+    last_batch_size: int
+    max_batch_size: int
+    avg_batch_size: float
+    last_commit_latency: float  # Seconds
+    max_commit_latency: float  # Seconds
+    avg_commit_latency: float  # Seconds
+
+
+class DatabaseWriter:
+    """
+    Serializes all writes to a SQLite database through one background thread.
+
+    Callers enqueue write operations from any thread. The writer thread drains the
+    queue in batches and commits each batch as a single transaction (group commit),
+    so concurrent sessions never contend for the SQLite write lock. Readers keep
+    using their own connections; the database is switched to WAL mode so reads
+    are not blocked by the writer.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "wisdom_extractor.db",
+        max_batch_size: int = 256,
+        max_batch_delay: float = 0.002,
+        max_queue_size: int = 10000,
+    ):
+        """
+        Initialize the writer. The background thread starts on first use.
+
+        Args:
+            db_path (str): Path to the SQLite database file.
+            max_batch_size (int): Maximum number of operations per commit.
+            max_batch_delay (float): Seconds to wait for more operations before committing a batch.
+            max_queue_size (int): Maximum number of pending operations; `submit` blocks when full.
+        """
+        self.db_path = db_path
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        # Callers between accepting an operation and enqueueing it; `stop()`
+        # waits for them, so its marker follows every accepted operation.
+        self._putting = 0
+        self._puts_done = threading.Condition(self._lock)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._writes = 0
+        self._failed = 0
+        self._last_batch = 0
+        self._max_batch = 0
+        self._last_latency = 0.0
+        self._max_latency = 0.0
+        self._total_latency = 0.0
+
+    def start(self) -> None:
+        """
+        Start the writer thread if it is not already running.
+
+        Raises:
+            RuntimeError: If the writer was stopped.
+        """
+        with self._lock:
+            self._start_locked()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Flush pending operations and stop the writer thread. Operations
+        submitted afterwards are rejected.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the thread to finish.
+        """
+        with self._lock:
+            self._stopped = True
+            while self._putting:
+                self._puts_done.wait()
+            if self._thread is None:
+                return
+        self._put(_STOP)
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        # Joined without the lock, which the thread takes if it fails.
+        thread.join(timeout)
+        with self._lock:
+            if self._thread is thread:
+                self._thread = None
+
+    def submit(
+        self,
+        query: str,
+        params: Sequence[Any] = (),
+        wait: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """
+        Enqueue a write statement.
+
+        Args:
+            query (str): SQL statement to execute.
+            params (tuple): Parameters for the statement.
+            wait (bool): Block until the batch containing this write is committed.
+            timeout (float): Maximum seconds to wait when `wait` is True.
+
+        Returns:
+            Future: Resolves to the statement's rowcount once committed, or raises
+            the statement's error.
+        """
+        return self._enqueue(WriteOperation(query, tuple(params)), wait, timeout)
+
+    def submit_many(
+        self,
+        query: str,
+        seq_of_params: Iterable[Sequence[Any]],
+        wait: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """
+        Enqueue a statement to be executed once per parameter set (`executemany`).
+
+        Args:
+            query (str): SQL statement to execute.
+            seq_of_params (Iterable[tuple]): Parameter sets for the statement.
+            wait (bool): Block until the batch containing this write is committed.
+            timeout (float): Maximum seconds to wait when `wait` is True.
+
+        Returns:
+            Future: Resolves to the total rowcount once committed.
+        """
+        params = [tuple(p) for p in seq_of_params]
+        return self._enqueue(WriteOperation(query, params, many=True), wait, timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until every operation enqueued before this call is committed.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+        """
+        future = self._enqueue(WriteOperation("", ()), wait=False, timeout=None)
+        future.result(timeout)
+
+    def stats(self) -> WriterStats:
+        """
+        Return a snapshot of queue depth, batch sizes and commit latency.
+
+        Returns:
+            WriterStats: Current writer metrics.
+        """
+        with self._stats_lock:
+            return WriterStats(
+                queue_depth=self._queue.qsize(),
+                batches_committed=self._batches,
+                writes_committed=self._writes,
+                writes_failed=self._failed,
+                last_batch_size=self._last_batch,
+                max_batch_size=self._max_batch,
+                avg_batch_size=(
+                    (self._writes + self._failed) / self._batches
+                    if self._batches
+                    else 0.0
+                ),
+                last_commit_latency=self._last_latency,
+                max_commit_latency=self._max_latency,
+                avg_commit_latency=(
+                    self._total_latency / self._batches if self._batches else 0.0
+                ),
+            )
+
+    def _start_locked(self) -> None:
+        if self._stopped:
+            raise RuntimeError("DatabaseWriter has been stopped")
+        self._ensure_thread_locked()
+
+    def _ensure_thread_locked(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _enqueue(
+        self, operation: WriteOperation, wait: bool, timeout: Optional[float]
+    ) -> Future:
+        operation.future = Future()
+        with self._lock:
+            self._start_locked()
+            self._putting += 1
+        try:
+            self._put(operation)
+        finally:
+            with self._lock:
+                self._putting -= 1
+                self._puts_done.notify_all()
+        if wait:
+            _ = operation.future.result(timeout)
+        return operation.future
+
+    def _put(self, item: Any) -> None:
+        # Not under the lock, which a failing writer thread needs to fail the
+        # queued operations. While the queue is full, make sure a thread is
+        # still draining it.
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                with self._lock:
+                    self._ensure_thread_locked()
+        # A thread that died before the put has already failed the queue and
+        # will not see the item; start another to serve it.
+        with self._lock:
+            self._ensure_thread_locked()
+
+    def _run(self) -> None:
+        try:
+            self._serve()
+        except Exception as e:
+            logger.exception("SQLite writer thread failed")
+            self._fail_pending(e)
+
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every queued operation after the writer thread died."""
+        with self._lock:
+            if self._thread is threading.current_thread():
+                # The next submit starts a fresh thread.
+                self._thread = None
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP and not item.future.done():
+                    item.future.set_exception(error)
+
+    def _serve(self) -> None:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            _ = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+            stopping = False
+            while not stopping:
+                batch: List[WriteOperation] = []
+                item = self._queue.get()
+                deadline = time.monotonic() + self.max_batch_delay
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                    else:
+                        batch.append(item)
+                    if stopping or len(batch) >= self.max_batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = (
+                            self._queue.get(timeout=remaining)
+                            if remaining > 0
+                            else self._queue.get_nowait()
+                        )
+                    except queue.Empty:
+                        break
+                if stopping:
+                    # Drain anything enqueued before the stop marker.
+                    while True:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is not _STOP:
+                            batch.append(item)
+                if batch:
+                    try:
+                        self._commit_batch(conn, batch)
+                    except Exception as e:
+                        # Dequeued operations are no longer failed by
+                        # `_fail_pending`, so fail them here.
+                        for operation in batch:
+                            if not operation.future.done():
+                                operation.future.set_exception(e)
+                        raise
+        finally:
+            conn.close()
+
+    def _commit_batch(
+        self, conn: sqlite3.Connection, batch: List[WriteOperation]
+    ) -> None:
+        started = time.perf_counter()
+        results: List[Any] = []
+        committed = 0
+        failed = 0
+        try:
+            _ = conn.execute("BEGIN IMMEDIATE")
+            for operation in batch:
+                if not operation.query:
+                    results.append(None)
+                    continue
+                # A savepoint per operation keeps one bad statement from
+                # rolling back the rest of the group commit.
+                _ = conn.execute("SAVEPOINT write_op")
+                try:
+                    if operation.many:
+                        cursor = conn.executemany(operation.query, operation.params)
+                    else:
+                        cursor = conn.execute(operation.query, operation.params)
+                    results.append(cursor.rowcount)
+                    committed += 1
+                    _ = conn.execute("RELEASE write_op")
+                except sqlite3.Error as e:
+                    _ = conn.execute("ROLLBACK TO write_op")
+                    _ = conn.execute("RELEASE write_op")
+                    results.append(e)
+                    failed += 1
+            _ = conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                _ = conn.execute("ROLLBACK")
+            for operation in batch:
+                operation.future.set_exception(e)
+            with self._stats_lock:
+                self._failed += len(batch)
+            return
+
+        latency = time.perf_counter() - started
+        with self._stats_lock:
+            self._batches += 1
+            self._writes += committed
+            self._failed += failed
+            self._last_batch = len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._last_latency = latency
+            self._max_latency = max(self._max_latency, latency)
+            self._total_latency += latency
+
+        for operation, result in zip(batch, results):
+            if isinstance(result, Exception):
+                operation.future.set_exception(result)
+            else:
+                operation.future.set_result(result)
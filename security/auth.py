@@ -2,12 +2,327 @@
 # Handles user authentication if needed (e.g., Streamlit secrets or OAuth for YouTube API)
 
 import os
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-from dotenv import load_dotenv
+from config.config import load_env
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
+
+
+class TokenBucket:
+    """
+    A token bucket rate limiter: holds up to `capacity` tokens and refills at
+    `rate` tokens per second.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second. Zero never refills.
+            capacity (float): Maximum number of tokens (the allowed burst).
+            clock (Callable): Monotonic time source, injectable for tests.
+
+        Raises:
+            ValueError: If `rate` or `capacity` is negative.
+        """
+        if rate < 0 or capacity < 0:
+            raise ValueError("TokenBucket rate and capacity must not be negative")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def set_level(self, tokens: float) -> None:
+        """
+        Overwrite the number of tokens, e.g. with a value synchronized from
+        shared storage. Negative values represent debt that must refill first.
+
+        Args:
+            tokens (float): The new token count.
+        """
+        self.tokens = min(self.capacity, tokens)
+        self._updated = self._clock()
+
+    def available(self) -> float:
+        """
+        Returns:
+            float: The number of tokens currently available.
+        """
+        self._refill()
+        return self.tokens
+
+    def try_consume(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens from the bucket if enough are available.
+
+        Args:
+            tokens (float): Number of tokens to take.
+
+        Returns:
+            bool: True if the tokens were taken, otherwise False.
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """
+        Args:
+            tokens (float): Number of tokens needed.
+
+        Returns:
+            float: Seconds until that many tokens will be available.
+        """
+        self._refill()
+        if self.tokens >= tokens or self.rate <= 0:
+            return 0.0 if self.tokens >= tokens else float("inf")
+        return (tokens - self.tokens) / self.rate
+
+
+@dataclass
+class KeyUsage:
+    """Usage counters and health of one pooled API key."""
+
+    key_id: str
+    requests: int = 0
+    successes: int = 0
+    rate_limited: int = 0
+    auth_failures: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+
+
+class KeyLease:
+    """A key checked out from an `APIKeyPool` for one request."""
+
+    def __init__(self, pool: "APIKeyPool", key: Optional[str]):
+        self._pool = pool
+        self.key = key
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def report(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """
+        Record the upstream response status for this request.
+
+        Args:
+            status_code (int): HTTP status returned by the provider.
+            retry_after (float): Seconds from a `Retry-After` header, if any.
+        """
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def mask_key(key: str) -> str:
+    """Return a short identifier for a key that is safe to log."""
+    return f"...{key[-4:]}" if len(key) > 8 else "..."
+
+
+class APIKeyPool:
+    """
+    Spreads requests across several API keys.
+
+    Each key has its own token-bucket request budget and health state. A key that
+    gets a 429 cools down (for `Retry-After` seconds when the provider sends it);
+    a key that gets a 401/403 is benched for much longer. Each request goes to the
+    healthy key with a free budget and the fewest requests in flight.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        requests_per_minute: float = 20.0,
+        burst: Optional[float] = None,
+        rate_limit_cooldown: float = 30.0,
+        auth_failure_cooldown: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            keys (List[str]): API keys; duplicates and empty values are ignored.
+            requests_per_minute (float): Request budget per key.
+            burst (float): Bucket capacity per key. Defaults to one minute's budget.
+            rate_limit_cooldown (float): Seconds a key rests after a 429.
+            auth_failure_cooldown (float): Seconds a key rests after a 401/403.
+            clock (Callable): Monotonic time source, injectable for tests.
+            sleep (Callable): Sleep function, injectable for tests.
+
+        Raises:
+            ValueError: If the budget could never let a request through.
+        """
+        capacity = burst if burst is not None else requests_per_minute
+        if requests_per_minute <= 0 or capacity < 1:
+            raise ValueError(
+                "requests_per_minute must be positive and burst at least 1"
+            )
+        self.keys = list(dict.fromkeys(key for key in keys if key))
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.auth_failure_cooldown = auth_failure_cooldown
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        rate = requests_per_minute / 60.0
+        self._buckets = {key: TokenBucket(rate, capacity, clock) for key in self.keys}
+        self._usage = {key: KeyUsage(mask_key(key)) for key in self.keys}
+
+    @classmethod
+    def from_env(
+        cls,
+        pool_var: str = "OPENROUTER_API_KEYS",
+        single_var: str = "OPENROUTER_API_KEY",
+        **kwargs,
+    ) -> "APIKeyPool":
+        """
+        Build a pool from a comma-separated environment variable, plus the
+        single-key variable for backwards compatibility.
+
+        Args:
+            pool_var (str): Variable holding comma-separated keys.
+            single_var (str): Variable holding a single key.
+
+        Returns:
+            APIKeyPool: The pool (possibly empty).
+        """
+        keys = [key.strip() for key in os.getenv(pool_var, "").split(",")]
+        keys.append(os.getenv(single_var, ""))
+        return cls(keys, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _pick(self) -> Tuple[Optional[str], float]:
+        """Choose a key, or return how long to wait before one may be free."""
+        now = self._clock()
+        best = None
+        wait = float("inf")
+        for key in self.keys:
+            usage = self._usage[key]
+            if usage.cooldown_until > now:
+                wait = min(wait, usage.cooldown_until - now)
+                continue
+            bucket = self._buckets[key]
+            if bucket.available() < 1:
+                wait = min(wait, bucket.time_until(1))
+                continue
+            rank = (usage.in_flight, -bucket.available())
+            if best is None or rank < best[0]:
+                best = (rank, key)
+        if best is None:
+            return None, wait
+        return best[1], 0.0
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[KeyLease]:
+        """
+        Check out the least-loaded healthy key for one request.
+
+        Call `lease.report(status_code)` with the provider's response status; a
+        lease exited without a report counts as a success, and one exited by an
+        exception counts as an error. An empty pool yields a lease whose key is None.
+
+        Args:
+            timeout (float): Maximum seconds to wait for a key with free budget.
+
+        Yields:
+            KeyLease: The checked-out key.
+
+        Raises:
+            TimeoutError: If no key became available within `timeout`, or none
+                ever can.
+        """
+        if not self.keys:
+            yield KeyLease(self, None)
+            return
+
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                key, wait = self._pick()
+                if key is not None:
+                    _ = self._buckets[key].try_consume()
+                    usage = self._usage[key]
+                    usage.requests += 1
+                    usage.in_flight += 1
+                    break
+            if wait == float("inf"):
+                raise TimeoutError("No API key will ever become available")
+            if deadline is not None and self._clock() + wait > deadline:
+                raise TimeoutError("No API key available within the timeout")
+            self._sleep(min(wait, 1.0))
+
+        lease = KeyLease(self, key)
+        try:
+            yield lease
+        except BaseException:
+            with self._lock:
+                usage.in_flight -= 1
+                if lease.status_code is None:
+                    usage.errors += 1
+                else:
+                    self._record(key, lease)
+            raise
+        with self._lock:
+            usage.in_flight -= 1
+            self._record(key, lease)
+
+    def _record(self, key: str, lease: KeyLease) -> None:
+        """Update counters and health from a reported status. Lock must be held."""
+        usage = self._usage[key]
+        status = lease.status_code
+        if status is None or 200 <= status < 400:
+            usage.successes += 1
+        elif status == 429:
+            usage.rate_limited += 1
+            cooldown = lease.retry_after or self.rate_limit_cooldown
+            usage.cooldown_until = self._clock() + cooldown
+        elif status in (401, 403):
+            usage.auth_failures += 1
+            usage.cooldown_until = self._clock() + self.auth_failure_cooldown
+        else:
+            usage.errors += 1
+
+    def usage(self) -> List[KeyUsage]:
+        """
+        Returns:
+            List[KeyUsage]: A snapshot of per-key counters, identified by masked key.
+        """
+        with self._lock:
+            return [KeyUsage(**vars(self._usage[key])) for key in self.keys]
+
+    def healthy_keys(self) -> int:
+        """
+        Returns:
+            int: Number of keys not currently cooling down.
+        """
+        now = self._clock()
+        with self._lock:
+            return sum(1 for key in self.keys if self._usage[key].cooldown_until <= now)
 
 
 class AuthManager:
@@ -41,3 +356,33 @@ class AuthManager:
             bool: True if the API key exists, otherwise False.
         """
         return key_name in os.environ and os.environ[key_name] is not None
+
+    _key_pools: Dict[Tuple[str, str], APIKeyPool] = {}
+    _key_pools_lock = threading.Lock()
+
+    @staticmethod
+    def get_key_pool(
+        pool_var: str = "OPENROUTER_API_KEYS", single_var: str = "OPENROUTER_API_KEY"
+    ) -> APIKeyPool:
+        """
+        Returns the shared key pool loaded from the given environment variables.
+
+        Args:
+            pool_var (str): Variable holding comma-separated keys.
+            single_var (str): Variable holding a single key.
+
+        Returns:
+            APIKeyPool: The cached pool for these variables.
+        """
+        with AuthManager._key_pools_lock:
+            pool = AuthManager._key_pools.get((pool_var, single_var))
+            if pool is None:
+                pool = APIKeyPool.from_env(
+                    pool_var,
+                    single_var,
+                    requests_per_minute=float(
+                        os.getenv("API_KEY_REQUESTS_PER_MINUTE", 20)
+                    ),
+                )
+                AuthManager._key_pools[(pool_var, single_var)] = pool
+            return pool
@@ -0,0 +1,276 @@
+# quota.py
+# Per-identity request quotas, shared across replicas through SQLite
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from config.config import Config
+from persistence.database import Database
+from security.auth import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QuotaStatus:
+    """The result of a quota check, suitable for showing to the user."""
+
+    allowed: bool
+    remaining: float
+    capacity: float
+    retry_after: float  # Seconds until the next request would be allowed
+
+
+class _IdentityBucket:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        # Tokens consumed locally since the last sync.
+        self.pending = 0.0
+        # Whether the identity was checked since the last sync or eviction.
+        self.used = True
+
+
+class QuotaManager:
+    """
+    Per-identity token-bucket quotas.
+
+    Checks run entirely in memory. When a database path is given, a background
+    thread periodically merges each replica's local consumption into a shared
+    SQLite table and pulls back the combined level, so limits hold across replicas
+    (to within one sync interval).
+
+    Only identities with local consumption are written on a sync. Identities
+    idle for a whole sync interval are evicted from memory and reloaded from
+    the shared table when next seen; without a database, identities are
+    evicted once their bucket is full again, since a full bucket is the same
+    as a new one.
+    """
+
+    def __init__(
+        self,
+        capacity: float = 20.0,
+        refill_per_hour: float = 20.0,
+        db_path: Optional[str] = None,
+        sync_interval: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the quota manager.
+
+        Args:
+            capacity (float): Maximum requests an identity can burst.
+            refill_per_hour (float): Requests regained per hour.
+            db_path (str): SQLite database shared by all replicas. None keeps
+                quotas in memory only.
+            sync_interval (float): Seconds between background syncs.
+            clock (Callable): Wall-clock time source shared by replicas.
+        """
+        self.capacity = capacity
+        self.rate = refill_per_hour / 3600.0
+        self.sync_interval = sync_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _IdentityBucket] = {}
+        self._database = Database(db_path) if db_path else None
+        self._sync_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_eviction = clock()
+        if self._database is not None:
+            self._database.create_table(
+                "quota_buckets",
+                "identity TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                "updated_at REAL NOT NULL",
+            )
+
+    def _get(self, identity: str) -> _IdentityBucket:
+        # Called with the lock held. It is released while a first-seen
+        # identity is read from the shared table, so the read does not stall
+        # checks of other identities.
+        state = self._buckets.get(identity)
+        if state is None:
+            tokens = None
+            if self._database is not None:
+                self._lock.release()
+                try:
+                    tokens = self._load(identity)
+                finally:
+                    self._lock.acquire()
+                # Another thread may have loaded the identity meanwhile.
+                state = self._buckets.get(identity)
+            if state is None:
+                state = _IdentityBucket(
+                    TokenBucket(self.rate, self.capacity, self._clock)
+                )
+                if tokens is not None:
+                    state.bucket.set_level(tokens)
+                self._buckets[identity] = state
+        state.used = True
+        return state
+
+    def _load(self, identity: str) -> Optional[float]:
+        # One read per identity per replica; later checks stay in memory.
+        rows = self._database.fetch_data("quota_buckets", "identity = ?", (identity,))
+        if not rows:
+            return None
+        elapsed = max(0.0, self._clock() - rows[0]["updated_at"])
+        return rows[0]["tokens"] + elapsed * self.rate
+
+    def _evict_full(self) -> None:
+        # Called with the lock held, without a database. Amortized over checks.
+        now = self._clock()
+        if now - self._last_eviction < self.sync_interval:
+            return
+        self._last_eviction = now
+        for identity, state in list(self._buckets.items()):
+            if state.bucket.available() >= self.capacity:
+                del self._buckets[identity]
+
+    def _status(
+        self, state: _IdentityBucket, allowed: bool, cost: float
+    ) -> QuotaStatus:
+        return QuotaStatus(
+            allowed=allowed,
+            remaining=max(0.0, state.bucket.tokens),
+            capacity=self.capacity,
+            retry_after=0.0 if allowed else state.bucket.time_until(cost),
+        )
+
+    def check(self, identity: str, cost: float = 1.0) -> QuotaStatus:
+        """
+        Consume quota for one request if the identity has enough left.
+
+        Args:
+            identity (str): User, session or API client identifier.
+            cost (float): Quota units the request consumes.
+
+        Returns:
+            QuotaStatus: Whether the request is allowed and what is left.
+        """
+        self._ensure_sync_thread()
+        with self._lock:
+            if self._database is None:
+                self._evict_full()
+            state = self._get(identity)
+            allowed = state.bucket.try_consume(cost)
+            if allowed and self._database is not None:
+                state.pending += cost
+            return self._status(state, allowed, cost)
+
+    def peek(self, identity: str) -> QuotaStatus:
+        """
+        Report an identity's remaining quota without consuming any.
+
+        Args:
+            identity (str): User, session or API client identifier.
+
+        Returns:
+            QuotaStatus: The identity's current quota.
+        """
+        with self._lock:
+            state = self._get(identity)
+            state.bucket.available()
+            return self._status(state, state.bucket.tokens >= 1, 1.0)
+
+    def sync(self) -> None:
+        """
+        Merge local consumption into the shared table and refresh the levels
+        of the identities that consumed any. Identities left unused since the
+        previous sync are evicted, so their next check reloads the shared level.
+        """
+        if self._database is None:
+            return
+        pending: Dict[str, float] = {}
+        with self._lock:
+            for identity, state in list(self._buckets.items()):
+                if state.pending:
+                    pending[identity] = state.pending
+                    state.pending = 0.0
+                elif not state.used:
+                    del self._buckets[identity]
+                state.used = False
+        if not pending:
+            return
+
+        levels: Dict[str, float] = {}
+        try:
+            with self._database.get_connection() as conn:
+                conn.isolation_level = None
+                _ = conn.execute("BEGIN IMMEDIATE")
+                now = self._clock()
+                for identity, consumed in pending.items():
+                    row = conn.execute(
+                        "SELECT tokens, updated_at FROM quota_buckets WHERE identity = ?",
+                        (identity,),
+                    ).fetchone()
+                    tokens, updated_at = row if row else (self.capacity, now)
+                    tokens = min(
+                        self.capacity, tokens + max(0.0, now - updated_at) * self.rate
+                    )
+                    tokens -= consumed
+                    _ = conn.execute(
+                        "INSERT OR REPLACE INTO quota_buckets "
+                        "(identity, tokens, updated_at) VALUES (?, ?, ?)",
+                        (identity, tokens, now),
+                    )
+                    levels[identity] = tokens
+                _ = conn.execute("COMMIT")
+        except Exception:
+            # Keep the consumption so the next sync can retry it.
+            with self._lock:
+                for identity, consumed in pending.items():
+                    self._buckets[identity].pending += consumed
+            raise
+
+        with self._lock:
+            for identity, tokens in levels.items():
+                state = self._buckets[identity]
+                # Requests allowed while the sync ran are still pending.
+                state.bucket.set_level(tokens - state.pending)
+
+    def close(self) -> None:
+        """Stop the background sync thread after a final sync."""
+        self._stop.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+        self.sync()
+
+    def _ensure_sync_thread(self) -> None:
+        if self._database is None or self._sync_thread is not None:
+            return
+        with self._lock:
+            if self._sync_thread is None:
+                self._sync_thread = threading.Thread(
+                    target=self._sync_loop, name="quota-sync", daemon=True
+                )
+                self._sync_thread.start()
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error("Error syncing quotas: %s", e)
+
+
+_quota_manager: Optional[QuotaManager] = None
+_quota_manager_lock = threading.Lock()
+
+
+def get_quota_manager() -> QuotaManager:
+    """
+    Returns the shared quota manager configured by the `QUOTA_*` settings.
+    """
+    global _quota_manager
+    with _quota_manager_lock:
+        if _quota_manager is None:
+            _quota_manager = QuotaManager(
+                capacity=Config.QUOTA_CAPACITY,
+                refill_per_hour=Config.QUOTA_REFILL_PER_HOUR,
+                db_path=Config.QUOTA_DB_PATH or None,
+                sync_interval=Config.QUOTA_SYNC_INTERVAL,
+            )
+        return _quota_manager
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+WORDS = (
+    "we talk about learning habits books focus sleep memory tools ideas life "
+    "work money health attention reading writing future"
+).split()
+
+
+def _make_transcript(words=3000, seed=1, vocabulary=0):
+    """
+    Build a reproducible transcript of `words` words in sentences of 5 to 24
+    words, one per line like caption text.
+
+    Words come uniformly from a small everyday vocabulary, or, when
+    `vocabulary` is set, from that many synthetic words with the Zipf
+    distribution of natural language.
+    """
+    rng = np.random.default_rng(seed)
+    if vocabulary:
+        weights = 1 / np.arange(1, vocabulary + 1)
+        ids = rng.choice(vocabulary, size=words, p=weights / weights.sum())
+        names = [f"w{i}" for i in ids]
+    else:
+        names = [WORDS[i] for i in rng.integers(len(WORDS), size=words)]
+    sentences, start = [], 0
+    while start < words:
+        length = int(rng.integers(5, 25))
+        sentences.append(" ".join(names[start : start + length]) + ".")
+        start += length
+    return "\n".join(sentences) + "\n"
+
+
+@pytest.fixture
+def make_transcript():
+    """The transcript generator shared by the chunking, dedup and summary tests."""
+    return _make_transcript
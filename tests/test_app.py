@@ -6,7 +6,7 @@ import streamlit as st
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api.formatters import TextFormatter
 
-from app import main
+from app import main, quota_identity
 
 
 @pytest.fixture
@@ -118,3 +118,22 @@ def test_main_invalid_url(mock_streamlit):
         mock_streamlit["error"].assert_called_once_with(
             "Error getting transcript after 3 attempts: Transcript not available"
         )
+
+
+def test_quota_identity_prefers_user_then_proxy_address():
+    """Test that quotas follow the user across sessions when possible."""
+    context = MagicMock(headers={"X-Forwarded-For": "203.0.113.9, 10.0.0.2"})
+    context.ip_address = "10.0.0.1"
+    session_state = MagicMock(session_id="abc")
+    with patch.multiple("streamlit", context=context, session_state=session_state):
+        with patch("streamlit.user", {"is_logged_in": True, "email": "a@b.c"}):
+            assert quota_identity() == "user:a@b.c"
+        with patch("streamlit.user", {}):
+            assert quota_identity() == "ip:10.0.0.1"
+            with patch("app.Config.QUOTA_CLIENT_IP_HEADER", "X-Forwarded-For"):
+                assert quota_identity() == "ip:10.0.0.2"
+            context.headers = {}
+            with patch("app.Config.QUOTA_CLIENT_IP_HEADER", "X-Forwarded-For"):
+                assert quota_identity() == "ip:10.0.0.1"
+            context.ip_address = None
+            assert quota_identity() == "session:abc"
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+from persistence.async_database import AsyncDatabase
+from persistence.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Temporary database with an empty `insights` table."""
+    db = Database(str(tmp_path / "test.db"))
+    db.create_table("insights", "id INTEGER PRIMARY KEY, text TEXT")
+    return db
+
+
+@pytest.mark.asyncio
+async def test_insert_many_and_iter_rows(database):
+    """Test that rows inserted asynchronously stream back in order."""
+    async with AsyncDatabase(database) as adb:
+        await adb.insert_many("insights", [{"text": f"i{n}"} for n in range(120)])
+
+        texts = [
+            row["text"]
+            async for row in adb.iter_rows(
+                "SELECT text FROM insights ORDER BY id", batch_size=50
+            )
+        ]
+
+    assert texts == [f"i{n}" for n in range(120)]
+
+
+@pytest.mark.asyncio
+async def test_execute_does_not_block_event_loop(database):
+    """Test that database work runs off the event loop thread."""
+    loop_thread = threading.get_ident()
+    seen = []
+
+    def record_thread(*args):
+        seen.append(threading.get_ident())
+        return None
+
+    async with AsyncDatabase(database) as adb:
+        adb.database.execute_query = record_thread
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await adb.execute("INSERT INTO insights (text) VALUES (?)", ("x",))
+        task.cancel()
+
+    assert seen and seen[0] != loop_thread
+    assert ticks > 0
+
+
+@pytest.mark.asyncio
+async def test_backpressure_limits_pending_operations(database):
+    """Test that no more than max_pending operations run at once."""
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def slow_query(*args):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(1)
+        with lock:
+            running -= 1
+
+    async with AsyncDatabase(database, max_workers=4, max_pending=2) as adb:
+        adb.database.execute_query = slow_query
+        tasks = [asyncio.create_task(adb.execute("SELECT 1")) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_iteration_releases_connection(database):
+    """Test that breaking out of iter_rows closes the underlying cursor."""
+    database.insert_many("insights", [{"text": str(n)} for n in range(10)])
+
+    async with AsyncDatabase(database) as adb:
+        rows = adb.iter_rows("SELECT text FROM insights", batch_size=2)
+        first = await rows.__anext__()
+        await rows.aclose()
+
+        # The table stays writable once the reader has been closed.
+        await adb.execute("DELETE FROM insights")
+        remaining = await adb.execute("SELECT * FROM insights", fetch=True)
+
+    assert first == {"text": "0"}
+    assert remaining == []
@@ -0,0 +1,203 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from config.config import Config
+from security.auth import APIKeyPool, AuthManager, TokenBucket
+
+
+class FakeClock:
+    """A manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeProvider:
+    """Stands in for the upstream API: returns a status code per key."""
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.calls = []
+
+    def call(self, pool):
+        with pool.lease() as lease:
+            self.calls.append(lease.key)
+            status = self.statuses.get(lease.key, 200)
+            lease.report(status)
+            return status
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_consume_and_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+
+        self.assertTrue(bucket.try_consume())
+        self.assertTrue(bucket.try_consume())
+        self.assertFalse(bucket.try_consume())
+        self.assertAlmostEqual(bucket.time_until(1), 1.0)
+
+        clock.sleep(1.5)
+        self.assertTrue(bucket.try_consume())
+        self.assertAlmostEqual(bucket.available(), 0.5)
+
+
+class TestAPIKeyPool(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_pool(self, keys, **kwargs):
+        return APIKeyPool(keys, clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_spreads_load_across_keys(self):
+        pool = self.make_pool(["key-aaaa1111", "key-bbbb2222", "key-cccc3333"])
+        provider = FakeProvider()
+
+        for _ in range(9):
+            provider.call(pool)
+
+        self.assertEqual(
+            sorted(provider.calls.count(key) for key in pool.keys), [3, 3, 3]
+        )
+        usage = pool.usage()
+        self.assertEqual([u.key_id for u in usage], ["...1111", "...2222", "...3333"])
+        self.assertTrue(all(u.successes == 3 for u in usage))
+
+    def test_prefers_least_loaded_key(self):
+        pool = self.make_pool(["key-aaaa1111", "key-bbbb2222"])
+        with pool.lease() as first:
+            with pool.lease() as second:
+                self.assertNotEqual(first.key, second.key)
+
+    def test_rate_limited_key_cools_down(self):
+        pool = self.make_pool(["key-aaaa1111", "key-bbbb2222"], rate_limit_cooldown=30)
+        provider = FakeProvider({"key-aaaa1111": 429})
+
+        for _ in range(6):
+            provider.call(pool)
+
+        self.assertEqual(provider.calls.count("key-aaaa1111"), 1)
+        self.assertEqual(pool.healthy_keys(), 1)
+        self.clock.sleep(31)
+        self.assertEqual(pool.healthy_keys(), 2)
+
+    def test_auth_failure_benches_key(self):
+        pool = self.make_pool(["key-aaaa1111", "key-bbbb2222"])
+        provider = FakeProvider({"key-bbbb2222": 401})
+
+        for _ in range(5):
+            provider.call(pool)
+
+        usage = {u.key_id: u for u in pool.usage()}
+        self.assertEqual(usage["...2222"].auth_failures, 1)
+        self.assertEqual(usage["...1111"].successes, 4)
+
+    def test_waits_for_budget_when_all_keys_exhausted(self):
+        pool = self.make_pool(["key-aaaa1111"], requests_per_minute=60, burst=1)
+        provider = FakeProvider()
+
+        provider.call(pool)
+        provider.call(pool)
+
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+    def test_lease_timeout(self):
+        pool = self.make_pool(["key-aaaa1111"], requests_per_minute=1, burst=1)
+        FakeProvider().call(pool)
+
+        with self.assertRaises(TimeoutError):
+            with pool.lease(timeout=5):
+                pass
+
+    def test_rejects_budget_that_never_admits_a_request(self):
+        with self.assertRaises(ValueError):
+            self.make_pool(["key-aaaa1111"], requests_per_minute=0)
+        with self.assertRaises(ValueError):
+            self.make_pool(["key-aaaa1111"], burst=0.5)
+
+    def test_lease_fails_when_every_key_is_benched_for_good(self):
+        pool = self.make_pool(["key-aaaa1111"], auth_failure_cooldown=float("inf"))
+        FakeProvider({"key-aaaa1111": 401}).call(pool)
+
+        with self.assertRaises(TimeoutError):
+            with pool.lease():
+                pass
+
+    def test_empty_pool_yields_no_key(self):
+        pool = self.make_pool([])
+        with pool.lease() as lease:
+            self.assertIsNone(lease.key)
+
+    @patch.dict(
+        os.environ,
+        {
+            "OPENROUTER_API_KEYS": "key-aaaa1111, key-bbbb2222",
+            "OPENROUTER_API_KEY": "key-aaaa1111",
+        },
+    )
+    def test_from_env_deduplicates(self):
+        self.assertEqual(APIKeyPool.from_env().keys, ["key-aaaa1111", "key-bbbb2222"])
+
+
+class TestProcessWithAIKeyRotation(unittest.TestCase):
+    @patch("app.requests.post")
+    def test_retries_on_another_key_after_429(self, mock_post):
+        from app import process_with_ai
+
+        pool = APIKeyPool(["key-aaaa1111", "key-bbbb2222"])
+        limited = MagicMock()
+        limited.raise_for_status.side_effect = requests.HTTPError(
+            response=MagicMock(status_code=429, headers={"Retry-After": "5"})
+        )
+        ok = MagicMock()
+        ok.json.return_value = {"choices": [{"message": {"content": "wisdom"}}]}
+        mock_post.side_effect = [limited, ok]
+
+        with patch.object(AuthManager, "get_key_pool", return_value=pool):
+            result = process_with_ai("transcript")
+
+        self.assertEqual(result, "wisdom")
+        used = [
+            call.kwargs["headers"]["Authorization"] for call in mock_post.call_args_list
+        ]
+        self.assertEqual(len(set(used)), 2)
+        self.assertEqual(
+            mock_post.call_args.kwargs["timeout"], Config.AI_REQUEST_TIMEOUT
+        )
+        self.assertEqual(sum(u.rate_limited for u in pool.usage()), 1)
+
+    @patch("app.requests.post")
+    def test_fails_fast_when_every_key_is_benched(self, mock_post):
+        from app import process_with_ai
+
+        clock = FakeClock()
+        pool = APIKeyPool(["key-aaaa1111"], clock=clock, sleep=clock.sleep)
+        with pool.lease() as lease:
+            lease.report(401)
+        scheduler = MagicMock()
+
+        with patch.object(AuthManager, "get_key_pool", return_value=pool), patch(
+            "app.get_ai_scheduler", return_value=scheduler
+        ), patch("app.Config.KEY_LEASE_TIMEOUT", 5), patch(
+            "app.get_circuit_breaker"
+        ) as breaker:
+            breaker.return_value.call.side_effect = lambda f, *a, **k: f(*a, **k)
+            result = process_with_ai("transcript")
+
+        self.assertTrue(result.startswith("Error processing with AI: No OpenRouter"))
+        self.assertLess(clock.now, 6)
+        mock_post.assert_not_called()
+        scheduler.slot.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
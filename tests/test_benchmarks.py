@@ -0,0 +1,78 @@
+import time
+
+from benchmarks.__main__ import main
+from benchmarks.suite import compare, load_report, measure, run_suite, save_report
+
+
+def report(**medians):
+    return {"results": {name: {"median": value} for name, value in medians.items()}}
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test regression, improvement, new and missing classification."""
+    baseline = report(a=1.0, b=1.0, c=1.0, gone=1.0)
+    current = report(a=1.05, b=1.25, c=0.5, added=1.0)
+
+    rows = {row.name: row for row in compare(baseline, current, threshold=0.10)}
+
+    assert rows["a"].status == "ok"
+    assert rows["b"].status == "regression"
+    assert rows["b"].change == 0.25
+    assert rows["c"].status == "improvement"
+    assert rows["added"].status == "new"
+    assert rows["gone"].status == "missing"
+
+
+def test_measure_reports_per_call_time():
+    """Test that measure divides round time by the calibrated call count."""
+    result = measure(lambda: time.sleep(0.002), rounds=3, min_round_time=0.01)
+
+    assert result.number >= 4
+    assert 0.002 <= result.median < 0.02
+    assert result.rounds == 3
+
+
+def test_run_suite_filters_and_round_trips(tmp_path):
+    """Test running a subset of the suite and saving it as JSON."""
+    results = run_suite("^url\\.", rounds=2, min_round_time=0.001)
+    path = str(tmp_path / "baselines" / "run.json")
+    save_report(results, path)
+
+    loaded = load_report(path)
+    assert set(loaded["results"]) == {
+        "url.extract_video_id",
+        "url.is_valid_youtube_url",
+    }
+    assert loaded["meta"]["python"]
+
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    """Test that the compare command fails only when something regressed."""
+    baseline = str(tmp_path / "baseline.json")
+    slower = str(tmp_path / "slower.json")
+    save_report(report(parse=1.0), baseline)
+    save_report(report(parse=1.5), slower)
+
+    assert main(["compare", baseline, baseline]) == 0
+    assert main(["compare", baseline, slower, "--threshold", "0.6"]) == 0
+    assert main(["compare", baseline, slower]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_compare_command_without_baseline_explains_how_to_save_one(tmp_path, capsys):
+    """Test that a missing baseline is reported instead of raising."""
+    assert main(["compare", str(tmp_path / "none.json")]) == 2
+    assert "python -m benchmarks run --save-baseline" in capsys.readouterr().err
+
+
+def test_compare_with_pattern_ignores_unselected_benchmarks(tmp_path, capsys):
+    """Test that -k does not report filtered-out benchmarks as missing."""
+    baseline = str(tmp_path / "baseline.json")
+    current = str(tmp_path / "current.json")
+    save_report(report(**{"url.parse": 1.0, "db.insert": 1.0}), baseline)
+    save_report(report(**{"url.parse": 1.0}), current)
+
+    assert main(["compare", baseline, current, "-k", "^url\\."]) == 0
+    out = capsys.readouterr().out
+    assert "url.parse" in out
+    assert "db.insert" not in out
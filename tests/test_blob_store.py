@@ -0,0 +1,97 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from persistence import blob_store
+from persistence.blob_store import TranscriptStore
+from utils.io_utils import download_transcript
+
+CODECS = [
+    "gzip",
+    pytest.param(
+        "zstd",
+        marks=pytest.mark.skipif(
+            blob_store.zstandard is None, reason="zstandard not installed"
+        ),
+    ),
+]
+
+
+def blob_files(root):
+    """List every blob file under the store's object directory."""
+    objects = os.path.join(root, "objects")
+    return [
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(objects)
+        for name in names
+    ]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_put_and_get_round_trip(tmp_path, codec):
+    """Test that a stored transcript reads back unchanged and compressed."""
+    store = TranscriptStore(str(tmp_path), codec=codec)
+    text = "Hello world, ünïcode included.\n" * 1000
+
+    digest = store.put("vid1", text)
+
+    path = store.path_for("vid1")
+    assert store.get("vid1") == text
+    assert os.path.relpath(path, tmp_path).startswith(
+        os.path.join("objects", digest[:2], digest[2:4])
+    )
+    assert os.path.getsize(path) < len(text.encode("utf-8")) / 10
+
+
+def test_identical_content_is_deduplicated(tmp_path):
+    """Test that re-uploads with identical content share one blob."""
+    store = TranscriptStore(str(tmp_path), codec="gzip")
+
+    first = store.put("original", "same transcript")
+    second = store.put("reupload", "same transcript")
+    store.put("other", "different transcript")
+
+    assert first == second
+    assert store.path_for("original") == store.path_for("reupload")
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_open_streams_lines(tmp_path):
+    """Test that open() yields a lazily decompressed text stream."""
+    store = TranscriptStore(str(tmp_path), codec="gzip")
+    store.put("vid1", "".join(f"line {n}\n" for n in range(100)))
+
+    with store.open("vid1") as stream:
+        assert next(stream) == "line 0\n"
+        assert sum(1 for _ in stream) == 99
+
+
+def test_missing_video(tmp_path):
+    """Test lookups for videos that were never stored."""
+    store = TranscriptStore(str(tmp_path), codec="gzip")
+
+    assert store.get("missing") is None
+    with pytest.raises(KeyError):
+        with store.open("missing"):
+            pass
+
+
+def test_refetch_repoints_index(tmp_path):
+    """Test that storing new content for a video updates its index entry."""
+    store = TranscriptStore(str(tmp_path), codec="gzip")
+    store.put("vid1", "auto captions")
+    store.put("vid1", "edited captions")
+
+    assert store.get("vid1") == "edited captions"
+
+
+def test_download_transcript_into_store(tmp_path):
+    """Test that download_transcript writes to the blob store when given one."""
+    store = TranscriptStore(str(tmp_path), codec="gzip")
+
+    with patch("utils.io_utils.get_video_transcript", return_value="Hello World"):
+        path = download_transcript("test_id", store=store)
+
+    assert path == store.path_for("test_id")
+    assert store.get("test_id") == "Hello World"
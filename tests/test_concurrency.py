@@ -1,9 +1,84 @@
 import asyncio
+import concurrent.futures
+import hashlib
+import http.server
+import os
+import random
+import threading
+import time
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
-from utils.concurrency import async_download_video, run_concurrently
+from utils.concurrency import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    FairScheduler,
+    aiter_task_results,
+    async_download_video,
+    iter_task_results,
+    run_async_tasks,
+    run_asyncio_tasks_ordered,
+    run_concurrently,
+    run_tasks_ordered,
+)
+from utils.error_handler import DownloadIntegrityError
+
+VIDEO_BYTES = os.urandom(300 * 1024)
+
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves VIDEO_BYTES with Range support and optional injected faults."""
+
+    supports_ranges = True
+    # Number of bytes after which the next full-body response is cut off.
+    break_after = None
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        range_header = self.headers.get("Range")
+        cls.requests.append(range_header)
+        start, end = 0, len(VIDEO_BYTES) - 1
+        if range_header and cls.supports_ranges:
+            first, _, last = range_header.split("=")[1].partition("-")
+            start = int(first)
+            end = int(last) if last else end
+            if start >= len(VIDEO_BYTES):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(VIDEO_BYTES)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(VIDEO_BYTES)}")
+        else:
+            self.send_response(200)
+        body = VIDEO_BYTES[start : end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if cls.break_after is not None and len(body) > cls.break_after:
+            self.wfile.write(body[: cls.break_after])
+            cls.break_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def video_server():
+    """Fixture running a local HTTP server that serves a fake video."""
+    handler = type("Handler", (RangeRequestHandler,), {"requests": []})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.handler = handler
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/video.mp4"
+    yield server
+    server.shutdown()
+    server.server_close()
 
 
 @pytest.mark.asyncio
@@ -30,18 +105,14 @@ async def test_run_concurrently_empty():
 
 
 @pytest.mark.asyncio
-async def test_async_download_video_success():
-    """Test that async_download_video downloads a video successfully."""
-    mock_url = "https://example.com/video.mp4"
-    mock_content = b"fake video content"
-
-    with patch("aiohttp.ClientSession.get") as mock_get:
-        mock_response = AsyncMock()
-        mock_response.read.return_value = mock_content
-        mock_get.return_value.__aenter__.return_value = mock_response
+async def test_async_download_video_success(video_server, tmp_path):
+    """Test that async_download_video streams the video to disk."""
+    path = await async_download_video(video_server.url, str(tmp_path), chunk_size=4096)
 
-        result = await async_download_video(mock_url)
-        assert result == mock_content
+    assert path == str(tmp_path / "video.mp4")
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+    assert not os.path.exists(path + ".part")
 
 
 @pytest.mark.asyncio
@@ -54,3 +125,387 @@ async def test_async_download_video_failure():
 
         with pytest.raises(Exception, match="Download failed"):
             await async_download_video(mock_url)
+
+
+@pytest.mark.asyncio
+async def test_async_download_video_resumes_broken_transfer(video_server, tmp_path):
+    """Test that a dropped connection is resumed with a Range request."""
+    video_server.handler.break_after = 100 * 1024
+
+    path = await async_download_video(video_server.url, str(tmp_path))
+
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+    assert video_server.handler.requests == [None, f"bytes={100 * 1024}-"]
+
+
+@pytest.mark.asyncio
+async def test_async_download_video_resumes_existing_part_file(video_server, tmp_path):
+    """Test that a .part file from an earlier run is continued, not restarted."""
+    with open(tmp_path / "video.mp4.part", "wb") as f:
+        f.write(VIDEO_BYTES[:5000])
+
+    path = await async_download_video(video_server.url, str(tmp_path))
+
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+    assert video_server.handler.requests == ["bytes=5000-"]
+
+
+@pytest.mark.asyncio
+async def test_async_download_video_restarts_without_range_support(
+    video_server, tmp_path
+):
+    """Test that a server ignoring Range causes a clean restart."""
+    video_server.handler.supports_ranges = False
+    with open(tmp_path / "video.mp4.part", "wb") as f:
+        f.write(b"stale bytes")
+
+    path = await async_download_video(video_server.url, str(tmp_path))
+
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+
+
+@pytest.mark.asyncio
+async def test_async_download_video_parallel_segments(video_server, tmp_path):
+    """Test parallel ranged segments with checksum verification."""
+    path = await async_download_video(
+        video_server.url,
+        str(tmp_path),
+        chunk_size=16 * 1024,
+        segments=4,
+        expected_sha256=hashlib.sha256(VIDEO_BYTES).hexdigest(),
+    )
+
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+    segment_requests = [r for r in video_server.handler.requests if r != "bytes=0-0"]
+    assert len(segment_requests) == 4
+    assert not os.path.exists(path + ".part.segments")
+
+
+@pytest.mark.asyncio
+async def test_interrupted_segmented_download_resumes_sequentially(
+    video_server, tmp_path
+):
+    """Test that a preallocated part file is not mistaken for finished data."""
+    import aiohttp
+
+    video_server.handler.break_after = 10 * 1024
+    with pytest.raises(aiohttp.ClientPayloadError):
+        await async_download_video(
+            video_server.url,
+            str(tmp_path),
+            chunk_size=16 * 1024,
+            segments=4,
+            max_retries=0,
+        )
+    part = tmp_path / "video.mp4.part"
+    assert part.stat().st_size == len(VIDEO_BYTES)
+    assert (tmp_path / "video.mp4.part.segments").exists()
+
+    path = await async_download_video(video_server.url, str(tmp_path))
+
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+    assert os.listdir(tmp_path) == ["video.mp4"]
+
+
+@pytest.mark.asyncio
+async def test_segment_plan_is_saved_before_preallocation(video_server, tmp_path):
+    """Test that a crash after preallocation still leaves the sidecar behind."""
+    from utils import concurrency
+
+    seen = []
+
+    async def crash(session, url, part_path, segment, chunk_size):
+        seen.append(os.path.exists(part_path + ".segments"))
+        raise RuntimeError("crash")
+
+    with patch.object(concurrency, "_download_segment", crash):
+        with pytest.raises(RuntimeError):
+            await async_download_video(
+                video_server.url, str(tmp_path), chunk_size=16 * 1024, segments=4
+            )
+
+    assert seen and all(seen)
+
+
+@pytest.mark.asyncio
+async def test_oversized_part_file_is_discarded(video_server, tmp_path):
+    """Test that a part file larger than the remote file does not fail forever."""
+    with open(tmp_path / "video.mp4.part", "wb") as f:
+        f.write(VIDEO_BYTES + b"extra")
+
+    with pytest.raises(DownloadIntegrityError):
+        await async_download_video(video_server.url, str(tmp_path))
+    path = await async_download_video(video_server.url, str(tmp_path))
+
+    with open(path, "rb") as f:
+        assert f.read() == VIDEO_BYTES
+
+
+@pytest.mark.asyncio
+async def test_async_download_video_checksum_mismatch(video_server, tmp_path):
+    """Test that a checksum mismatch is reported and the file is discarded."""
+    with pytest.raises(DownloadIntegrityError):
+        await async_download_video(
+            video_server.url, str(tmp_path), expected_sha256="0" * 64
+        )
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_run_async_tasks_preserves_input_order():
+    """Test that run_async_tasks returns results in input order."""
+
+    def make_task(n):
+        def task():
+            time.sleep(random.uniform(0, 0.01))
+            return n
+
+        return task
+
+    assert run_async_tasks([make_task(n) for n in range(20)], max_workers=8) == list(
+        range(20)
+    )
+
+
+def test_run_tasks_ordered_collects_errors_per_item():
+    """Test that one failing task does not discard the other results."""
+
+    def fail():
+        raise ValueError("boom")
+
+    results = run_tasks_ordered([lambda: 1, fail, lambda: 3])
+
+    assert [r.index for r in results] == [0, 1, 2]
+    assert [r.value for r in results if r.ok] == [1, 3]
+    assert isinstance(results[1].error, ValueError)
+
+
+def test_iter_task_results_bounds_in_flight_work():
+    """Test that tasks are pulled lazily and in-flight work stays capped."""
+    running = 0
+    peak = 0
+    created = 0
+    lock = threading.Lock()
+
+    def task():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.001)
+        with lock:
+            running -= 1
+
+    def generate():
+        nonlocal created
+        for _ in range(200):
+            created += 1
+            yield task
+
+    count = 0
+    for result in iter_task_results(generate(), max_in_flight=4):
+        assert created - count <= 4 + 1
+        count += 1
+
+    assert count == 200
+    assert peak <= 4
+
+
+def test_iter_task_results_timeout():
+    """Test that slow tasks are reported with a TimeoutError."""
+    results = run_tasks_ordered(
+        [lambda: time.sleep(0.5), lambda: "fast"], timeout=0.05, max_in_flight=2
+    )
+
+    assert isinstance(results[0].error, TimeoutError)
+    assert results[1].value == "fast"
+
+
+def test_iter_task_results_cancellation():
+    """Test that setting the cancel event stops the batch."""
+    cancel = threading.Event()
+
+    def task(n):
+        if n == 2:
+            cancel.set()
+        time.sleep(0.01)
+        return n
+
+    tasks = (lambda n=n: task(n) for n in range(1000))
+    results = run_tasks_ordered(tasks, max_in_flight=4, cancel_event=cancel)
+
+    assert len(results) < 1000
+    assert any(isinstance(r.error, concurrent.futures.CancelledError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_asyncio_tasks_ordered_bounded_with_errors_and_timeouts():
+    """Test ordering, per-item errors, timeouts and concurrency cap for asyncio."""
+    running = 0
+    peak = 0
+
+    async def task(n):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            if n == 3:
+                raise ValueError("boom")
+            await asyncio.sleep(1 if n == 5 else random.uniform(0, 0.01))
+            return n
+        finally:
+            running -= 1
+
+    results = await run_asyncio_tasks_ordered(
+        (lambda n=n: task(n) for n in range(30)), max_in_flight=5, timeout=0.2
+    )
+
+    assert [r.index for r in results] == list(range(30))
+    assert isinstance(results[3].error, ValueError)
+    assert isinstance(results[5].error, TimeoutError)
+    assert results[29].value == 29
+    assert peak <= 5
+
+
+@pytest.mark.asyncio
+async def test_aiter_task_results_cancellation():
+    """Test that the asyncio runner cancels running tasks on request."""
+    cancel = asyncio.Event()
+    started = []
+
+    async def task(n):
+        started.append(n)
+        await asyncio.sleep(10)
+
+    asyncio.get_running_loop().call_later(0.05, cancel.set)
+    seen = [
+        result
+        async for result in aiter_task_results(
+            (lambda n=n: task(n) for n in range(100)),
+            max_in_flight=3,
+            cancel_event=cancel,
+        )
+    ]
+
+    assert len(started) == len(seen) == 3
+    assert all(isinstance(r.error, asyncio.CancelledError) for r in seen)
+
+
+def _queue_behind_busy_slot(scheduler, requests):
+    """
+    Occupy the scheduler's only slot, queue `requests` of (priority, tenant)
+    behind it, then release and return the order in which they were admitted.
+    """
+    order = []
+    scheduler.acquire()
+    threads = []
+    for priority, tenant in requests:
+
+        def call(priority=priority, tenant=tenant):
+            with scheduler.slot(priority=priority, tenant=tenant):
+                order.append((priority, tenant))
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        threads.append(thread)
+        # Make sure requests are enqueued in the given order.
+        while sum(scheduler.stats().queued.values()) < len(threads):
+            time.sleep(0.001)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_scheduler_serves_interactive_before_batch():
+    """Test that queued interactive calls overtake queued batch calls."""
+    scheduler = FairScheduler(max_concurrency=1)
+    order = _queue_behind_busy_slot(
+        scheduler,
+        [(PRIORITY_BATCH, "nightly")] * 3 + [(PRIORITY_INTERACTIVE, "alice")],
+    )
+
+    assert order[0] == (PRIORITY_INTERACTIVE, "alice")
+
+
+def test_scheduler_fair_shares_between_tenants():
+    """Test that a tenant flooding the queue does not starve another tenant."""
+    scheduler = FairScheduler(max_concurrency=1)
+    order = _queue_behind_busy_slot(
+        scheduler,
+        [(PRIORITY_BATCH, "heavy")] * 6 + [(PRIORITY_BATCH, "light")] * 2,
+    )
+
+    tenants = [tenant for _, tenant in order]
+    assert tenants.index("light") <= 2
+    assert tenants[:4].count("light") == 2
+
+
+def test_scheduler_weights_and_cap():
+    """Test weighted shares, the concurrency cap and queue-time metrics."""
+    scheduler = FairScheduler(max_concurrency=2)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.005)
+        with lock:
+            running -= 1
+
+    results = run_tasks_ordered(
+        [lambda: scheduler.run(call) for _ in range(10)],
+        max_in_flight=10,
+    )
+
+    stats = scheduler.stats()
+    assert all(result.ok for result in results)
+    assert peak == 2
+    assert stats.in_flight == 0
+    assert stats.queue_time[PRIORITY_INTERACTIVE].admitted == 10
+    assert stats.queue_time[PRIORITY_INTERACTIVE].max_wait > 0
+
+    weighted = FairScheduler(max_concurrency=1)
+    weighted.set_weight("gold", 3.0)
+    order = _queue_behind_busy_slot(
+        weighted,
+        [(PRIORITY_BATCH, "gold")] * 4 + [(PRIORITY_BATCH, "silver")] * 4,
+    )
+    assert [tenant for _, tenant in order][:4].count("gold") == 3
+
+
+def test_scheduler_acquire_timeout():
+    """Test that waiting for a slot can time out."""
+    scheduler = FairScheduler(max_concurrency=1)
+    scheduler.acquire()
+
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(timeout=0.01)
+
+    scheduler.release()
+    assert scheduler.stats().in_flight == 0
+
+
+def test_scheduler_does_not_charge_timed_out_calls():
+    """Test that calls which timed out in the queue do not count against a tenant."""
+    scheduler = FairScheduler(max_concurrency=1)
+    scheduler.acquire()
+    for _ in range(5):
+        with pytest.raises(TimeoutError):
+            scheduler.acquire(priority=PRIORITY_BATCH, tenant="heavy", timeout=0.001)
+    scheduler.release()
+
+    order = _queue_behind_busy_slot(
+        scheduler, [(PRIORITY_BATCH, "heavy"), (PRIORITY_BATCH, "light")]
+    )
+
+    assert order == [(PRIORITY_BATCH, "heavy"), (PRIORITY_BATCH, "light")]
@@ -0,0 +1,71 @@
+import pytest
+
+from data.models import Insight
+from utils.ai_processor import parse_insight_rows
+from utils.cpu_executor import CPUExecutor, _pack, _unpack
+from utils.rendering import format_wisdom_output
+
+WISDOM = """### IDEAS
+
+- First idea about learning
+- Second idea about reading
+
+### QUOTES
+
+- "A quote" - Speaker
+"""
+
+
+def test_pack_round_trip_plain_and_rich_payloads():
+    """Test that payloads survive serialization with either codec."""
+    plain = ("text", 1.5, [("a", 0.0, "general")])
+    rich = (Insight(text="a", timestamp=0.0, category="general"),)
+
+    assert _unpack(_pack(plain)) == plain
+    assert _pack(plain)[:1] == b"m"
+    assert _pack(rich)[:1] == b"p"
+    assert _unpack(_pack(rich)) == rich
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_modes_produce_identical_results(mode):
+    """Test that every mode returns the same output as a direct call."""
+    executor = CPUExecutor(mode, max_workers=2)
+    try:
+        assert executor.run(format_wisdom_output, WISDOM) == format_wisdom_output(
+            WISDOM
+        )
+        assert executor.map(parse_insight_rows, [WISDOM, ""]) == [
+            parse_insight_rows(WISDOM),
+            [],
+        ]
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+def test_errors_propagate(mode):
+    """Test that stage exceptions surface from the returned future."""
+    executor = CPUExecutor(mode)
+    with pytest.raises(AttributeError):
+        executor.run(parse_insight_rows, None)
+    executor.shutdown()
+
+
+def test_unknown_mode():
+    """Test that an invalid mode is rejected."""
+    with pytest.raises(ValueError):
+        CPUExecutor("gpu")
+
+
+def test_benchmark_runs_in_every_mode():
+    """Test that the benchmark produces a row per stage and mode."""
+    from benchmarks.cpu_executor import run
+
+    rows = run(docs=2, workers=1, repeat=1)
+
+    assert {(row["stage"], row["mode"]) for row in rows} == {
+        (stage, mode)
+        for stage in ("format_wisdom_output", "parse_insight_rows")
+        for mode in ("inline", "thread", "process")
+    }
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from persistence.database import Database
+from persistence.writer import DatabaseWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """A writer on a fresh database with a `results` table, stopped afterwards."""
+    db_path = str(tmp_path / "test.db")
+    Database(db_path).create_table("results", "id INTEGER PRIMARY KEY, value TEXT")
+    writer = DatabaseWriter(db_path)
+    yield writer
+    writer.stop()
+
+
+def test_submit_wait_is_durable(writer):
+    """Test that a waited write is visible to a separate reader connection."""
+    future = writer.submit("INSERT INTO results (value) VALUES (?)", ("a",), wait=True)
+    assert future.result() == 1
+
+    rows = Database(writer.db_path).fetch_data("results")
+    assert [row["value"] for row in rows] == ["a"]
+
+
+def test_concurrent_sessions_are_group_committed(writer):
+    """Test that writes from many threads succeed and are batched."""
+
+    def session(n):
+        for i in range(25):
+            writer.submit(
+                "INSERT INTO results (value) VALUES (?)", (f"{n}-{i}",), wait=True
+            )
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = writer.stats()
+    assert stats.writes_committed == 200
+    assert stats.writes_failed == 0
+    assert stats.batches_committed <= 200
+    assert stats.queue_depth == 0
+    assert stats.max_commit_latency >= stats.avg_commit_latency > 0
+    assert len(Database(writer.db_path).fetch_data("results")) == 200
+
+
+def test_failed_write_does_not_poison_batch(writer):
+    """Test that one failing statement only fails its own future."""
+    bad = writer.submit("INSERT INTO missing_table (value) VALUES (?)", ("x",))
+    good = writer.submit_many(
+        "INSERT INTO results (value) VALUES (?)", [("b",), ("c",)]
+    )
+    writer.flush()
+
+    with pytest.raises(sqlite3.OperationalError):
+        bad.result()
+    assert good.result() == 2
+    assert writer.stats().writes_failed == 1
+
+
+def test_database_routes_writes_through_writer(writer):
+    """Test that Database.execute_query uses the writer for non-fetch queries."""
+    db = Database(writer.db_path, writer=writer)
+    db.insert_data("results", {"value": "queued"})
+
+    assert writer.stats().writes_committed == 1
+    assert db.fetch_data("results", "value = ?", ("queued",))[0]["value"] == "queued"
+
+
+def test_submit_after_stop_is_rejected(writer):
+    """Test that a stopped writer refuses work instead of hanging the caller."""
+    writer.submit("INSERT INTO results (value) VALUES (?)", ("a",), wait=True)
+    writer.stop()
+
+    with pytest.raises(RuntimeError):
+        writer.submit("INSERT INTO results (value) VALUES (?)", ("b",), wait=True)
+
+
+def test_failed_writer_thread_fails_pending_writes(tmp_path):
+    """Test that queued writes fail when the database cannot be opened."""
+    writer = DatabaseWriter(str(tmp_path / "missing" / "test.db"))
+    future = writer.submit("INSERT INTO results (value) VALUES (?)", ("a",))
+
+    with pytest.raises(sqlite3.OperationalError):
+        future.result(timeout=5)
+    writer.stop()
+
+
+def test_full_queue_and_dead_thread_do_not_deadlock(tmp_path):
+    """Test that callers blocked on a full queue see the writer's failure."""
+    writer = DatabaseWriter(str(tmp_path / "missing" / "test.db"), max_queue_size=1)
+    futures = []
+
+    def session():
+        for _ in range(5):
+            futures.append(writer.submit("INSERT INTO results VALUES (1)"))
+
+    threads = [threading.Thread(target=session) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(futures) == 20
+    for future in futures:
+        with pytest.raises(sqlite3.OperationalError):
+            future.result(5)
+
+
+def test_error_outside_a_statement_fails_the_dequeued_batch(writer):
+    """Test that a batch whose commit blows up never leaves futures unset."""
+    writer.submit("INSERT INTO results (value) VALUES ('a')", wait=True, timeout=5)
+    failed_thread = writer._thread
+    with patch.object(writer, "_commit_batch", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError, match="boom"):
+            writer.submit(
+                "INSERT INTO results (value) VALUES ('b')", wait=True, timeout=5
+            )
+
+    # The failed writer thread exits, and the next write starts a fresh one.
+    failed_thread.join(5)
+    future = writer.submit(
+        "INSERT INTO results (value) VALUES ('c')", wait=True, timeout=5
+    )
+    assert future.result() == 1
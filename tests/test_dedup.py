@@ -0,0 +1,148 @@
+import json
+from unittest.mock import ANY, patch
+
+import numpy as np
+import pytest
+
+import app
+from persistence.dedup_store import MinHashStore
+from utils import dedup
+from utils.dedup import MinHasher, NearDuplicateIndex, shingle_hashes, similarity
+
+
+def reupload(text, every=100):
+    """Return a copy of `text` with every `every`-th word changed."""
+    words = text.split()
+    for position in range(0, len(words), every):
+        words[position] = "edited"
+    return " ".join(words)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Empty MinHash store for the index under test."""
+    return MinHashStore(str(tmp_path / "dedup.db"))
+
+
+def test_shingles_ignore_case_and_punctuation():
+    """Test that formatting differences do not change the shingles."""
+    first = shingle_hashes("Reading every day, compounds like interest.", 2)
+    second = shingle_hashes("reading every day compounds like interest", 2)
+
+    assert np.array_equal(first, second)
+    assert len(first) == 5
+    assert len(shingle_hashes("two words", 5)) == 1
+    assert len(shingle_hashes("...", 5)) == 0
+
+
+def test_signature_similarity_estimates_jaccard(make_transcript):
+    """Test that signature agreement tracks the true Jaccard similarity."""
+    text = make_transcript()
+    first, second = shingle_hashes(text), shingle_hashes(reupload(text))
+    a, b = set(first.tolist()), set(second.tolist())
+    hasher = MinHasher(num_perm=256)
+
+    estimate = similarity(hasher.signature(first), hasher.signature(second))
+
+    assert abs(estimate - len(a & b) / len(a | b)) < 0.1
+    assert similarity(hasher.signature(first), hasher.signature(first)) == 1.0
+
+
+def test_query_finds_near_duplicates_only(store, make_transcript):
+    """Test lookups of a reupload, an unrelated video and the video itself."""
+    index = NearDuplicateIndex(store, "transcript")
+    original = make_transcript()
+    index.add("original", original, payload="wisdom")
+    for seed in range(2, 12):
+        index.add(f"other{seed}", make_transcript(seed=seed))
+
+    matches = index.query(reupload(original))
+
+    assert [(m.item_id, m.payload) for m in matches] == [("original", "wisdom")]
+    assert matches[0].similarity >= 0.8
+    assert index.query(make_transcript(seed=99)) == []
+    assert index.query(original, exclude="original") == []
+
+
+def test_lookup_only_compares_bucket_candidates(store, make_transcript):
+    """Test that lookups do not scan the whole corpus."""
+    index = NearDuplicateIndex(store, "transcript")
+    for seed in range(30):
+        index.add(f"video{seed}", make_transcript(500, seed=seed))
+
+    with patch.object(store, "items", wraps=store.items) as items:
+        _ = index.query(make_transcript(500, seed=7))
+
+    assert list(items.call_args.args[1]) == ["video7"]
+
+
+def test_add_unique_collapses_duplicate_insights(store):
+    """Test that near-identical insights are stored once and aliased."""
+    index = NearDuplicateIndex(store, "insight", shingle_size=2)
+    insight = "Reading for thirty minutes every day compounds like interest over years"
+
+    assert index.add_unique("a:0", insight) is None
+    duplicate = index.add_unique("b:3", insight.upper() + "!")
+    assert index.add_unique("b:4", "Sleep is the foundation of memory") is None
+
+    assert duplicate.item_id == "a:0"
+    assert store.canonical_id("insight", "b:3") == "a:0"
+    assert store.count("insight") == 2
+
+
+def test_reindexing_a_video_replaces_its_insights(store, make_transcript):
+    """Test that insights dropped from a video's wisdom leave the index."""
+    first = "# INSIGHTS\n\n- Reading compounds like interest\n- Sleep builds memory\n"
+    second = "# INSIGHTS\n\n- Attention is the scarcest resource at work\n"
+    with patch.object(dedup, "_store", store), patch.dict(dedup._indexes, clear=True):
+        assert app.index_wisdom("video", make_transcript(), first) == 2
+        assert app.index_wisdom("video", make_transcript(), second) == 1
+        assert app.index_wisdom("video", make_transcript(), second) == 1
+
+    assert store.count("insight") == 1
+    assert store.items("insight", ["video:0", "video:1"]).keys() == {"video:0"}
+    assert store.canonical_id("insight", "video:0") is None
+
+
+def test_removing_a_canonical_insight_promotes_its_alias(store):
+    """Test that aliases of other videos survive their canonical item's removal."""
+    index = NearDuplicateIndex(store, "insight", shingle_size=2)
+    insight = "Reading for thirty minutes every day compounds like interest over years"
+    index.add_unique("a:0", insight, "first")
+    index.add_unique("b:0", insight + "!", "second")
+    index.add_unique("c:0", insight.upper(), "third")
+
+    index.remove_prefixed("a:")
+
+    assert store.items("insight", ["a:0", "b:0"]) == {
+        "b:0": (ANY, "second"),
+    }
+    assert store.canonical_id("insight", "b:0") is None
+    assert store.canonical_id("insight", "c:0") == "b:0"
+    assert [match.item_id for match in index.query(insight)] == ["b:0"]
+
+
+def test_index_rejects_uneven_bands(store):
+    """Test that the signature must split evenly into bands."""
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(store, "transcript", num_perm=100, bands=16)
+
+
+def test_app_reuses_wisdom_of_near_duplicate_video(store, make_transcript):
+    """Test that a reupload is served the original's wisdom without an AI call."""
+    wisdom = "# IDEAS\n\n- Reading compounds like interest\n- Sleep builds memory\n"
+    original = make_transcript()
+    with patch.object(dedup, "_store", store), patch.dict(
+        dedup._indexes, clear=True
+    ), patch.object(app.Config, "NEAR_DUPLICATE_REUSE", True), patch(
+        "app.process_with_ai", return_value=wisdom
+    ) as process:
+        first = app.extract_wisdom(original, "session", "original")
+        second = app.extract_wisdom(reupload(original), "session", "reupload")
+        added = app.index_wisdom("other", make_transcript(seed=5), wisdom)
+
+    assert first == second == wisdom
+    assert process.call_count == 1
+    assert added == 0
+    stored = json.loads(store.items("transcript", ["original"])["original"][1])
+    assert stored["wisdom"] == wisdom
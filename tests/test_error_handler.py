@@ -1,6 +1,26 @@
+import time
+
 import pytest
+import requests
 
-from utils.error_handler import InvalidVideoURLError, VideoNotFoundError, handle_errors
+from utils.error_handler import (
+    AIProcessingError,
+    CircuitBreaker,
+    CircuitOpenError,
+    InvalidVideoURLError,
+    RateLimitedError,
+    TranscriptNotAvailableError,
+    UpstreamError,
+    UpstreamRejectedError,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+    VideoNotFoundError,
+    WisdomExtractorError,
+    circuit_breaker_metrics,
+    classify_exception,
+    get_circuit_breaker,
+    handle_errors,
+)
 
 
 def test_video_not_found_error():
@@ -24,3 +44,211 @@ def test_handle_errors_decorator():
 
     with pytest.raises(ValueError):
         test_function()
+
+
+class FakeClock:
+    """A manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def fail(exc):
+    raise exc
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        "upstream",
+        failure_rate_threshold=0.5,
+        minimum_calls=4,
+        window_seconds=10,
+        open_seconds=30,
+        clock=clock,
+    )
+
+
+def trip(breaker):
+    for _ in range(breaker.minimum_calls):
+        with pytest.raises(UpstreamError):
+            breaker.call(fail, requests.ConnectionError("down"))
+
+
+def test_exception_taxonomy():
+    """Test that the custom exceptions share a common base."""
+    assert issubclass(TranscriptNotAvailableError, WisdomExtractorError)
+    assert issubclass(CircuitOpenError, UpstreamError)
+    # Existing callers catch AI failures as RuntimeError.
+    assert issubclass(AIProcessingError, RuntimeError)
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (http_error(429), RateLimitedError),
+        (http_error(503), UpstreamUnavailableError),
+        (http_error(404), UpstreamRejectedError),
+        (requests.Timeout("slow"), UpstreamTimeoutError),
+        (requests.ConnectionError("refused"), UpstreamUnavailableError),
+        (TimeoutError("slow"), UpstreamTimeoutError),
+    ],
+)
+def test_classify_exception(exc, expected):
+    """Test that client exceptions map onto the upstream taxonomy."""
+    classified = classify_exception(exc, "upstream")
+    assert type(classified) is expected
+    assert classified.upstream == "upstream"
+    assert str(classified) == str(exc)
+
+
+def test_classify_exception_leaves_unknown_errors_alone():
+    """Test that unclassifiable exceptions are returned unchanged."""
+    exc = ValueError("bad value")
+    assert classify_exception(exc) is exc
+
+
+def test_breaker_opens_at_failure_rate(breaker):
+    """Test that the breaker trips once the window's failure rate is reached."""
+    breaker.call(lambda: "ok")
+    breaker.call(lambda: "ok")
+    with pytest.raises(UpstreamError):
+        breaker.call(fail, requests.Timeout("slow"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(UpstreamError):
+        breaker.call(fail, requests.Timeout("slow"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_open_breaker_fails_fast(breaker):
+    """Test that an open breaker rejects calls without invoking them."""
+    trip(breaker)
+    calls = []
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        with pytest.raises(CircuitOpenError) as excinfo:
+            breaker.call(calls.append, 1)
+    elapsed = time.perf_counter() - start
+
+    assert calls == []
+    assert excinfo.value.retry_after == pytest.approx(30)
+    assert elapsed / 1000 < 0.001
+    assert breaker.metrics().rejected == 1000
+
+
+def test_non_failures_do_not_trip(breaker):
+    """Test that client and input errors leave the breaker closed."""
+
+    class VideoUnavailable(Exception):
+        pass
+
+    for _ in range(5):
+        with pytest.raises(UpstreamRejectedError):
+            breaker.call(fail, http_error(400))
+        with pytest.raises(RateLimitedError):
+            breaker.call(fail, http_error(429))
+        with pytest.raises(TranscriptNotAvailableError):
+            breaker.call(fail, TranscriptNotAvailableError("none"))
+        with pytest.raises(VideoUnavailable):
+            breaker.call(fail, VideoUnavailable("bad id"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failures_age_out_of_window(breaker, clock):
+    """Test that old failures stop counting once they leave the window."""
+    for _ in range(3):
+        with pytest.raises(UpstreamError):
+            breaker.call(fail, requests.ConnectionError("down"))
+    clock.advance(11)
+    with pytest.raises(UpstreamError):
+        breaker.call(fail, requests.ConnectionError("down"))
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.metrics().window_failures == 1
+
+
+def test_half_open_probe_closes_or_reopens(breaker, clock):
+    """Test the half-open probe in both directions."""
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    with pytest.raises(UpstreamError):
+        breaker.call(fail, requests.ConnectionError("still down"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.advance(30)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_limits_probe_calls(breaker, clock):
+    """Test that only one probe call is let through while half-open."""
+    trip(breaker)
+    clock.advance(30)
+    breaker.before_call()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+
+def test_call_admitted_before_a_trip_does_not_decide_the_probe(breaker, clock):
+    """Test that a slow call straddling a trip is not taken for the probe."""
+    slow_success = breaker.before_call()
+    slow_failure = breaker.before_call()
+    trip(breaker)
+    clock.advance(30)
+    probe = breaker.before_call()
+
+    breaker.record(False, slow_success)
+    breaker.record(True, slow_failure)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record(False, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.metrics().calls == 7
+
+
+def test_transitions_are_exposed_as_metrics(breaker, clock):
+    """Test that state transitions are counted and reported to listeners."""
+    seen = []
+    breaker.add_listener(lambda name, old, new: seen.append((name, old, new)))
+    trip(breaker)
+    clock.advance(30)
+    breaker.call(lambda: "ok")
+
+    metrics = breaker.metrics()
+    assert metrics.transitions == {
+        "closed->open": 1,
+        "open->half_open": 1,
+        "half_open->closed": 1,
+    }
+    assert metrics.calls == 5
+    assert metrics.failures == 4
+    assert seen[0] == ("upstream", "closed", "open")
+
+
+def test_get_circuit_breaker_is_shared():
+    """Test that breakers are shared per upstream and listed in metrics."""
+    breaker = get_circuit_breaker("test-upstream")
+    assert get_circuit_breaker("test-upstream") is breaker
+    assert "test-upstream" in [m.name for m in circuit_breaker_metrics()]
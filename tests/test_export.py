@@ -0,0 +1,136 @@
+import csv
+import tracemalloc
+
+import pytest
+
+from data.models import Insight
+from persistence.database import Database
+from persistence.export import export_arrow, export_csv, export_parquet
+from persistence.storage import StorageManager
+
+
+def generate_insights(count):
+    """Generate insight rows lazily, as a DB cursor would."""
+    for n in range(count):
+        yield {
+            "video_id": f"vid{n % 7}",
+            "category": ("key_insights", "quotes")[n % 2],
+            "text": f"Insight number {n}",
+            "timestamp": float(n),
+        }
+
+
+def test_export_csv_streams_from_database(tmp_path):
+    """Test that export_csv consumes Database.iter_rows directly."""
+    db = Database(str(tmp_path / "test.db"))
+    db.create_table("insights", "text TEXT, category TEXT")
+    db.insert_many("insights", [{"text": f"t{n}", "category": "c"} for n in range(10)])
+    file_path = str(tmp_path / "out.csv")
+
+    count = export_csv(db.iter_rows("SELECT * FROM insights", batch_size=3), file_path)
+
+    with open(file_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert count == 10
+    assert rows[9] == {"text": "t9", "category": "c"}
+
+
+def test_export_keeps_file_mode(tmp_path):
+    """Test that replacing an export keeps the existing file's permissions."""
+    file_path = tmp_path / "out.csv"
+    file_path.write_text("")
+    file_path.chmod(0o640)
+
+    export_csv(generate_insights(3), str(file_path))
+
+    assert file_path.stat().st_mode & 0o777 == 0o640
+
+
+def test_export_csv_accepts_dataclasses(tmp_path):
+    """Test that dataclass rows are exported with their fields as columns."""
+    file_path = str(tmp_path / "out.csv")
+    insights = [Insight(text="a", timestamp=1.0, category="general")]
+
+    assert export_csv(iter(insights), file_path) == 1
+    with open(file_path, newline="", encoding="utf-8") as f:
+        assert next(csv.DictReader(f))["category"] == "general"
+
+
+def test_export_csv_constant_memory(tmp_path):
+    """Test that peak memory does not grow with the number of rows."""
+
+    def peak_for(count):
+        tracemalloc.start()
+        export_csv(generate_insights(count), str(tmp_path / f"{count}.csv"))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    assert peak_for(50000) < peak_for(5000) * 2
+
+
+def test_save_csv_uses_union_of_keys(tmp_path):
+    """Test that save_csv no longer drops columns missing from the first row."""
+    file_path = str(tmp_path / "out.csv")
+    StorageManager.save_csv([{"a": 1}, {"a": 2, "b": 3}], file_path)
+
+    with open(file_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [{"a": "1", "b": ""}, {"a": "2", "b": "3"}]
+
+
+def test_export_parquet_row_groups_and_dictionary_columns(tmp_path):
+    """Test Parquet export row-group sizing and dictionary encoding."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    file_path = str(tmp_path / "out.parquet")
+
+    count = export_parquet(generate_insights(2500), file_path, row_group_size=1000)
+
+    parquet_file = pq.ParquetFile(file_path)
+    schema = parquet_file.schema_arrow
+    assert count == 2500
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.metadata.row_group(0).num_rows == 1000
+    assert str(schema.field("category").type).startswith("dictionary")
+    assert str(schema.field("video_id").type).startswith("dictionary")
+    assert parquet_file.read().column("text")[2499].as_py() == "Insight number 2499"
+
+
+def test_export_parquet_types_columns_empty_in_first_row_group(tmp_path):
+    """Test that a column that is None throughout the first row group keeps its type."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    file_path = str(tmp_path / "out.parquet")
+    rows = (
+        {"text": f"Insight {n}", "score": None if n < 1500 else n / 10}
+        for n in range(2500)
+    )
+
+    count = export_parquet(rows, file_path, row_group_size=1000)
+
+    table = pq.read_table(file_path)
+    assert count == table.num_rows == 2500
+    assert str(table.schema.field("score").type) == "double"
+    assert table.column("score")[2499].as_py() == 249.9
+    assert table.column("text")[2499].as_py() == "Insight 2499"
+
+
+def test_export_arrow_round_trip(tmp_path):
+    """Test Arrow IPC export."""
+    pa = pytest.importorskip("pyarrow")
+    file_path = str(tmp_path / "out.arrows")
+
+    count = export_arrow(generate_insights(300), file_path, batch_size=128)
+
+    table = pa.ipc.open_stream(file_path).read_all()
+    assert count == table.num_rows == 300
+    assert table.column("video_id")[8].as_py() == "vid1"
+
+
+def test_export_empty_iterator_writes_nothing(tmp_path):
+    """Test that exporting no rows leaves no file behind."""
+    pytest.importorskip("pyarrow")
+    file_path = tmp_path / "out.parquet"
+
+    assert export_parquet(iter([]), str(file_path)) == 0
+    assert not file_path.exists()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,160 @@
+import json
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+import app
+from config.config import Config
+from loadtest.fake_upstream import FakeUpstream, LatencyModel, UpstreamBehavior
+from utils.ai_processor import AIProcessor, openai_base_url
+from utils.error_handler import CircuitBreaker
+
+
+@pytest.fixture
+def upstream():
+    """Fake upstream server serving one-minute transcripts, no faults injected."""
+    with FakeUpstream(behavior=UpstreamBehavior(transcript_minutes=1)) as server:
+        yield server
+
+
+def post_completion(server, **body):
+    body.setdefault("messages", [{"role": "user", "content": "hello"}])
+    return requests.post(server.chat_completions_url, json=body, timeout=10)
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        "fixed:0.2",
+        "uniform:0.1:0.3",
+        "normal:0.2:0.05",
+        "lognormal:0.2:0.5",
+        "exponential:0.2",
+    ],
+)
+def test_latency_models(spec):
+    """Test that every distribution parses and samples around its scale."""
+    model = LatencyModel.parse(spec)
+    rng = random.Random(1)
+    samples = sorted(model.sample(rng) for _ in range(2000))
+    assert min(samples) >= 0
+    assert 0.1 < samples[1000] < 0.3
+
+
+def test_latency_model_rejects_bad_specs():
+    """Test that unknown kinds and wrong parameter counts are rejected."""
+    with pytest.raises(ValueError):
+        LatencyModel.parse("pareto:1")
+    with pytest.raises(ValueError):
+        LatencyModel.parse("uniform:1")
+
+
+def test_serves_transcripts(upstream):
+    """Test that transcripts have the YouTubeTranscriptApi shape and are stable."""
+    first = requests.get(f"{upstream.url}/transcripts/abc", timeout=10).json()
+    second = requests.get(f"{upstream.url}/transcripts/abc", timeout=10).json()
+
+    assert first == second
+    assert set(first[0]) == {"text", "start", "duration"}
+    assert 50 < first[-1]["start"] <= 60
+
+
+def test_serves_recordings(tmp_path):
+    """Test that recorded transcripts and completions are served as-is."""
+    (tmp_path / "transcripts").mkdir()
+    (tmp_path / "completions").mkdir()
+    segments = [{"text": "recorded", "start": 0.0, "duration": 1.0}]
+    (tmp_path / "transcripts" / "vid.json").write_text(json.dumps(segments))
+    (tmp_path / "completions" / "a.md").write_text("- recorded wisdom")
+
+    with FakeUpstream(recordings=str(tmp_path)) as server:
+        transcript = requests.get(f"{server.url}/transcripts/vid", timeout=10)
+        missing = requests.get(f"{server.url}/transcripts/other", timeout=10)
+        completion = post_completion(server).json()
+
+    assert transcript.json() == segments
+    assert missing.status_code == 404
+    assert completion["choices"][0]["message"]["content"] == "- recorded wisdom"
+
+
+def test_streaming_matches_non_streaming(upstream):
+    """Test that streamed deltas reassemble into the non-streamed content."""
+    expected = post_completion(upstream).json()["choices"][0]["message"]["content"]
+
+    response = post_completion(upstream, stream=True)
+    deltas = []
+    for line in response.iter_lines():
+        if line.startswith(b"data: ") and line != b"data: [DONE]":
+            event = json.loads(line[len(b"data: ") :])
+            deltas.append(event["choices"][0]["delta"].get("content", ""))
+
+    assert response.headers["Content-Type"] == "text/event-stream"
+    assert len(deltas) > 10
+    assert "".join(deltas) == expected
+
+
+def test_injects_faults(upstream):
+    """Test 429 and 5xx injection, with Retry-After on 429s."""
+    upstream.behavior.rate_429 = 1.0
+    upstream.behavior.retry_after = 7
+    rate_limited = post_completion(upstream)
+    upstream.behavior.rate_429 = 0.0
+    upstream.behavior.rate_5xx = 1.0
+    failed = requests.get(f"{upstream.url}/transcripts/abc", timeout=10)
+
+    assert rate_limited.status_code == 429
+    assert rate_limited.headers["Retry-After"] == "7"
+    assert failed.status_code in (500, 502, 503)
+    assert upstream.stats()["completions 429"] == 1
+
+
+def test_latency_and_token_throttling(upstream):
+    """Test that latency and token rate both slow responses down."""
+    upstream.behavior.latency = LatencyModel.parse("fixed:0.1")
+    upstream.behavior.completion_items = 1
+    upstream.behavior.tokens_per_second = 1000  # ~150 tokens -> ~0.15s
+
+    start = time.perf_counter()
+    body = post_completion(upstream).json()
+    elapsed = time.perf_counter() - start
+
+    tokens = body["usage"]["completion_tokens"]
+    assert elapsed >= 0.1 + tokens / 1000 * 0.9
+
+
+def test_openai_base_url():
+    """Test deriving the OpenAI client base URL from the endpoint setting."""
+    assert openai_base_url("https://api.openai.com/v1/chat/completions") == (
+        "https://api.openai.com/v1"
+    )
+    assert openai_base_url("http://localhost:8089/v1/") == "http://localhost:8089/v1"
+
+
+def test_app_pipeline_runs_offline(upstream):
+    """Test the transcript and AI steps of the app end to end against the fake."""
+    with (
+        patch("app.TRANSCRIPT_API_URL", upstream.url),
+        patch("app.OPENROUTER_API_URL", upstream.chat_completions_url),
+        patch("app.get_circuit_breaker", side_effect=CircuitBreaker),
+    ):
+        transcript = app.get_transcript("dQw4w9WgXcQ")
+        wisdom = app.process_with_ai(transcript)
+
+    assert not transcript.startswith("Error")
+    assert "# IDEAS" in wisdom
+    assert upstream.stats() == {"transcripts 200": 1, "completions 200": 1}
+
+
+def test_ai_processor_uses_configured_url(upstream):
+    """Test that AIProcessor talks to Config.OPENAI_API_URL."""
+    with patch.object(Config, "OPENAI_API_URL", upstream.chat_completions_url):
+        processor = AIProcessor(api_key="test-key")
+    upstream.behavior.completion_items = 2
+
+    with patch("utils.ai_processor.get_circuit_breaker", side_effect=CircuitBreaker):
+        insights = processor.extract_insights("A transcript")
+
+    assert len(insights) == 12
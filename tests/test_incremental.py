@@ -0,0 +1,165 @@
+from unittest.mock import patch
+
+import pytest
+
+import app
+from persistence.chunk_store import ChunkResultStore
+from utils import incremental
+from utils.incremental import IncrementalExtractor, chunk_transcript, merge_sections
+
+
+def fake_extract(text):
+    """Stand-in for the AI: one bullet naming the chunk's first words."""
+    return f"# IDEAS\n\n- {' '.join(text.split()[:4])}\n"
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    """Extractor with small chunks, storing results in a throwaway database."""
+    return IncrementalExtractor(
+        ChunkResultStore(str(tmp_path / "chunks.db")), target_chars=2000
+    )
+
+
+def test_chunks_cover_the_transcript(make_transcript):
+    """Test that chunks are contiguous, bounded and cover every character."""
+    text = make_transcript(6000)
+    chunks = chunk_transcript(text, target_chars=2000)
+
+    assert "".join(chunk.text for chunk in chunks) == text
+    assert all(chunk.start == prev.end for prev, chunk in zip(chunks, chunks[1:]))
+    assert all(500 <= len(chunk.text) <= 8100 for chunk in chunks[:-1])
+    assert 10 < len(chunks) < 40
+
+
+def test_local_edit_changes_only_nearby_chunks(make_transcript):
+    """Test that editing one caption keeps the digests of other chunks."""
+    text = make_transcript(6000)
+    middle = len(text) // 2
+    edited = text[:middle] + " corrected caption " + text[middle:]
+
+    before = [c.digest for c in chunk_transcript(text, 2000)]
+    after = [c.digest for c in chunk_transcript(edited, 2000)]
+
+    assert len(set(after) - set(before)) <= 2
+    assert [c.digest for c in chunk_transcript(text.replace("\n", "  \n"), 2000)] == (
+        before
+    )
+
+
+def test_merge_sections_interleaves_dedupes_and_caps():
+    """Test the reduce step over chunk results."""
+    merged = merge_sections(
+        [
+            "# SUMMARY\n\nFirst half.\n\n# IDEAS\n\n- a1\n- a2\n- Shared idea\n",
+            "SUMMARY:\nSecond half.\n\nIDEAS:\n- b1\n- shared idea!\n- b3\n",
+        ],
+        max_items=4,
+    )
+
+    assert merged == (
+        "# SUMMARY\n\nFirst half.\n\nSecond half.\n\n"
+        "# IDEAS\n\n- a1\n- b1\n- a2\n- shared idea!\n"
+    )
+
+
+def test_merge_sections_keeps_numbered_items_and_preamble():
+    """Test that numbered lists merge like bullets and leading text survives."""
+    merged = merge_sections(
+        [
+            "Key points from the talk.\n\n# IDEAS\n1. a1\n2) Shared idea\n",
+            "# IDEAS\n1. b1\n2. shared idea\n",
+        ]
+    )
+
+    assert (
+        merged == "Key points from the talk.\n\n# IDEAS\n\n- a1\n- b1\n- Shared idea\n"
+    )
+
+
+def test_merge_sections_returns_a_single_result_unchanged():
+    """Test that a one-chunk transcript keeps the AI's formatting."""
+    result = "Intro\n\n## IDEAS\n1. one\n\n| table | row |\n"
+
+    assert merge_sections([result]) == result
+
+
+def test_reextraction_only_processes_changed_chunks(extractor, make_transcript):
+    """Test that a re-captioned transcript reuses stored chunk results."""
+    text = make_transcript(6000)
+    calls = []
+
+    def extract(chunk):
+        calls.append(chunk)
+        return fake_extract(chunk)
+
+    first = extractor.extract("vid", text, extract)
+    assert (first.reused, first.processed) == (0, first.chunks)
+    assert len(calls) == first.chunks
+
+    calls.clear()
+    middle = len(text) // 2
+    edited = text[:middle] + " corrected caption " + text[middle:]
+    second = extractor.extract("vid", edited, extract)
+
+    assert second.processed == len(calls) <= 2
+    assert second.reused_fraction > 0.9
+    assert second.wisdom.startswith("# IDEAS")
+    assert extractor.store.video_chunks("vid") == [
+        c.digest for c in chunk_transcript(edited, 2000)
+    ]
+
+
+def test_failed_chunks_are_retried_alone(extractor, make_transcript):
+    """Test that chunk errors surface and successful chunks are kept."""
+    text = make_transcript(2000)
+    failing = {True}
+
+    def flaky(chunk):
+        if failing and chunk == chunk_transcript(text, 2000)[1].text:
+            return "Error processing with AI: 503"
+        return fake_extract(chunk)
+
+    result = extractor.extract("vid", text, flaky)
+    assert result.failed == 1
+    assert result.wisdom == "Error processing with AI: 503"
+
+    failing.clear()
+    retry = extractor.extract("vid", text, flaky)
+    assert (retry.processed, retry.failed) == (1, 0)
+
+
+def test_prompt_change_invalidates_results(extractor, make_transcript):
+    """Test that results are only reused for the prompt that produced them."""
+    text = make_transcript(2000)
+    extractor.extract("vid", text, fake_extract, prompt_key="v1")
+    result = extractor.extract("vid", text, fake_extract, prompt_key="v2")
+    assert result.reused == 0
+
+
+def test_prune_drops_results_of_replaced_chunks(extractor, make_transcript):
+    """Test that results no video refers to can be deleted."""
+    text = make_transcript(2000)
+    extractor.extract("vid", text, fake_extract)
+    extractor.extract("vid", make_transcript(2000, seed=2), fake_extract)
+
+    assert extractor.store.prune() == len(chunk_transcript(text, 2000))
+
+
+def test_app_uses_incremental_extraction_when_enabled(extractor, make_transcript):
+    """Test the app wiring: chunks go through process_with_ai, results merge."""
+    with patch.object(incremental, "_extractor", extractor), patch.object(
+        app.Config, "INCREMENTAL_EXTRACTION", True
+    ), patch(
+        "app.process_with_ai", side_effect=lambda text, **_: fake_extract(text)
+    ) as process:
+        wisdom = app.extract_wisdom(make_transcript(2000), "session", "vid")
+        calls = process.call_count
+        again = app.extract_wisdom(make_transcript(2000), "session", "vid")
+
+    assert wisdom == again and wisdom.startswith("# IDEAS")
+    assert calls > 1 and process.call_count == calls
+    assert process.call_args.kwargs == {
+        "priority": app.PRIORITY_INTERACTIVE,
+        "tenant": "session",
+    }
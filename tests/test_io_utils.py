@@ -1,13 +1,18 @@
 import os
 import tempfile
+import tracemalloc
 import unittest
 from unittest.mock import MagicMock, patch
 
 from youtube_transcript_api import YouTubeTranscriptApi
 
 from utils.io_utils import (
+    MappedTextFile,
     download_transcript,
     download_youtube_video,
+    iter_chunks,
+    iter_lines,
+    read_file,
     read_from_file,
     save_to_file,
 )
@@ -125,5 +130,68 @@ class TestIOUtils(unittest.TestCase):
         os.unlink(tmp_file_path)
 
 
+class TestStreamingReaders(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # ~4 MB transcript dump with multi-byte characters on every line.
+        cls.line = "Caption segment with ünïcode — and emoji 😀 text"
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", suffix=".txt", delete=False
+        ) as tmp_file:
+            for n in range(60000):
+                tmp_file.write(f"{n} {cls.line}\n")
+            cls.file_path = tmp_file.name
+        cls.file_size = os.path.getsize(cls.file_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.file_path)
+
+    def peak_memory(self, func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_iter_lines(self):
+        lines = iter_lines(self.file_path)
+        self.assertEqual(next(lines), f"0 {self.line}")
+        self.assertEqual(sum(1 for _ in lines), 59999)
+
+    def test_iter_chunks_aligned_to_utf8(self):
+        chunks = list(iter_chunks(self.file_path, chunk_size=1001))
+        self.assertTrue(all(len(c.encode("utf-8")) <= 1001 for c in chunks))
+        self.assertEqual("".join(chunks), read_file(self.file_path))
+
+    def test_mapped_text_file_random_access(self):
+        with MappedTextFile(self.file_path) as mapped:
+            self.assertEqual(len(mapped), self.file_size)
+            offset = mapped.find("30000 ")
+            self.assertEqual(next(mapped.iter_lines(offset)), f"30000 {self.line}")
+            # Offsets inside multi-byte characters are snapped to boundaries.
+            emoji = mapped.find("😀")
+            self.assertEqual(mapped.read(emoji + 1, 4), "😀 ")
+
+    def test_peak_memory_streaming_vs_full_read(self):
+        full = self.peak_memory(lambda: read_file(self.file_path))
+        chunked = self.peak_memory(
+            lambda: sum(len(c) for c in iter_chunks(self.file_path, 64 * 1024))
+        )
+        lines = self.peak_memory(lambda: sum(1 for _ in iter_lines(self.file_path)))
+
+        def scan_mapped():
+            with MappedTextFile(self.file_path) as mapped:
+                return sum(1 for _ in mapped.iter_lines())
+
+        mapped = self.peak_memory(scan_mapped)
+
+        self.assertGreater(full, self.file_size)
+        self.assertLess(chunked, full / 10)
+        self.assertLess(lines, full / 10)
+        self.assertLess(mapped, full / 10)
+
+
 if __name__ == "__main__":
     unittest.main()
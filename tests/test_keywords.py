@@ -0,0 +1,167 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import app
+from data.schemas import VideoInsights, VideoMetadata
+from persistence.keyword_store import KeywordStore
+from utils import keywords
+from utils.keywords import (
+    KeywordExtractor,
+    cluster_topics,
+    count_matrix,
+    extract_terms,
+    fill_video_insights,
+    insight_topics,
+    iter_keyword_batches,
+)
+
+COMMON = "welcome back podcast episode today guest conversation "
+
+TRANSCRIPTS = {
+    "sleep": COMMON + "sleep memory consolidation deep sleep improves memory " * 20,
+    "money": COMMON
+    + "compound interest index funds grow money compound interest " * 20,
+    "focus": COMMON + "deep work focus attention distraction deep work " * 20,
+}
+
+INSIGHTS = [
+    "Deep sleep consolidates memory every night",
+    "Sleep deprivation harms memory and mood",
+    "Memory improves after deep sleep",
+    "Compound interest rewards patience with money",
+    "Index funds grow money through compound interest",
+    "Money saved early grows by compound interest",
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Keyword store backed by a database in `tmp_path`."""
+    return KeywordStore(str(tmp_path / "keywords.db"))
+
+
+def test_extract_terms_skips_stopwords_and_pairs_neighbours():
+    """Test candidate terms, including bigrams that do not span stopwords."""
+    assert extract_terms("The power of compound interest, it's 42 percent!") == [
+        "power",
+        "compound",
+        "interest",
+        "compound interest",
+        "percent",
+    ]
+    assert extract_terms("deep work", bigrams=False) == ["deep", "work"]
+
+
+def test_count_matrix_counts_terms_per_document():
+    """Test the sparse count matrix and its alphabetical vocabulary."""
+    counts, vocabulary = count_matrix([["b", "a", "b"], [], ["c"]])
+
+    assert vocabulary == ["a", "b", "c"]
+    assert counts.toarray().tolist() == [[1, 2, 0], [0, 0, 0], [0, 0, 1]]
+
+
+def test_document_frequencies_update_incrementally(store):
+    """Test that re-adding a document replaces its counts."""
+    store.add_documents({"v1": ["sleep", "memory"], "v2": ["sleep"]})
+    store.add_documents({"v1": ["money"]})
+
+    assert store.document_count() == 2
+    assert store.document_frequencies(["sleep", "memory", "money", "x"]) == {
+        "sleep": 1,
+        "money": 1,
+    }
+
+
+def test_keywords_downweight_terms_common_to_the_corpus(store):
+    """Test that words every video shares rank below specific ones."""
+    extractor = KeywordExtractor(store, top_k=3)
+    result = extractor.extract_batch(TRANSCRIPTS)
+
+    assert result["sleep"] == ["memory", "sleep", "consolidation"]
+    assert "compound interest" in result["money"]
+    assert result["focus"][0] == "deep work"
+    assert not set(COMMON.split()) & {w for kws in result.values() for w in kws}
+    assert store.document_count() == 3
+    assert extractor.extract("sleep", TRANSCRIPTS["sleep"]) == result["sleep"]
+    assert store.document_count() == 3
+
+
+def test_iter_keyword_batches_backfills_in_batches(store):
+    """Test that a stream of documents is processed in fixed-size batches."""
+    extractor = KeywordExtractor(store)
+    with patch.object(
+        extractor, "extract_batch", wraps=extractor.extract_batch
+    ) as batch:
+        results = list(iter_keyword_batches(TRANSCRIPTS.items(), extractor, size=2))
+
+    assert [len(result) for result in results] == [2, 1]
+    assert batch.call_count == 2
+
+
+def test_cluster_topics_groups_related_insights():
+    """Test that topics separate sleep insights from money insights."""
+    topics, labels = cluster_topics(INSIGHTS, n_topics=2)
+
+    assert [topic.size for topic in topics] == [3, 3]
+    assert labels.tolist() in ([0, 0, 0, 1, 1, 1], [1, 1, 1, 0, 0, 0])
+    terms = {tuple(topic.terms[:2]) for topic in topics}
+    assert any("sleep" in t or "memory" in t for t in terms)
+    assert any("money" in t or "compound interest" in t for t in terms)
+    assert cluster_topics(INSIGHTS, n_topics=2)[1].tolist() == labels.tolist()
+    assert cluster_topics([], n_topics=2)[0] == []
+
+
+def test_insight_topics_count_videos(store):
+    """Test topic clustering over the insights stored per video."""
+    store.set_insights("a", INSIGHTS[:2] + INSIGHTS[3:4])
+    store.set_insights("b", INSIGHTS[2:3] + INSIGHTS[4:])
+
+    topics = insight_topics(store, n_topics=2)
+
+    assert sorted(topic.size for topic in topics) == [3, 3]
+    assert all(topic.videos == 2 for topic in topics)
+
+
+def test_fill_video_insights_sets_missing_fields(store):
+    """Test that keywords and summary are filled locally, keeping set fields."""
+    metadata = VideoMetadata(
+        video_id="sleep",
+        title="Sleep",
+        description="",
+        upload_date=datetime(2024, 1, 1),
+        duration=60,
+    )
+    extractor = KeywordExtractor(store, top_k=2)
+
+    filled = fill_video_insights(
+        VideoInsights(video_metadata=metadata, insights=[]),
+        TRANSCRIPTS["sleep"],
+        extractor,
+        summary_tokens=50,
+    )
+    kept = fill_video_insights(
+        VideoInsights(video_metadata=metadata, insights=[], keywords=["x"]),
+        TRANSCRIPTS["sleep"],
+        extractor,
+    )
+
+    assert filled.keywords == ["memory", "sleep"]
+    assert 0 < len(filled.summary) <= 200
+    assert kept.keywords == ["x"]
+
+
+def test_app_index_keywords_records_insights(store):
+    """Test the app helper used after each extraction."""
+    extractor = KeywordExtractor(store)
+    wisdom = "# IDEAS\n\n- Deep sleep consolidates memory\n- Naps help\n"
+    with patch.object(keywords, "_extractor", extractor):
+        result = app.index_keywords("sleep", TRANSCRIPTS["sleep"], wisdom)
+
+    assert result[:2] == ["memory", "sleep"]
+    assert list(store.iter_insights()) == [
+        ("sleep", "Deep sleep consolidates memory"),
+        ("sleep", "Naps help"),
+    ]
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+
+from loadtest.fake_upstream import FakeUpstream, LatencyModel, UpstreamBehavior
+from loadtest.load_generator import LoadTestConfig, format_report, run_load_test
+from security.quota import QuotaManager
+from utils.error_handler import CircuitBreaker
+
+
+@pytest.fixture
+def upstream():
+    """Fixture pointing the app at a fast fake upstream."""
+    behavior = UpstreamBehavior(
+        latency=LatencyModel.parse("fixed:0.01"), transcript_minutes=2
+    )
+    with FakeUpstream(behavior=behavior) as server, patch(
+        "app.TRANSCRIPT_API_URL", server.url
+    ), patch("app.OPENROUTER_API_URL", server.chat_completions_url), patch(
+        "app.get_circuit_breaker", side_effect=CircuitBreaker
+    ):
+        yield server
+
+
+def test_run_load_test_reports_sessions(upstream):
+    """Test that concurrent sessions complete and the report is filled in."""
+    report = run_load_test(LoadTestConfig(users=2, sessions_per_user=2))
+
+    assert report["sessions"] == 4
+    assert report["errors"] == 0
+    assert report["throughput_sessions_per_second"] > 0
+    assert report["latency_seconds"]["session"]["p50"] > 0
+    assert report["ai_queue"]["wait_seconds"]["0"]["admitted"] == 4
+    assert {row["stage"] for row in report["stages"]} >= {
+        "transcript_fetch",
+        "ai_call",
+        "rendering",
+    }
+    assert report["memory"]["session_state_bytes"]["p50"] > 0
+    assert "peak_bytes" not in report["memory"]
+    assert "Sessions: 4 (0 failed)" in format_report(report)
+
+
+def test_run_load_test_reports_failures(upstream):
+    """Test that upstream errors are counted instead of aborting the run."""
+    upstream.behavior.rate_5xx = 1.0
+    with patch("app.time.sleep"):
+        report = run_load_test(LoadTestConfig(users=2, warm_up=False))
+
+    assert report["errors"] == 2
+    assert report["error_samples"]
+
+
+def test_sessions_run_the_app_quota_check(upstream):
+    """Test that extractions are charged to the app's quota identity."""
+    quotas = QuotaManager(capacity=1, refill_per_hour=1)
+    with patch("app.get_quota_manager", return_value=quotas), patch(
+        "app.quota_identity", return_value="user:shared"
+    ):
+        report = run_load_test(LoadTestConfig(users=2, warm_up=False))
+
+    assert report["errors"] == 1
+    assert report["error_samples"][0].startswith("You have reached your extraction")
+    assert quotas.peek("user:shared").remaining < 1
+
+
+def test_trace_memory_adds_allocation_figures(upstream):
+    """Test that tracemalloc figures are only reported when requested."""
+    report = run_load_test(LoadTestConfig(users=1, trace_memory=True))
+
+    assert report["memory"]["peak_bytes"] > 0
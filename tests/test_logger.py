@@ -1,8 +1,18 @@
+import json
 import logging
 import unittest
+from logging.handlers import QueueHandler
 from unittest.mock import MagicMock, patch
 
-from logging_utils.logger import setup_logger
+from logging_utils.logger import (
+    JsonFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+    get_listener,
+    lazy,
+    setup_logger,
+    shutdown_logging,
+)
 
 
 class TestLogger(unittest.TestCase):
@@ -17,6 +27,7 @@ class TestLogger(unittest.TestCase):
         """Clean up after tests."""
         import os
 
+        shutdown_logging()
         if os.path.exists(self.log_file):
             os.remove(self.log_file)
 
@@ -27,23 +38,52 @@ class TestLogger(unittest.TestCase):
         self.assertEqual(logger.name, self.logger_name)
 
     def test_setup_logger_configures_handlers(self):
-        """Test that setup_logger configures both file and console handlers."""
+        """Test that the logger only gets a queue handler feeding a listener."""
         logger = setup_logger(self.logger_name, self.log_file)
-        self.assertEqual(len(logger.handlers), 2)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], QueueHandler)
+        self.assertEqual(len(get_listener(self.logger_name).handlers), 2)
+
+    def test_setup_logger_is_idempotent(self):
+        """Test that repeated setup does not add duplicate handlers."""
+        setup_logger(self.logger_name, self.log_file)
+        logger = setup_logger(self.logger_name, self.log_file, logging.DEBUG)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertEqual(logger.level, logging.DEBUG)
 
     def test_setup_logger_file_handler(self):
         """Test that the file handler is correctly configured."""
-        logger = setup_logger(self.logger_name, self.log_file)
-        file_handler = logger.handlers[0]
+        setup_logger(self.logger_name, self.log_file)
+        file_handler = get_listener(self.logger_name).handlers[0]
         self.assertEqual(type(file_handler).__name__, "RotatingFileHandler")
         self.assertIn(self.log_file, file_handler.baseFilename)
 
     def test_setup_logger_console_handler(self):
         """Test that the console handler is correctly configured."""
-        logger = setup_logger(self.logger_name, self.log_file)
-        console_handler = logger.handlers[1]
+        setup_logger(self.logger_name, self.log_file)
+        console_handler = get_listener(self.logger_name).handlers[1]
         self.assertEqual(type(console_handler).__name__, "StreamHandler")
 
+    def test_setup_logger_writes_json(self):
+        """Test that records reach the file as JSON lines through the queue."""
+        logger = setup_logger(self.logger_name, self.log_file, json_format=True)
+        with patch.object(get_listener(self.logger_name).handlers[1], "emit"):
+            logger.info("Fetched %s", "abc", extra={"video_id": "abc"})
+            shutdown_logging()
+
+        with open(self.log_file, encoding="utf-8") as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(entry["message"], "Fetched abc")
+        self.assertEqual(entry["video_id"], "abc")
+        self.assertEqual(entry["level"], "INFO")
+
+    def test_disabled_debug_is_not_formatted(self):
+        """Test that lazy arguments are never evaluated below the log level."""
+        logger = setup_logger(self.logger_name, self.log_file)
+        expensive = MagicMock(return_value="value")
+        logger.debug("Value: %s", lazy(expensive))
+        expensive.assert_not_called()
+
     def test_setup_logger_log_level(self):
         """Test that the logger is set to the correct log level."""
         logger = setup_logger(self.logger_name, self.log_file)
@@ -74,5 +114,48 @@ class TestLogger(unittest.TestCase):
                 mock_exception.assert_called_once_with("Test exception")
 
 
+class TestLogFilters(unittest.TestCase):
+    """Test cases for the sampling, rate-limiting and JSON helpers."""
+
+    @staticmethod
+    def make_record(msg="message %s", level=logging.DEBUG):
+        return logging.LogRecord("test", level, __file__, 1, msg, ("x",), None)
+
+    def test_sampling_filter_keeps_fraction_of_debug(self):
+        """Test that one in four debug records is kept at rate 0.25."""
+        sampler = SamplingFilter(0.25)
+        kept = sum(sampler.filter(self.make_record()) for _ in range(100))
+        self.assertEqual(kept, 25)
+        self.assertTrue(sampler.filter(self.make_record(level=logging.WARNING)))
+
+    def test_rate_limit_filter_reports_suppressed(self):
+        """Test that repeated messages are capped per window and counted."""
+        now = [0.0]
+        limiter = RateLimitFilter(limit=2, period=60, clock=lambda: now[0])
+        results = [limiter.filter(self.make_record()) for _ in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertTrue(limiter.filter(self.make_record("other %s")))
+
+        now[0] = 61
+        record = self.make_record()
+        self.assertTrue(limiter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+        self.assertIn("suppressed 3 similar messages", record.getMessage())
+
+    def test_json_formatter_includes_exception(self):
+        """Test that exceptions are serialized into the JSON entry."""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            import sys
+
+            record = logging.LogRecord(
+                "test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()
+            )
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "failed")
+        self.assertIn("ValueError: boom", entry["exc_info"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,198 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import app
+from utils import prefetch
+from utils.prefetch import ResultCache, SpeculativePrefetcher, cache_key
+from utils.tracing import render_prometheus
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SessionState(dict):
+    """A stand-in for `st.session_state`, which supports `in` and attributes."""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+@pytest.fixture
+def prefetcher():
+    """A small prefetcher whose worker threads are shut down after the test."""
+    instance = SpeculativePrefetcher(max_in_flight=2, calls_per_hour=10)
+    yield instance
+    instance.shutdown()
+
+
+def wait_idle(instance):
+    """Wait until no speculative call is running or still being cleaned up."""
+    deadline = time.monotonic() + 5
+    while instance._in_flight and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_result_cache_evicts_least_recently_used_and_expired():
+    """Test LRU eviction, expiry and the eviction callback."""
+    clock = FakeClock()
+    evicted = []
+    cache = ResultCache(
+        max_entries=2, ttl=10, on_evict=lambda k, v: evicted.append(k), clock=clock
+    )
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert evicted == ["b"]
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert evicted == ["b", "a"]
+    assert cache.pop("c") is None
+    assert len(cache) == 0
+
+
+def test_cache_key_is_stable_and_separates_parts():
+    """Test that keys depend on every part and on where parts are split."""
+    assert cache_key("abc") == cache_key("abc")
+    assert cache_key("ab", "c") != cache_key("a", "bc")
+
+
+def test_prefetched_result_is_served_without_a_new_call(prefetcher):
+    """Test that a click after a finished prefetch is a cache hit."""
+    assert prefetcher.prefetch("k", lambda: "wisdom", tenant="alice")
+    wait_idle(prefetcher)
+    compute = MagicMock(return_value="fresh")
+
+    assert prefetcher.get_or_compute("k", compute) == "wisdom"
+    compute.assert_not_called()
+    stats = prefetcher.stats()
+    assert (stats.started, stats.hits, stats.hit_rate) == (1, 1, 1.0)
+
+
+def test_lookup_joins_in_flight_call(prefetcher):
+    """Test that a click during a prefetch waits for it instead of calling again."""
+    release = threading.Event()
+    prefetcher.prefetch("k", lambda: release.wait(5) and "wisdom", tenant="alice")
+    compute = MagicMock(return_value="fresh")
+    threading.Timer(0.05, release.set).start()
+
+    assert prefetcher.get_or_compute("k", compute) == "wisdom"
+    compute.assert_not_called()
+    assert prefetcher.stats().joined == 1
+
+
+def test_lookup_stops_waiting_for_a_stuck_call():
+    """Test that a click does not wait on a slow prefetch past the join timeout."""
+    instance = SpeculativePrefetcher(join_timeout=0.05)
+    release = threading.Event()
+    instance.prefetch("k", lambda: release.wait(5) and "wisdom", tenant="alice")
+
+    assert instance.get_or_compute("k", lambda: "fresh") == "fresh"
+    stats = instance.stats()
+    assert (stats.abandoned, stats.misses) == (1, 1)
+    release.set()
+    instance.shutdown()
+
+
+def test_speculative_limits(prefetcher):
+    """Test the per-tenant, in-flight and hourly budget limits."""
+    release = threading.Event()
+    slow = lambda: release.wait(5) and "wisdom"  # noqa: E731
+
+    assert prefetcher.prefetch("a", slow, tenant="alice")
+    assert not prefetcher.prefetch("b", slow, tenant="alice")
+    assert prefetcher.prefetch("c", slow, tenant="bob")
+    assert not prefetcher.prefetch("d", slow, tenant="carol")
+    assert not prefetcher.prefetch("a", slow, tenant="dave")  # Duplicate
+    release.set()
+    wait_idle(prefetcher)
+    assert prefetcher.stats().skipped_busy == 2
+
+    prefetcher._budget.set_level(0)
+    assert not prefetcher.prefetch("e", slow, tenant="erin")
+    assert prefetcher.stats().skipped_budget == 1
+
+
+def test_failed_prefetch_is_not_cached(prefetcher):
+    """Test that errors are retried by the click instead of being served."""
+    prefetcher._cacheable = lambda result: not result.startswith("Error")
+    prefetcher.prefetch("k", lambda: "Error processing with AI: 503", tenant="a")
+    wait_idle(prefetcher)
+
+    assert prefetcher.get_or_compute("k", lambda: "wisdom") == "wisdom"
+    stats = prefetcher.stats()
+    assert (stats.failed, stats.misses) == (1, 1)
+    assert prefetcher.get_or_compute("k", lambda: "other") == "wisdom"
+
+
+def test_unused_prefetch_counts_as_wasted():
+    """Test that evicting a result nobody asked for is counted as waste."""
+    instance = SpeculativePrefetcher(cache=ResultCache(max_entries=1))
+    try:
+        instance.prefetch("a", lambda: "one", tenant="alice")
+        wait_idle(instance)
+        instance.prefetch("b", lambda: "two", tenant="alice")
+        wait_idle(instance)
+    finally:
+        instance.shutdown()
+    assert instance.stats().wasted == 1
+
+
+def test_app_prefetches_at_batch_priority_and_reuses_result():
+    """Test the app wiring: prefetch on transcript, reuse on click."""
+    instance = SpeculativePrefetcher(
+        cacheable=lambda result: not result.startswith("Error")
+    )
+    with patch.object(prefetch, "_prefetcher", instance), patch.object(
+        app.Config, "SPECULATIVE_PREFETCH", True
+    ), patch("app.process_with_ai", return_value="## IDEAS\n- one") as process:
+        assert app.prefetch_wisdom("transcript", tenant="session")
+        wait_idle(instance)
+        assert app.extract_wisdom("transcript", tenant="session") == "## IDEAS\n- one"
+        assert "wisdom_prefetch_hit_rate 1\n" in render_prometheus()
+    instance.shutdown()
+
+    process.assert_called_once_with(
+        "transcript", priority=app.PRIORITY_BATCH, tenant="session"
+    )
+
+
+def test_main_prefetches_only_a_newly_fetched_transcript():
+    """Test that reruns showing the same transcript do not prefetch again."""
+    session_state = SessionState()
+    with patch.multiple(
+        "streamlit",
+        session_state=session_state,
+        text_input=MagicMock(return_value="https://youtu.be/dQw4w9WgXcQ"),
+        button=MagicMock(return_value=False),
+        spinner=MagicMock(),
+        title=MagicMock(),
+        write=MagicMock(),
+        markdown=MagicMock(),
+        text_area=MagicMock(),
+    ), patch.object(app.Config, "SPECULATIVE_PREFETCH", True), patch(
+        "app.get_transcript", return_value="transcript"
+    ), patch(
+        "app.prefetch_wisdom"
+    ) as prefetch_wisdom:
+        app.main()
+        app.main()
+    prefetch_wisdom.assert_called_once()
+
+
+def test_extract_wisdom_without_prefetch_calls_ai_directly():
+    """Test that the default configuration bypasses the cache."""
+    with patch("app.process_with_ai", return_value="wisdom") as process:
+        assert app.extract_wisdom("transcript", tenant="session") == "wisdom"
+        assert app.extract_wisdom("transcript", tenant="session") == "wisdom"
+    assert process.call_count == 2
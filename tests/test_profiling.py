@@ -0,0 +1,61 @@
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from loadtest.fake_upstream import FakeUpstream, UpstreamBehavior
+from loadtest.memory_profile import profile_pipeline
+from utils.error_handler import CircuitBreaker
+from utils.profiling import MemoryProfiler, format_stages
+
+
+def test_stage_reports_peak_and_retained_memory():
+    """Test that transient and kept allocations land in peak and retained."""
+    kept = []
+    with MemoryProfiler() as profiler:
+        with profiler.stage("transient"):
+            data = bytearray(2_000_000)
+            del data
+        with profiler.stage("kept"):
+            kept.append(bytearray(1_000_000))
+
+    transient, retained = profiler.stages
+    assert transient.peak_bytes >= 2_000_000
+    assert abs(transient.retained_bytes) < 100_000
+    assert retained.retained_bytes >= 1_000_000
+    assert "test_profiling.py" in retained.top_sites[0].location
+    assert "bytearray(1_000_000)" in retained.top_sites[0].line
+    assert not tracemalloc.is_tracing()
+    assert "kept" in format_stages(profiler.stages)
+
+
+def test_stage_requires_running_profiler():
+    """Test that stages cannot be measured once tracing has stopped."""
+    profiler = MemoryProfiler()
+    with pytest.raises(RuntimeError):
+        with profiler.stage("orphan"):
+            pass
+
+
+def test_profile_pipeline_measures_every_stage():
+    """Test that a long transcript's copies are attributed to their stages."""
+    behavior = UpstreamBehavior(transcript_minutes=30)
+    with FakeUpstream(behavior=behavior) as server, patch(
+        "app.TRANSCRIPT_API_URL", server.url
+    ), patch("app.OPENROUTER_API_URL", server.chat_completions_url), patch(
+        "app.get_circuit_breaker", side_effect=CircuitBreaker
+    ):
+        with MemoryProfiler() as profiler:
+            sizes = profile_pipeline("dQw4w9WgXcQ", profiler)
+
+    stages = {stage.stage: stage for stage in profiler.stages}
+    assert list(stages) == [
+        "transcript_fetch",
+        "transcript_format",
+        "ai_call",
+        "rendering",
+        "display",
+    ]
+    assert stages["transcript_fetch"].retained_bytes > sizes["transcript_chars"]
+    assert stages["display"].retained_bytes >= sizes["message_bytes"]
+    assert sizes["html_chars"] > 0
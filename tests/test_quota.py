@@ -0,0 +1,143 @@
+import tempfile
+import time
+import unittest
+
+from security.quota import QuotaManager
+
+
+class FakeClock:
+    """A manually advanced wall clock shared by simulated replicas."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQuotaManager(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = f"{self.temp_dir.name}/quota.db"
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_manager(self, db_path=None):
+        return QuotaManager(
+            capacity=3,
+            refill_per_hour=3600,  # One request per second
+            db_path=db_path,
+            sync_interval=3600,
+            clock=self.clock,
+        )
+
+    def test_limits_and_refills(self):
+        quotas = self.make_manager()
+
+        results = [quotas.check("alice").allowed for _ in range(4)]
+        denied = quotas.check("alice")
+
+        self.assertEqual(results, [True, True, True, False])
+        self.assertFalse(denied.allowed)
+        self.assertAlmostEqual(denied.retry_after, 1.0)
+        self.assertTrue(quotas.check("bob").allowed)
+
+        self.clock.now += 2
+        self.assertEqual(quotas.peek("alice").remaining, 2)
+        self.assertTrue(quotas.check("alice").allowed)
+
+    def test_limits_hold_across_replicas(self):
+        replica_a = self.make_manager(self.db_path)
+        replica_b = self.make_manager(self.db_path)
+
+        self.assertTrue(replica_a.check("alice").allowed)
+        self.assertTrue(replica_a.check("alice").allowed)
+        replica_a.sync()
+
+        # A replica seeing the identity for the first time loads the shared level.
+        self.assertTrue(replica_b.check("alice").allowed)
+        self.assertFalse(replica_b.check("alice").allowed)
+
+        replica_b.sync()
+        replica_a.sync()
+        self.assertEqual(replica_a.peek("alice").remaining, 0)
+        replica_a.close()
+        replica_b.close()
+
+    def test_concurrent_consumption_is_merged(self):
+        replica_a = self.make_manager(self.db_path)
+        replica_b = self.make_manager(self.db_path)
+        replica_a.peek("alice")
+        replica_b.peek("alice")
+
+        # Both replicas allow requests before either has synced ...
+        replica_a.check("alice")
+        replica_a.check("alice")
+        replica_b.check("alice")
+        replica_b.check("alice")
+        replica_a.sync()
+        replica_b.sync()
+        replica_a.sync()
+
+        # ... and the combined overdraft is carried as debt on both.
+        self.assertFalse(replica_a.check("alice").allowed)
+        self.assertFalse(replica_b.check("alice").allowed)
+        self.clock.now += 1
+        self.assertFalse(replica_a.check("alice").allowed)
+        self.clock.now += 1
+        self.assertTrue(replica_a.check("alice").allowed)
+
+    def test_sync_writes_only_identities_with_pending_consumption(self):
+        quotas = self.make_manager(self.db_path)
+        quotas.check("alice")
+        quotas.peek("bob")
+        quotas.sync()
+
+        rows = quotas._database.fetch_data("quota_buckets")
+        self.assertEqual([row["identity"] for row in rows], ["alice"])
+        quotas.close()
+
+    def test_idle_identities_are_evicted_and_reloaded(self):
+        quotas = self.make_manager(self.db_path)
+        quotas.check("alice")
+        quotas.sync()
+        quotas.sync()
+        self.assertNotIn("alice", quotas._buckets)
+
+        # The next check picks up the shared level again.
+        self.assertEqual(quotas.peek("alice").remaining, 2)
+        quotas.close()
+
+    def test_full_buckets_are_evicted_without_a_database(self):
+        quotas = QuotaManager(
+            capacity=3, refill_per_hour=2, sync_interval=3600, clock=self.clock
+        )
+        quotas.check("alice")
+        for _ in range(3):
+            quotas.check("bob")
+
+        self.clock.now += 3600
+        quotas.check("carol")
+
+        # Alice has refilled; Bob has not, and must keep his debt.
+        self.assertEqual(set(quotas._buckets), {"bob", "carol"})
+        self.assertEqual(quotas.peek("alice").remaining, 3)
+        self.assertEqual(quotas.peek("bob").remaining, 2)
+
+    def test_check_is_well_under_a_millisecond(self):
+        quotas = QuotaManager(capacity=1e9, db_path=self.db_path, sync_interval=0.01)
+        quotas.check("warm-up")
+
+        start = time.perf_counter()
+        for n in range(20000):
+            quotas.check(f"user-{n % 100}")
+        per_check = (time.perf_counter() - start) / 20000
+        quotas.close()
+
+        self.assertLess(per_check, 0.0002)
+
+
+if __name__ == "__main__":
+    unittest.main()
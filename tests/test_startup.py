@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import types
+from unittest.mock import patch
+
+import pytest
+
+import config.config
+from utils.lazy import lazy_imports
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds `import app` may take in a fresh interpreter, best of three runs.
+# Importing Streamlit, requests and the transcript API eagerly took ~0.5s.
+IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", 0.35))
+
+HEAVY_MODULES = [
+    "streamlit",
+    "requests",
+    "markdown",
+    "youtube_transcript_api",
+    "yt_dlp",
+    "openai",
+    "numpy",
+    "scipy",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def import_in_fresh_interpreter(module):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "module", ["app", "utils.io_utils", "utils.ai_processor", "utils.rendering"]
+)
+def test_import_does_not_load_heavy_dependencies(module):
+    """Test that heavy libraries are only imported on first use."""
+    loaded = set(import_in_fresh_interpreter(module)["modules"])
+    assert loaded.isdisjoint(HEAVY_MODULES)
+
+
+def test_app_import_within_budget():
+    """Test that importing the app stays within the startup budget."""
+    best = min(import_in_fresh_interpreter("app")["seconds"] for _ in range(3))
+    assert best < IMPORT_BUDGET, f"import app took {best:.3f}s"
+
+
+def test_lazy_imports_resolve_and_cache():
+    """Test that lazy names import on access and are then plain globals."""
+    module = types.ModuleType("lazy_example")
+    module.__getattr__, require = lazy_imports(
+        module.__dict__, {"jsonlib": "json", "dumps": "json:dumps"}
+    )
+
+    assert "dumps" not in module.__dict__
+    assert module.dumps is json.dumps
+    assert module.__dict__["dumps"] is json.dumps
+    require("jsonlib")
+    assert module.__dict__["jsonlib"] is json
+    with pytest.raises(AttributeError):
+        module.missing
+
+
+def test_lazy_names_can_be_patched():
+    """Test that patching a lazily imported name reaches the module's code."""
+    import app
+
+    with patch("app.TextFormatter") as formatter, patch(
+        "app._fetch_transcript_from_service", return_value=[]
+    ), patch("app.TRANSCRIPT_API_URL", "http://transcripts"):
+        formatter.return_value.format_transcript.return_value = "patched"
+        assert app.fetch_transcript("abc") == "patched"
+
+
+def test_load_env_reads_dotenv_once():
+    """Test that repeated load_env calls parse the .env file only once."""
+    with patch.object(config.config, "_env_loaded", False), patch(
+        "dotenv.load_dotenv"
+    ) as load_dotenv:
+        config.config.load_env()
+        config.config.load_env()
+    load_dotenv.assert_called_once()
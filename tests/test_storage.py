@@ -1,10 +1,14 @@
 import json
+import math
 import os
 import shutil
 import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
+from persistence import storage
+from persistence.storage import JsonlLog, StorageManager
+
 
 # Mock the storage module
 class MockStorage:
@@ -47,5 +51,102 @@ class TestStorage(unittest.TestCase):
         self.assertIsNone(loaded_insights)
 
 
+class TestStorageManagerJson(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "result.json")
+        self.data = {"video_id": "abc", "insights": ["ünïcode", "two"]}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_json_pretty_round_trip(self):
+        StorageManager.save_json(self.data, self.file_path)
+        with open(self.file_path, encoding="utf-8") as f:
+            self.assertIn("\n    ", f.read())
+        self.assertEqual(StorageManager.load_json(self.file_path), self.data)
+
+    def test_save_json_compact_round_trip(self):
+        StorageManager.save_json(self.data, self.file_path, compact=True)
+        with open(self.file_path, encoding="utf-8") as f:
+            self.assertNotIn("\n", f.read())
+        self.assertEqual(StorageManager.load_json(self.file_path), self.data)
+
+    def test_save_json_compact_without_fast_backend(self):
+        with patch.object(storage, "orjson", None):
+            StorageManager.save_json(self.data, self.file_path, compact=True)
+            self.assertEqual(StorageManager.load_json(self.file_path), self.data)
+
+    def test_load_json_accepts_non_finite_floats(self):
+        StorageManager.save_json({"x": float("nan"), "y": float("inf")}, self.file_path)
+        loaded = StorageManager.load_json(self.file_path)
+        self.assertTrue(math.isnan(loaded["x"]))
+        self.assertEqual(loaded["y"], float("inf"))
+
+    def test_save_json_compact_converts_int_keys(self):
+        StorageManager.save_json({1: "a", "b": {2: "c"}}, self.file_path, compact=True)
+        self.assertEqual(
+            StorageManager.load_json(self.file_path), {"1": "a", "b": {"2": "c"}}
+        )
+
+    def test_save_json_failure_keeps_previous_file(self):
+        StorageManager.save_json(self.data, self.file_path)
+        with self.assertRaises(TypeError):
+            StorageManager.save_json({"bad": object()}, self.file_path)
+        self.assertEqual(StorageManager.load_json(self.file_path), self.data)
+        self.assertEqual(os.listdir(self.temp_dir), ["result.json"])
+
+    def test_atomic_write_keeps_file_mode(self):
+        StorageManager.atomic_write(self.file_path, b"{}")
+        self.assertEqual(
+            os.stat(self.file_path).st_mode & 0o777, 0o666 & ~storage._UMASK
+        )
+
+        os.chmod(self.file_path, 0o640)
+        StorageManager.atomic_write(self.file_path, b"[]")
+        self.assertEqual(os.stat(self.file_path).st_mode & 0o777, 0o640)
+
+
+class TestJsonlLog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_append_and_random_read(self):
+        log = JsonlLog(self.file_path)
+        for n in range(5):
+            self.assertEqual(log.append({"n": n}), n)
+        log.extend([{"n": 5}, {"n": 6}])
+
+        self.assertEqual(len(log), 7)
+        self.assertEqual(log.read(3), {"n": 3})
+        self.assertEqual(log.read(-1), {"n": 6})
+        self.assertEqual([r["n"] for r in log], list(range(7)))
+
+    def test_reopen_uses_index(self):
+        log = JsonlLog(self.file_path)
+        log.extend([{"n": n} for n in range(3)])
+
+        reopened = JsonlLog(self.file_path)
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual(reopened.read(2), {"n": 2})
+
+    def test_recovers_from_torn_write_and_stale_index(self):
+        log = JsonlLog(self.file_path)
+        log.extend([{"n": n} for n in range(3)])
+        # Simulate a crash: an unindexed record plus a torn trailing line.
+        with open(self.file_path, "ab") as f:
+            f.write(b'{"n":3}\n{"n":')
+
+        reopened = JsonlLog(self.file_path)
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.read(3), {"n": 3})
+        self.assertEqual(reopened.append({"n": 4}), 4)
+        self.assertEqual(reopened.read(4), {"n": 4})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,132 @@
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import app
+from config.config import Config
+from utils.summarize import (
+    estimate_tokens,
+    presummarize,
+    split_passages,
+    textrank_scores,
+    textrank_summary,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_split_passages_handles_missing_punctuation(make_transcript):
+    """Test that passages are bounded with and without sentence punctuation."""
+    text = make_transcript(2000, vocabulary=8000)
+    for source in (text, text.replace(".", "")):
+        passages = split_passages(source, min_words=40, max_words=120)
+        sizes = [len(p.split()) for p in passages]
+        assert " ".join(passages).split() == source.split()
+        assert all(40 <= size <= 160 for size in sizes[:-1])
+
+
+def test_textrank_prefers_central_passages():
+    """Test that the passage resembling the others outranks the outlier."""
+    passages = [
+        "reading books builds knowledge and habits",
+        "good habits and reading books compound",
+        "books and habits shape knowledge",
+        "quantum chromodynamics gluon lattice",
+    ]
+    scores = textrank_scores(passages)
+
+    assert scores.sum() == pytest.approx(1.0)
+    assert scores.argmin() == 3
+
+
+def test_summary_fits_budget_and_is_deterministic(make_transcript):
+    """Test budget, ordering and determinism on a 3-hour transcript."""
+    text = make_transcript(27000, vocabulary=8000)
+    start = time.perf_counter()
+    summary = textrank_summary(text, token_budget=8000)
+    elapsed = time.perf_counter() - start
+
+    assert 7000 < estimate_tokens(summary) <= 8000
+    assert summary == textrank_summary(text, token_budget=8000)
+    # Passages are re-joined with single spaces, whatever the line breaks were.
+    flat = " ".join(text.split())
+    positions = [flat.find(passage) for passage in summary.split("\n")]
+    assert -1 not in positions and positions == sorted(positions)
+    # Typically under 0.15s; the bound leaves room for slow CI machines.
+    assert elapsed < 1.0
+
+
+def test_presummarize_modes(make_transcript):
+    """Test mode selection and that short texts pass through unchanged."""
+    text = make_transcript(3000, vocabulary=8000)
+
+    assert presummarize(text, mode="off", token_budget=10) == text
+    assert presummarize("short text", mode="textrank", token_budget=10) == "short text"
+    assert len(presummarize(text, mode="textrank", token_budget=500)) <= 2000
+    assert 0 < len(presummarize(text, mode="textrank", token_budget=5)) <= 20
+    with pytest.raises(ValueError):
+        presummarize(text, mode="abstractive")
+
+
+def test_textrank_summary_of_blank_text_is_empty():
+    """Test that whitespace over the budget yields no passages, not an error."""
+    assert textrank_summary(" " * 1000, 10) == ""
+    assert textrank_summary("\n\t " * 400, 10) == ""
+
+
+def test_unknown_mode_is_rejected_when_config_loads():
+    """Test that a misspelled PRESUMMARY_MODE stops the app from starting."""
+    result = subprocess.run(
+        [sys.executable, "-c", "import config.config"],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PRESUMMARY_MODE": "text-rank"},
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode != 0
+    assert "PRESUMMARY_MODE must be one of" in result.stderr
+
+
+def test_process_with_ai_sends_presummarized_text(make_transcript):
+    """Test that the selected mode shrinks what is posted to the AI."""
+    text = make_transcript(6000, vocabulary=8000)
+    with patch.object(Config, "PRESUMMARY_MODE", "textrank"), patch.object(
+        Config, "PRESUMMARY_TOKEN_BUDGET", 1000
+    ), patch("app._post_with_key_pool", return_value="wisdom") as post:
+        assert app.process_with_ai(text) == "wisdom"
+
+    sent = post.call_args.args[0]["messages"][1]["content"]
+    assert sent == textrank_summary(text, 1000)
+
+
+def test_process_with_ai_reports_unknown_mode_as_error():
+    """Test that a misconfigured mode is shown as an error, not raised."""
+    with patch.object(Config, "PRESUMMARY_MODE", "abstractive"), patch(
+        "app._post_with_key_pool"
+    ) as post:
+        result = app.process_with_ai("some transcript")
+
+    assert result.startswith("Error processing with AI: Unknown pre-summary mode")
+    post.assert_not_called()
+
+
+def test_extract_insights_sends_presummarized_text(make_transcript):
+    """Test that AIProcessor applies the selected mode too."""
+    from utils.ai_processor import AIProcessor
+
+    text = make_transcript(6000, vocabulary=8000)
+    with patch("openai.OpenAI") as client_class, patch.object(
+        Config, "PRESUMMARY_MODE", "textrank"
+    ), patch.object(Config, "PRESUMMARY_TOKEN_BUDGET", 1000):
+        create = client_class.return_value.chat.completions.create
+        create.return_value.choices = [MagicMock()]
+        create.return_value.choices[0].message.content = "- An insight"
+        _ = AIProcessor("key").extract_insights(text)
+
+    prompt = create.call_args.kwargs["messages"][1]["content"]
+    assert prompt.endswith(textrank_summary(text, 1000))
@@ -0,0 +1,182 @@
+import time
+import urllib.request
+
+import pytest
+
+from utils import tracing
+from utils.tracing import Histogram, MetricsRegistry, Sample
+
+
+@pytest.fixture
+def enabled():
+    """Fixture enabling tracing against an empty shared registry."""
+    tracing.registry.reset()
+    tracing.enable_tracing(True)
+    yield tracing.registry
+    tracing.enable_tracing(False)
+    tracing.registry.reset()
+
+
+def test_histogram_percentiles():
+    """Test that interpolated percentiles land close to the true values."""
+    histogram = Histogram()
+    for n in range(1, 1001):
+        histogram.observe(n / 1000)  # 1ms .. 1s, uniform
+
+    assert histogram.count == 1000
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.2)
+    assert histogram.percentile(95) == pytest.approx(0.95, rel=0.2)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.2)
+    assert histogram.percentile(100) == 1.0
+
+
+def test_span_records_stage_and_upstream(enabled):
+    """Test that spans feed per-stage histograms with their labels."""
+    with tracing.span("transcript_fetch", upstream="youtube"):
+        time.sleep(0.01)
+
+    histogram = enabled.histogram(
+        tracing.STAGE_METRIC, stage="transcript_fetch", upstream="youtube"
+    )
+    assert histogram.count == 1
+    assert histogram.sum >= 0.01
+    [row] = tracing.stage_summary()
+    assert row["stage"] == "transcript_fetch"
+    assert row["upstream"] == "youtube"
+    assert row["p99"] >= 0.01
+
+
+def test_span_counts_errors_and_tracks_parent(enabled):
+    """Test that failing spans are counted and nested spans know their parent."""
+    with pytest.raises(ValueError):
+        with tracing.span("pipeline"):
+            with tracing.span("parsing"):
+                raise ValueError("bad")
+
+    assert enabled.counter(tracing.ERROR_METRIC, stage="parsing") == 1
+    pipeline, parsing = tracing.recent_spans(2)  # newest first
+    assert (parsing.name, parsing.parent, parsing.error) == (
+        "parsing",
+        "pipeline",
+        True,
+    )
+    assert pipeline.parent is None
+
+
+def test_traced_decorator(enabled):
+    """Test that the decorator times calls under the given stage name."""
+
+    @tracing.traced("rendering")
+    def render(text):
+        return text.upper()
+
+    assert render("x") == "X"
+    assert enabled.histogram(tracing.STAGE_METRIC, stage="rendering").count == 1
+
+
+def test_disabled_tracing_is_cheap():
+    """Test that disabled spans record nothing and add negligible overhead."""
+    tracing.enable_tracing(False)
+    registry_size = len(tracing.stage_summary())
+
+    @tracing.traced("noop")
+    def noop():
+        return None
+
+    start = time.perf_counter()
+    for _ in range(100000):
+        with tracing.span("noop"):
+            pass
+        noop()
+    elapsed = time.perf_counter() - start
+
+    assert len(tracing.stage_summary()) == registry_size
+    # Well under a microsecond per span on any reasonable machine.
+    assert elapsed / 100000 < 5e-6
+
+
+def test_render_prometheus():
+    """Test the Prometheus text format for histograms, counters and collectors."""
+    registry = MetricsRegistry()
+    registry.observe("latency_seconds", 0.002, stage="ai_call")
+    registry.observe("latency_seconds", 0.5, stage="ai_call")
+    registry.increment("errors_total", stage='say "hi"')
+    registry.add_collector(lambda: [Sample("queue_depth", 3, help="Queued calls")])
+
+    text = registry.render_prometheus()
+
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="ai_call",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{stage="ai_call"} 2' in text
+    assert 'latency_seconds_sum{stage="ai_call"} 0.502' in text
+    assert 'errors_total{stage="say \\"hi\\""} 1' in text
+    assert (
+        "# HELP queue_depth Queued calls\n# TYPE queue_depth gauge\nqueue_depth 3"
+        in text
+    )
+    # Bucket counts are cumulative.
+    buckets = [
+        int(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith("latency_seconds_bucket")
+    ]
+    assert buckets == sorted(buckets)
+
+
+def test_render_prometheus_groups_samples_by_family():
+    """Test that each family's samples follow its only HELP and TYPE lines."""
+    registry = MetricsRegistry()
+    registry.increment("calls_total", upstream="a")
+    registry.add_collector(
+        lambda: [
+            Sample("queue_depth", 1, {"pool": "a"}, help="Queued calls"),
+            Sample("calls_total", 2, {"upstream": "b"}, kind="counter"),
+            Sample("queue_depth", 2, {"pool": "b"}, help="Queued calls"),
+        ]
+    )
+    registry.add_collector(lambda: [Sample("queue_depth", 3, {"pool": "c"})])
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert lines == [
+        "# TYPE calls_total counter",
+        'calls_total{upstream="a"} 1',
+        'calls_total{upstream="b"} 2',
+        "# HELP queue_depth Queued calls",
+        "# TYPE queue_depth gauge",
+        'queue_depth{pool="a"} 1',
+        'queue_depth{pool="b"} 2',
+        'queue_depth{pool="c"} 3',
+    ]
+
+
+def test_metrics_endpoint(enabled):
+    """Test that the local HTTP endpoint serves the shared registry."""
+    with tracing.span("url_parsing"):
+        pass
+    server = tracing.start_metrics_server(port=0)
+    try:
+        assert tracing.start_metrics_server(port=0) is server
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+    finally:
+        tracing.stop_metrics_server()
+
+    assert content_type.startswith("text/plain")
+    assert 'wisdom_stage_duration_seconds_count{stage="url_parsing"} 1' in body
+
+
+def test_default_collectors_export_breakers_and_scheduler():
+    """Test that breaker states and scheduler queues appear in the export."""
+    from utils.concurrency import get_ai_scheduler
+    from utils.error_handler import get_circuit_breaker
+
+    get_ai_scheduler()
+    get_circuit_breaker("collector-test")
+
+    text = tracing.render_prometheus()
+
+    assert 'wisdom_circuit_breaker_state{upstream="collector-test"} 0' in text
+    assert "wisdom_ai_in_flight 0" in text
@@ -1,7 +1,10 @@
 import unittest
 from unittest.mock import patch
 
+import requests
+
 from app import get_transcript
+from utils.error_handler import CircuitBreaker
 
 
 class TestTranscriptHandling(unittest.TestCase):
@@ -54,6 +57,38 @@ class TestTranscriptHandling(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertIn("Error getting transcript after 1 attempts", result)
 
+    @patch("app.time.sleep")
+    @patch("app.YouTubeTranscriptApi.get_transcript")
+    def test_open_breaker_fails_fast(self, mock_get_transcript, mock_sleep):
+        breaker = CircuitBreaker("youtube", minimum_calls=2)
+        mock_get_transcript.side_effect = requests.ConnectionError("unreachable")
+
+        with patch("app.get_circuit_breaker", return_value=breaker):
+            first = get_transcript("test_video_id", retries=3)
+            second = get_transcript("test_video_id", retries=3)
+
+        # The breaker opened after the first call's second attempt, so neither
+        # the third attempt nor the second call reached YouTube.
+        self.assertEqual(mock_get_transcript.call_count, 2)
+        self.assertTrue(first.startswith("Error getting transcript: youtube"))
+        self.assertTrue(second.startswith("Error getting transcript: youtube"))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    @patch("app.YouTubeTranscriptApi.get_transcript")
+    def test_rejected_request_is_not_retried(self, mock_get_transcript):
+        response = requests.Response()
+        response.status_code = 404
+        mock_get_transcript.side_effect = requests.HTTPError(
+            "404 Not Found", response=response
+        )
+
+        result = get_transcript("test_video_id", retries=3)
+
+        mock_get_transcript.assert_called_once()
+        self.assertEqual(
+            result, "Error getting transcript after 1 attempts: 404 Not Found"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,13 +1,52 @@
 import logging
-from typing import List, Optional
-
-from openai import OpenAI  # type: ignore
+from typing import List, Optional, Tuple
 
+from config.config import Config
 from data.models import Insight
+from utils.concurrency import PRIORITY_INTERACTIVE, get_ai_scheduler
+from utils.cpu_executor import get_cpu_executor
+from utils.error_handler import AIProcessingError, get_circuit_breaker
+from utils.summarize import presummarize
+from utils.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
 
+def parse_insight_rows(content: str) -> List[Tuple[str, float, str]]:
+    """
+    Parse bullet lines from an AI response into `(text, timestamp, category)`
+    tuples. Plain tuples keep the result cheap to ship back from a worker process.
+
+    Args:
+        content: Raw text content from the AI response.
+
+    Returns:
+        One tuple per bullet line.
+    """
+    rows = []
+    for line in content.split("\n"):
+        line = line.strip()
+        # Skip lines that don't start with a bullet point
+        if not line.startswith("-"):
+            continue
+
+        # Extract the insight text
+        insight_text = line[1:].strip()
+        if insight_text:
+            rows.append((insight_text, 0.0, "general"))  # Default timestamp/category
+    return rows
+
+
+def openai_base_url(endpoint: str) -> str:
+    """
+    Turn a chat completions endpoint such as `Config.OPENAI_API_URL` into the
+    base URL the OpenAI client expects.
+    """
+    endpoint = endpoint.rstrip("/")
+    suffix = "/chat/completions"
+    return endpoint[: -len(suffix)] if endpoint.endswith(suffix) else endpoint
+
+
 class AIProcessor:
     """A processor for extracting insights from video transcripts using AI."""
 
@@ -15,38 +54,64 @@ class AIProcessor:
         """
         Initialize the AIProcessor with an OpenAI API key.
 
+        Requests go to `Config.OPENAI_API_URL`, so the processor can be pointed at
+        a compatible provider or at `loadtest.fake_upstream`.
+
         Args:
             api_key: The OpenAI API key for authentication.
         """
-        self.client = OpenAI(api_key=api_key)
+        # The client library is slow to import; only processors need it.
+        from openai import OpenAI  # type: ignore
+
+        self.client = OpenAI(
+            api_key=api_key, base_url=openai_base_url(Config.OPENAI_API_URL)
+        )
 
     def extract_insights(
-        self, transcript: str, max_tokens: int = 1000
+        self,
+        transcript: str,
+        max_tokens: int = 1000,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
     ) -> List[Insight]:
         """
         Extract insights from a video transcript using OpenAI's API.
+
+        The API call goes through the shared AI scheduler; batch jobs should pass
+        `priority=PRIORITY_BATCH` so they never starve interactive users. It is
+        also guarded by the "openai" circuit breaker. Long transcripts are first
+        shrunk by the pre-summary mode set in `PRESUMMARY_MODE`.
+
+        Raises:
+            AIProcessingError: If the call fails or no insights can be parsed.
         """
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that extracts key insights from video transcripts.",
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Extract key insights from the following transcript:\n\n{transcript}",
-                    },
-                ],
-                max_tokens=max_tokens,
-            )
+            transcript = presummarize(transcript)
+            with span("ai_call", upstream="openai"):
+                response = get_circuit_breaker("openai").call(
+                    get_ai_scheduler().run,
+                    self.client.chat.completions.create,
+                    priority=priority,
+                    tenant=tenant,
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a helpful assistant that extracts key insights from video transcripts.",
+                        },
+                        {
+                            "role": "user",
+                            "content": f"Extract key insights from the following transcript:\n\n{transcript}",
+                        },
+                    ],
+                    max_tokens=max_tokens,
+                )
 
             # Force evaluation of the content (critical for mocks!)
             content = str(response.choices[0].message.content).strip()
 
-            logger.debug(f"Raw insights text: {content!r}")
-            print(f"DEBUG: Content to parse: {content!r}")
+            # Only a bounded preview; the full response can be very large.
+            logger.debug("Raw insights text (%d chars): %.200r", len(content), content)
 
             insights = self._parse_insights(content)
 
@@ -56,9 +121,10 @@ class AIProcessor:
             return insights
 
         except Exception as e:
-            logger.error(f"Error extracting insights: {e}")
-            raise RuntimeError(f"Failed to extract insights: {str(e)}") from e
+            logger.error("Error extracting insights: %s", e)
+            raise AIProcessingError(f"Failed to extract insights: {str(e)}") from e
 
+    @traced("parsing")
     def _parse_insights(self, content: str) -> List[Insight]:
         """
         Parse raw content from the AI response into structured Insight objects.
@@ -69,24 +135,8 @@ class AIProcessor:
         Returns:
             List of Insight objects parsed from the content.
         """
-        insights = []
-        # Split content by lines and filter out empty lines
-        lines = [line.strip() for line in content.split("\n") if line.strip()]
-
-        for line in lines:
-            # Skip lines that don't start with a bullet point
-            if not line.startswith("-"):
-                continue
-
-            # Extract the insight text
-            insight_text = line[1:].strip()
-            if insight_text:
-                insights.append(
-                    Insight(
-                        text=insight_text,
-                        timestamp=0.0,  # Default timestamp
-                        category="general",  # Default category
-                    )
-                )
-
-        return insights
+        rows = get_cpu_executor().run(parse_insight_rows, content)
+        return [
+            Insight(text=text, timestamp=timestamp, category=category)
+            for text, timestamp, category in rows
+        ]
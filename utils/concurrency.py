@@ -1,11 +1,159 @@
 import asyncio
 import concurrent.futures
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import logging
 import os
-from typing import Any, Callable, Optional
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from config.config import Config
+from utils.error_handler import DownloadIntegrityError
+
+logger = logging.getLogger(__name__)
 
 # Import yt_dlp if needed
 
 
+@dataclass
+class TaskResult:
+    """The outcome of one task from a batch, tagged with its input position."""
+
+    index: int
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def iter_task_results(
+    tasks: Iterable[Callable[[], Any]],
+    max_in_flight: int = 32,
+    timeout: Optional[float] = None,
+    cancel_event: Optional[threading.Event] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[TaskResult]:
+    """
+    Run callables on a thread pool and yield their results as they complete.
+
+    Tasks are pulled from `tasks` lazily and at most `max_in_flight` are submitted
+    at once, so very large inputs do not build up a backlog of futures. A failing
+    task does not stop the batch; its exception is returned in its `TaskResult`.
+
+    Args:
+        tasks: Callables taking no arguments. May be a lazy iterable.
+        max_in_flight: Maximum number of tasks submitted but not yet finished.
+        timeout: Per-task timeout in seconds, measured from submission. A timed-out
+            task gets a `TimeoutError`; its thread cannot be interrupted and runs to
+            completion in the background.
+        cancel_event: When set, no further tasks are started and unfinished tasks
+            are reported with `concurrent.futures.CancelledError`.
+        max_workers: Thread pool size. Defaults to `max_in_flight`.
+
+    Yields:
+        A `TaskResult` per task, in completion order.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers or max_in_flight
+    )
+    iterator = enumerate(tasks)
+    in_flight: dict[concurrent.futures.Future, tuple[int, float]] = {}
+    exhausted = False
+    try:
+        while True:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            while not exhausted and not cancelled and len(in_flight) < max_in_flight:
+                try:
+                    index, task = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                deadline = time.monotonic() + timeout if timeout else float("inf")
+                in_flight[executor.submit(task)] = (index, deadline)
+
+            if cancelled:
+                for future, (index, _) in sorted(in_flight.items(), key=lambda i: i[1]):
+                    _ = future.cancel()
+                    yield TaskResult(index, error=concurrent.futures.CancelledError())
+                in_flight.clear()
+                return
+            if not in_flight:
+                return
+
+            # Wake up for the next completion, the nearest deadline, or (when a
+            # cancel event is given) periodically to check for cancellation.
+            wait_for = min(deadline for _, deadline in in_flight.values())
+            wait_for = max(0.0, wait_for - time.monotonic())
+            if cancel_event is not None:
+                wait_for = min(wait_for, 0.05)
+            done, _ = concurrent.futures.wait(
+                in_flight,
+                timeout=None if wait_for == float("inf") else wait_for,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                index, _ = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield TaskResult(index, value=future.result())
+                else:
+                    yield TaskResult(index, error=error)
+
+            now = time.monotonic()
+            for future, (index, deadline) in list(in_flight.items()):
+                if deadline <= now:
+                    _ = future.cancel()
+                    del in_flight[future]
+                    yield TaskResult(
+                        index, error=TimeoutError(f"Task {index} timed out")
+                    )
+    finally:
+        for future in in_flight:
+            _ = future.cancel()
+        executor.shutdown(wait=False)
+
+
+def run_tasks_ordered(
+    tasks: Iterable[Callable[[], Any]],
+    max_in_flight: int = 32,
+    timeout: Optional[float] = None,
+    cancel_event: Optional[threading.Event] = None,
+    max_workers: Optional[int] = None,
+) -> list[TaskResult]:
+    """
+    Run callables on a thread pool and return their results in input order.
+
+    See `iter_task_results` for the meaning of the arguments. If the batch is
+    cancelled, tasks that were never started are not included.
+
+    Returns:
+        A list of `TaskResult`, where `results[i].index == i`.
+    """
+    results = iter_task_results(
+        tasks, max_in_flight, timeout, cancel_event, max_workers
+    )
+    return sorted(results, key=lambda result: result.index)
+
+
 def run_async_tasks(
     tasks: list[Callable[[], Any]], max_workers: Optional[int] = None
 ) -> list[Any]:
@@ -17,11 +165,126 @@ def run_async_tasks(
         max_workers: Maximum number of workers for the thread pool. If None, it uses the default.
 
     Returns:
-        A list of results from the tasks.
+        A list of results from the tasks, in the same order as `tasks`.
+
+    Raises:
+        The exception of the first task (by input position) that failed.
     """
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(task) for task in tasks]
-        return [future.result() for future in concurrent.futures.as_completed(futures)]
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    results = run_tasks_ordered(tasks, max_in_flight=workers, max_workers=workers)
+    for result in results:
+        if result.error is not None:
+            raise result.error
+    return [result.value for result in results]
+
+
+async def _run_with_timeout(
+    task: Union[Callable[[], Awaitable[Any]], Awaitable[Any]], timeout: Optional[float]
+) -> Any:
+    awaitable = task() if callable(task) and not inspect.isawaitable(task) else task
+    if timeout is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Task timed out after {timeout} seconds") from None
+
+
+async def aiter_task_results(
+    tasks: Iterable[Union[Callable[[], Awaitable[Any]], Awaitable[Any]]],
+    max_in_flight: int = 32,
+    timeout: Optional[float] = None,
+    cancel_event: Optional[asyncio.Event] = None,
+) -> AsyncIterator[TaskResult]:
+    """
+    Run awaitables with bounded concurrency and yield results as they complete.
+
+    The asyncio counterpart of `iter_task_results`. Passing coroutine functions
+    (or other zero-argument callables returning awaitables) instead of coroutine
+    objects means nothing is created until a slot is free.
+
+    Args:
+        tasks: Awaitables or zero-argument callables returning awaitables.
+        max_in_flight: Maximum number of tasks running at once.
+        timeout: Per-task timeout in seconds; the task is cancelled on expiry.
+        cancel_event: When set, running tasks are cancelled and no more are started.
+
+    Yields:
+        A `TaskResult` per task, in completion order.
+    """
+    iterator = enumerate(tasks)
+    in_flight: dict[asyncio.Future, int] = {}
+    exhausted = False
+    cancel_waiter = (
+        asyncio.ensure_future(cancel_event.wait()) if cancel_event is not None else None
+    )
+    try:
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                try:
+                    index, task = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[asyncio.ensure_future(_run_with_timeout(task, timeout))] = (
+                    index
+                )
+
+            if cancel_event is not None and cancel_event.is_set():
+                for future, index in sorted(in_flight.items(), key=lambda i: i[1]):
+                    _ = future.cancel()
+                    yield TaskResult(index, error=asyncio.CancelledError())
+                return
+            if not in_flight:
+                return
+
+            waiters = set(in_flight)
+            if cancel_waiter is not None:
+                waiters.add(cancel_waiter)
+            done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future is cancel_waiter:
+                    continue
+                index = in_flight.pop(future)
+                if future.cancelled():
+                    yield TaskResult(index, error=asyncio.CancelledError())
+                elif future.exception() is not None:
+                    yield TaskResult(index, error=future.exception())
+                else:
+                    yield TaskResult(index, value=future.result())
+    finally:
+        if cancel_waiter is not None:
+            _ = cancel_waiter.cancel()
+        for future in in_flight:
+            _ = future.cancel()
+        if in_flight:
+            _ = await asyncio.gather(*in_flight, return_exceptions=True)
+        in_flight.clear()
+
+
+async def run_asyncio_tasks_ordered(
+    tasks: Iterable[Union[Callable[[], Awaitable[Any]], Awaitable[Any]]],
+    max_in_flight: int = 32,
+    timeout: Optional[float] = None,
+    cancel_event: Optional[asyncio.Event] = None,
+) -> list[TaskResult]:
+    """
+    Run awaitables with bounded concurrency and return results in input order.
+
+    See `aiter_task_results` for the meaning of the arguments.
+
+    Returns:
+        A list of `TaskResult`, where `results[i].index == i`.
+    """
+    results = [
+        result
+        async for result in aiter_task_results(
+            tasks, max_in_flight, timeout, cancel_event
+        )
+    ]
+    return sorted(results, key=lambda result: result.index)
 
 
 async def run_asyncio_tasks(tasks: list[Any]) -> list[Any]:
@@ -50,31 +313,489 @@ async def run_concurrently(tasks: list[Any]) -> list[Any]:
     return await run_asyncio_tasks(tasks)
 
 
+def _filename_from_url(video_url: str) -> str:
+    name = os.path.basename(urllib.parse.urlparse(video_url).path)
+    return name or "video"
+
+
+def _total_from_content_range(header: Optional[str]) -> Optional[int]:
+    """Parse the total size from a `Content-Range: bytes a-b/total` header."""
+    if not header or "/" not in header:
+        return None
+    total = header.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+async def _probe_size(session: Any, video_url: str) -> tuple[Optional[int], bool]:
+    """Return the remote size and whether the server honours Range requests."""
+    async with session.get(video_url, headers={"Range": "bytes=0-0"}) as response:
+        response.raise_for_status()
+        if response.status == 206:
+            return (
+                _total_from_content_range(response.headers.get("Content-Range")),
+                True,
+            )
+        return response.content_length, False
+
+
+async def _download_stream(
+    session: Any, video_url: str, part_path: str, chunk_size: int
+) -> Optional[int]:
+    """
+    Download into `part_path`, resuming from its current size with a Range request.
+    Returns the total size reported by the server, if any.
+
+    A part file with a `.segments` sidecar was preallocated by a segmented
+    download, so its size says nothing about progress; it is discarded.
+    """
+    state_path = part_path + ".segments"
+    if os.path.exists(state_path):
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        os.remove(state_path)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    async with session.get(video_url, headers=headers) as response:
+        if response.status == 416:
+            # The part file already holds the whole body.
+            return _total_from_content_range(response.headers.get("Content-Range"))
+        response.raise_for_status()
+        if response.status == 206:
+            total = _total_from_content_range(response.headers.get("Content-Range"))
+            mode = "ab"
+        else:
+            # The server ignored the Range header: start over.
+            total = response.content_length
+            mode = "wb"
+        with open(part_path, mode) as f:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                f.write(chunk)
+        return total
+
+
+async def _download_segment(
+    session: Any,
+    video_url: str,
+    part_path: str,
+    segment: list[int],
+    chunk_size: int,
+) -> None:
+    """Download bytes `[start + written, end]` of a segment into `part_path`."""
+    start, end, written = segment
+    if start + written > end:
+        return
+    headers = {"Range": f"bytes={start + written}-{end}"}
+    async with session.get(video_url, headers=headers) as response:
+        response.raise_for_status()
+        if response.status != 206:
+            raise DownloadIntegrityError("Server stopped honouring Range requests")
+        with open(part_path, "r+b") as f:
+            f.seek(start + written)
+            async for chunk in response.content.iter_chunked(chunk_size):
+                f.write(chunk)
+                segment[2] += len(chunk)
+
+
+async def _download_segments(
+    session: Any,
+    video_url: str,
+    part_path: str,
+    total: int,
+    segments: int,
+    chunk_size: int,
+) -> None:
+    """
+    Download `total` bytes as parallel ranged segments. Progress is kept in a
+    `<part>.segments` sidecar so an interrupted download resumes per segment.
+
+    The sidecar is written before the part file is preallocated and removed
+    only once every segment is complete, so a part file with a sidecar is never
+    mistaken for a finished or sequential download, even after a crash.
+    """
+    state_path = part_path + ".segments"
+    plan = None
+    if os.path.exists(state_path) and os.path.exists(part_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("total") == total:
+            plan = saved["segments"]
+    if plan is None:
+        size = -(-total // segments)
+        plan = [
+            [start, min(start + size, total) - 1, 0] for start in range(0, total, size)
+        ]
+        _save_segment_plan(state_path, total, plan)
+        with open(part_path, "wb") as f:
+            f.truncate(total)
+
+    tasks = [
+        asyncio.ensure_future(
+            _download_segment(session, video_url, part_path, segment, chunk_size)
+        )
+        for segment in plan
+    ]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        failed = next((task for task in done if task.exception() is not None), None)
+        if failed is not None:
+            raise failed.exception()
+    finally:
+        # Stop the other segments before the caller retries into the same file.
+        for task in tasks:
+            _ = task.cancel()
+        _ = await asyncio.gather(*tasks, return_exceptions=True)
+        _save_segment_plan(state_path, total, plan)
+    os.remove(state_path)
+
+
+def _save_segment_plan(state_path: str, total: int, plan: list[list[int]]) -> None:
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"total": total, "segments": plan}, f)
+
+
+def _sha256_of(file_path: str, chunk_size: int) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 async def async_download_video(
-    video_url: str, output_path: str = "downloads"
+    video_url: str,
+    output_path: str = "downloads",
+    filename: Optional[str] = None,
+    chunk_size: int = 1024 * 1024,
+    segments: int = 1,
+    expected_size: Optional[int] = None,
+    expected_sha256: Optional[str] = None,
+    max_retries: int = 3,
 ) -> Optional[str]:
     """
-    Downloads a YouTube video asynchronously and returns the path to the downloaded file.
+    Downloads a video asynchronously and returns the path to the downloaded file.
+
+    The body is streamed to `<file>.part` in `chunk_size` pieces, so memory use does
+    not depend on the video size. If the transfer breaks, it is resumed with an
+    HTTP Range request, and a `.part` file left by an earlier run is resumed the
+    same way. With `segments > 1` and a server that supports ranges, the file is
+    fetched as that many parallel ranged segments. The file is only moved to its
+    final name once its size (and checksum, if given) has been verified.
 
     Args:
-        video_url: URL of the YouTube video to download.
+        video_url: URL of the video to download.
         output_path: Directory to save the downloaded video.
+        filename: Name of the saved file. Defaults to the last URL path component.
+        chunk_size: Size of each read from the network, in bytes.
+        segments: Number of parallel ranged segments for large files.
+        expected_size: Expected size in bytes, checked in addition to the size
+            reported by the server.
+        expected_sha256: Expected hex SHA-256 of the file.
+        max_retries: Number of resume attempts after a broken transfer.
 
     Returns:
-        Path to the downloaded video file, or None if download failed.
-    """
-    # Import aiohttp if needed
+        Path to the downloaded video file.
 
+    Raises:
+        DownloadIntegrityError: If the size or checksum does not match.
+    """
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
+    file_path = os.path.join(output_path, filename or _filename_from_url(video_url))
+    part_path = file_path + ".part"
+
     try:
         import aiohttp  # type: ignore
 
         async with aiohttp.ClientSession() as session:
-            async with session.get(video_url) as response:
-                content = await response.read()
-                return content
+            total = None
+            use_segments = False
+            if segments > 1:
+                total, ranges_supported = await _probe_size(session, video_url)
+                use_segments = (
+                    ranges_supported
+                    and total is not None
+                    and total >= segments * chunk_size
+                )
+
+            attempt = 0
+            while True:
+                try:
+                    if use_segments:
+                        await _download_segments(
+                            session, video_url, part_path, total, segments, chunk_size
+                        )
+                    else:
+                        total = await _download_stream(
+                            session, video_url, part_path, chunk_size
+                        )
+                        if total is not None and os.path.getsize(part_path) < total:
+                            # The server closed the stream early; resume it.
+                            raise aiohttp.ClientPayloadError("Response ended early")
+                    break
+                except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError):
+                    attempt += 1
+                    if attempt > max_retries:
+                        raise
+
+        size = os.path.getsize(part_path)
+        for expected in (total, expected_size):
+            if expected is not None and size != expected:
+                # A wrong-sized part file would fail every later resume too.
+                os.remove(part_path)
+                raise DownloadIntegrityError(
+                    f"Downloaded {size} bytes, expected {expected}"
+                )
+        if expected_sha256 is not None:
+            actual = _sha256_of(part_path, chunk_size)
+            if actual != expected_sha256.lower():
+                os.remove(part_path)
+                raise DownloadIntegrityError(
+                    f"Checksum mismatch: got {actual}, expected {expected_sha256}"
+                )
+        os.replace(part_path, file_path)
+        return file_path
     except Exception as e:
-        print(f"Error downloading video: {e}")
+        logger.error("Error downloading video: %s", e)
         raise
+
+
+# Scheduler priority classes; lower values are served first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+T = TypeVar("T")
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    virtual_finish: float
+    sequence: int
+    tenant: str = field(compare=False)
+    virtual_start: float = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    event: threading.Event = field(compare=False, default_factory=threading.Event)
+    cancelled: bool = field(compare=False, default=False)
+
+
+@dataclass
+class QueueTimeStats:
+    """Queue-time metrics for one priority class."""
+
+    admitted: int = 0
+    total_wait: float = 0.0  # Seconds
+    max_wait: float = 0.0  # Seconds
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.admitted if self.admitted else 0.0
+
+
+@dataclass
+class SchedulerStats:
+    """Snapshot of the scheduler's state and queue-time metrics."""
+
+    in_flight: int
+    max_concurrency: int
+    queued: dict[int, int]
+    queue_time: dict[int, QueueTimeStats]
+
+
+class FairScheduler:
+    """
+    Admission control for calls to a shared upstream quota.
+
+    At most `max_concurrency` calls run at once. Waiting calls are served by
+    strict priority class (interactive before batch), and within a class by
+    weighted fair queueing across tenants: each call gets a virtual finish time
+    of `max(class virtual time, tenant's last finish) + cost / weight`, and the
+    smallest finish time goes next, so a tenant flooding the queue only delays
+    itself.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Global cap on concurrently running calls.
+        """
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._heap: list[_Waiter] = []
+        self._in_flight = 0
+        self._sequence = itertools.count()
+        self._weights: dict[str, float] = {}
+        self._virtual_time: dict[int, float] = {}
+        self._last_finish: dict[tuple[int, str], float] = {}
+        self._queue_time: dict[int, QueueTimeStats] = {}
+
+    def set_weight(self, tenant: str, weight: float) -> None:
+        """
+        Set a tenant's share of capacity relative to other tenants (default 1.0).
+
+        Args:
+            tenant: Tenant or user identifier.
+            weight: Relative weight; must be positive.
+        """
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        with self._lock:
+            self._weights[tenant] = weight
+
+    def acquire(
+        self,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+        cost: float = 1.0,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Block until the caller may start a call.
+
+        Args:
+            priority: Priority class, e.g. `PRIORITY_INTERACTIVE` or `PRIORITY_BATCH`.
+            tenant: Tenant or user the call is charged to.
+            cost: Relative cost of the call, e.g. estimated tokens.
+            timeout: Maximum seconds to wait in the queue.
+
+        Raises:
+            TimeoutError: If no slot became free within `timeout`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            virtual_now = self._virtual_time.get(priority, 0.0)
+            start = max(virtual_now, self._last_finish.get((priority, tenant), 0.0))
+            finish = start + cost / self._weights.get(tenant, 1.0)
+            self._last_finish[(priority, tenant)] = finish
+            waiter = _Waiter(priority, finish, next(self._sequence), tenant, start, now)
+            if self._in_flight < self.max_concurrency and not self._heap:
+                self._admit(waiter)
+                return
+            heapq.heappush(self._heap, waiter)
+
+        try:
+            waiter.event.wait(timeout)
+        finally:
+            with self._lock:
+                admitted = waiter.event.is_set()
+                if not admitted:
+                    self._cancel(waiter)
+        if not admitted:
+            raise TimeoutError("Timed out waiting for a scheduler slot")
+
+    def release(self) -> None:
+        """Free a slot and hand it to the next waiting call, if any."""
+        with self._lock:
+            while self._heap:
+                waiter = heapq.heappop(self._heap)
+                if not waiter.cancelled:
+                    self._in_flight -= 1
+                    self._admit(waiter)
+                    return
+            self._in_flight -= 1
+
+    @contextmanager
+    def slot(
+        self,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+        cost: float = 1.0,
+        timeout: Optional[float] = None,
+    ) -> Iterator[None]:
+        """Context manager holding a slot for the duration of a call."""
+        self.acquire(priority, tenant, cost, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+        cost: float = 1.0,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Run `func(*args, **kwargs)` once a slot is available.
+
+        Returns:
+            The function's result.
+        """
+        with self.slot(priority, tenant, cost):
+            return func(*args, **kwargs)
+
+    def stats(self) -> SchedulerStats:
+        """
+        Return the number of running and queued calls and queue-time metrics.
+
+        Returns:
+            SchedulerStats: Current scheduler metrics.
+        """
+        with self._lock:
+            queued: dict[int, int] = {}
+            for waiter in self._heap:
+                if not waiter.cancelled:
+                    queued[waiter.priority] = queued.get(waiter.priority, 0) + 1
+            return SchedulerStats(
+                in_flight=self._in_flight,
+                max_concurrency=self.max_concurrency,
+                queued=queued,
+                queue_time={
+                    priority: QueueTimeStats(s.admitted, s.total_wait, s.max_wait)
+                    for priority, s in self._queue_time.items()
+                },
+            )
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        """
+        Withdraw a waiter that never got a slot, so the tenant is not charged
+        for it. Must be called with the lock held.
+        """
+        waiter.cancelled = True
+        charge = waiter.virtual_finish - waiter.virtual_start
+        key = (waiter.priority, waiter.tenant)
+        # Later calls of the tenant were queued behind this one; move them up.
+        for other in self._heap:
+            if (
+                not other.cancelled
+                and (other.priority, other.tenant) == key
+                and other.sequence > waiter.sequence
+            ):
+                other.virtual_start -= charge
+                other.virtual_finish -= charge
+        heapq.heapify(self._heap)
+        self._last_finish[key] -= charge
+
+    def _admit(self, waiter: _Waiter) -> None:
+        """Start a call. Must be called with the lock held."""
+        self._in_flight += 1
+        self._virtual_time[waiter.priority] = max(
+            self._virtual_time.get(waiter.priority, 0.0), waiter.virtual_start
+        )
+        wait = time.monotonic() - waiter.enqueued_at
+        stats = self._queue_time.setdefault(waiter.priority, QueueTimeStats())
+        stats.admitted += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        waiter.event.set()
+
+
+_ai_scheduler: Optional[FairScheduler] = None
+_ai_scheduler_lock = threading.Lock()
+
+
+def get_ai_scheduler() -> FairScheduler:
+    """
+    Return the process-wide scheduler that every AI call goes through, capped at
+    `AI_MAX_CONCURRENCY` concurrent calls.
+    """
+    global _ai_scheduler
+    with _ai_scheduler_lock:
+        if _ai_scheduler is None:
+            _ai_scheduler = FairScheduler(Config.AI_MAX_CONCURRENCY)
+        return _ai_scheduler
@@ -0,0 +1,170 @@
+import concurrent.futures
+import marshal
+import multiprocessing
+import pickle
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from config.config import Config
+
+MODES = ("inline", "thread", "process")
+
+_MARSHAL = b"m"
+_PICKLE = b"p"
+
+
+def _pack(value: Any) -> bytes:
+    """
+    Serialize a payload for a worker process. Plain data (str, numbers, lists,
+    tuples, dicts) goes through `marshal`, which is much cheaper than pickle for
+    large strings; anything else falls back to pickle.
+    """
+    try:
+        return _MARSHAL + marshal.dumps(value)
+    except ValueError:
+        return _PICKLE + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _unpack(payload: bytes) -> Any:
+    if payload[:1] == _MARSHAL:
+        return marshal.loads(payload[1:])
+    return pickle.loads(payload[1:])
+
+
+def _invoke_packed(func: Callable[..., Any], payload: bytes) -> bytes:
+    """Worker-side entry point: unpack arguments, call `func`, pack the result."""
+    return _pack(func(*_unpack(payload)))
+
+
+class CPUExecutor:
+    """
+    Runs CPU-bound post-processing stages (markdown rendering, insight parsing,
+    ...) either inline on the calling thread, on a thread pool, or on a process
+    pool that sidesteps the GIL.
+
+    Functions submitted in "process" mode must be importable module-level
+    functions, and should take and return plain data; arguments and results are
+    shipped as compact `marshal` payloads.
+    """
+
+    def __init__(self, mode: str = "inline", max_workers: Optional[int] = None):
+        """
+        Initialize the executor. Pools are created on first use.
+
+        Args:
+            mode: "inline", "thread" or "process".
+            max_workers: Pool size for the thread and process modes.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown CPU executor mode: {mode!r}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self._pool: Optional[concurrent.futures.Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "thread":
+                    self._pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="cpu"
+                    )
+                else:
+                    # Forking a process that runs Streamlit's threads is unsafe,
+                    # so workers are spawned fresh.
+                    self._pool = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+            return self._pool
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> concurrent.futures.Future:
+        """
+        Schedule `func(*args)`.
+
+        Args:
+            func: The stage function.
+            *args: Arguments for the stage function.
+
+        Returns:
+            A future resolving to the function's result.
+        """
+        if self.mode == "inline":
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self.mode == "thread":
+            return self._get_pool().submit(func, *args)
+
+        packed = self._get_pool().submit(_invoke_packed, func, _pack(args))
+        result: concurrent.futures.Future = concurrent.futures.Future()
+
+        def unpack(done: concurrent.futures.Future) -> None:
+            try:
+                result.set_result(_unpack(done.result()))
+            except Exception as e:
+                result.set_exception(e)
+
+        packed.add_done_callback(unpack)
+        return result
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `func(*args)` and wait for its result.
+
+        Args:
+            func: The stage function.
+            *args: Arguments for the stage function.
+
+        Returns:
+            The function's result.
+        """
+        return self.submit(func, *args).result()
+
+    def map(self, func: Callable[..., Any], items: Iterable[Any]) -> list[Any]:
+        """
+        Apply a single-argument stage function to many items concurrently.
+
+        Args:
+            func: The stage function.
+            items: One argument per call.
+
+        Returns:
+            The results, in the same order as `items`.
+        """
+        futures = [self.submit(func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def warm_up(self) -> None:
+        """Start pool workers ahead of time so the first real call is not slowed."""
+        if self.mode != "inline":
+            workers = self.max_workers or multiprocessing.cpu_count()
+            _ = self.map(abs, range(workers))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the underlying pool, if any."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+
+_default_executor: Optional[CPUExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_cpu_executor() -> CPUExecutor:
+    """
+    Return the shared executor configured by `CPU_EXECUTOR_MODE` and
+    `CPU_EXECUTOR_WORKERS`.
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = CPUExecutor(
+                Config.CPU_EXECUTOR_MODE, Config.CPU_EXECUTOR_WORKERS
+            )
+        return _default_executor
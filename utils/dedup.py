@@ -0,0 +1,272 @@
+import hashlib
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.config import Config
+from persistence.dedup_store import MinHashStore
+from utils.tracing import registry, span
+
+_WORD = re.compile(r"\w+")
+
+# Odd multipliers for combining word hashes into shingle hashes and for mixing
+# the result, so shingles hash the same in every process.
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_MIX_MULTIPLIER = np.uint64(0xBF58476D1CE4E5B9)
+
+# Shingles hashed at once; bounds the temporary (block x num_perm) matrix.
+_BLOCK = 2048
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """
+    Hash the overlapping `size`-word shingles of a text.
+
+    Words are lowercased and punctuation is ignored, so formatting differences
+    between transcripts of the same speech do not matter. Texts shorter than
+    `size` words form a single shingle.
+
+    Returns:
+        np.ndarray: The distinct 32-bit shingle hashes, sorted.
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint32)
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in words),
+        dtype=np.uint64,
+        count=len(words),
+    )
+    size = min(size, len(words))
+    combined = np.zeros(len(words) - size + 1, dtype=np.uint64)
+    for offset in range(size):
+        # uint64 arithmetic wraps around, which is what a hash wants.
+        combined = (
+            combined * _SHINGLE_MULTIPLIER + word_hashes[offset:][: len(combined)]
+        )
+    return np.unique((combined * _MIX_MULTIPLIER) >> np.uint64(32)).astype(np.uint32)
+
+
+class MinHasher:
+    """
+    Compute MinHash signatures of shingle sets.
+
+    Each of the `num_perm` hash functions is a multiply-shift hash with random
+    64-bit parameters drawn from `seed`, so signatures made with the same
+    parameters are comparable across processes. The share of positions where
+    two signatures agree estimates the Jaccard similarity of the sets.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        max_value = np.iinfo(np.uint64).max
+        self.num_perm = num_perm
+        self._a = rng.integers(1, max_value, size=num_perm, dtype=np.uint64) | 1
+        self._b = rng.integers(0, max_value, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Return the signature of a set of shingle hashes, as `num_perm` uint32
+        values. An empty set has a signature of all maximum values.
+        """
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint64)
+        values = hashes.astype(np.uint64)
+        for start in range(0, len(values), _BLOCK):
+            block = values[start : start + _BLOCK, None]
+            permuted = (block * self._a + self._b) >> np.uint64(32)
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two sets from their signatures."""
+    return float(np.mean(first == second))
+
+
+@dataclass
+class Match:
+    """A stored item similar to the one looked up."""
+
+    item_id: str
+    similarity: float  # Estimated Jaccard similarity of the shingle sets
+    payload: str
+
+
+class NearDuplicateIndex:
+    """
+    Find stored texts that are near-duplicates of a given text.
+
+    Texts are reduced to MinHash signatures, which are split into `bands`
+    bands. Two texts become candidates when any band matches exactly, which is
+    likely above a similarity of about `(1 / bands) ** (1 / rows)` and unlikely
+    below it, so a lookup only compares against a handful of candidates
+    instead of the whole corpus. Candidates are then kept if their estimated
+    similarity reaches `threshold`.
+
+    Items are added one by one as they are extracted; nothing is rebuilt.
+    """
+
+    def __init__(
+        self,
+        store: MinHashStore,
+        kind: str,
+        num_perm: int = 128,
+        bands: int = 16,
+        threshold: float = 0.8,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        """
+        Args:
+            store: Where signatures and buckets are kept.
+            kind: Name of this index within the store.
+            num_perm: Signature length; must be divisible by `bands`. Longer
+                signatures estimate similarity more precisely.
+            bands: LSH bands. More bands find less similar candidates.
+            threshold: Minimum estimated Jaccard similarity of a match.
+            shingle_size: Words per shingle; use fewer for short texts.
+            seed: Seed of the hash functions. Changing it, `num_perm` or
+                `shingle_size` makes stored signatures incomparable.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.store = store
+        self.kind = kind
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm, seed)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Return the signature of a text, or None if it has no words."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        return self.hasher.signature(hashes) if len(hashes) else None
+
+    def query(self, text: str, exclude: str = "") -> List[Match]:
+        """
+        Find stored near-duplicates of a text.
+
+        Args:
+            text: The text to look up.
+            exclude: Item id to leave out, e.g. the text's own.
+
+        Returns:
+            List[Match]: Matches at or above the threshold, most similar first.
+        """
+        signature = self.signature(text)
+        return [] if signature is None else self._query(signature, exclude)
+
+    def add(self, item_id: str, text: str, payload: str = "") -> None:
+        """Add or replace an item. Texts without words are not indexed."""
+        signature = self.signature(text)
+        if signature is not None:
+            self._add(item_id, signature, payload)
+
+    def remove_prefixed(self, prefix: str) -> None:
+        """
+        Remove every item, and alias, whose id starts with `prefix`. Aliases of
+        the removed items are added again, so the first of them takes its
+        canonical item's place.
+        """
+        for item_id, raw, payload in self.store.remove_prefixed(self.kind, prefix):
+            self._add_unique(item_id, np.frombuffer(raw, dtype="<u4"), payload)
+
+    def add_unique(self, item_id: str, text: str, payload: str = "") -> Optional[Match]:
+        """
+        Add an item unless a near-duplicate is stored already.
+
+        Returns:
+            Optional[Match]: The most similar stored item, which `item_id` is
+            recorded as an alias of, or None if the item was added.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        return self._add_unique(item_id, signature, payload)
+
+    def _buckets(self, signature: np.ndarray) -> List[int]:
+        buckets = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                band.to_bytes(2, "little") + rows.astype("<u4").tobytes(),
+                digest_size=8,
+            ).digest()
+            # SQLite integers are signed 64-bit.
+            buckets.append(int.from_bytes(digest, "little", signed=True))
+        return buckets
+
+    def _query(self, signature: np.ndarray, exclude: str) -> List[Match]:
+        with span("dedup_lookup", kind=self.kind):
+            candidates = self.store.candidates(self.kind, self._buckets(signature))
+            candidates.pop(exclude, None)
+            stored = self.store.items(self.kind, candidates)
+        matches = []
+        for item_id, (raw, payload) in stored.items():
+            score = similarity(signature, np.frombuffer(raw, dtype="<u4"))
+            if score >= self.threshold:
+                matches.append(Match(item_id, score, payload))
+        matches.sort(key=lambda match: (-match.similarity, match.item_id))
+        registry.increment(
+            "wisdom_dedup_lookups_total",
+            kind=self.kind,
+            outcome="duplicate" if matches else "unique",
+        )
+        return matches
+
+    def _add_unique(
+        self, item_id: str, signature: np.ndarray, payload: str
+    ) -> Optional[Match]:
+        matches = self._query(signature, exclude=item_id)
+        if matches:
+            self.store.add_alias(
+                self.kind,
+                item_id,
+                matches[0].item_id,
+                signature.astype("<u4").tobytes(),
+                payload,
+            )
+            return matches[0]
+        self._add(item_id, signature, payload)
+        return None
+
+    def _add(self, item_id: str, signature: np.ndarray, payload: str) -> None:
+        self.store.add(
+            self.kind,
+            item_id,
+            signature.astype("<u4").tobytes(),
+            self._buckets(signature),
+            payload,
+        )
+
+
+_store: Optional[MinHashStore] = None
+_indexes: Dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_duplicate_index(kind: str, shingle_size: int = 5) -> NearDuplicateIndex:
+    """
+    Return the process-wide near-duplicate index of a kind, stored at
+    `DEDUP_DB_PATH` and configured from the other `DEDUP_*` settings.
+    `shingle_size` only applies when the index is first created.
+    """
+    global _store
+    with _indexes_lock:
+        if kind not in _indexes:
+            if _store is None:
+                _store = MinHashStore(Config.DEDUP_DB_PATH)
+            _indexes[kind] = NearDuplicateIndex(
+                _store,
+                kind,
+                num_perm=Config.DEDUP_NUM_PERM,
+                bands=Config.DEDUP_BANDS,
+                threshold=Config.DEDUP_THRESHOLD,
+                shingle_size=shingle_size,
+            )
+        return _indexes[kind]
@@ -1,75 +1,504 @@
-class VideoNotFoundError(Exception):
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WisdomExtractorError(Exception):
+    """Base class for all errors raised by the Wisdom Extractor."""
+
+    pass
+
+
+class VideoNotFoundError(WisdomExtractorError):
     """Raised when a video is not found or cannot be accessed."""
 
     pass
 
 
-class TranscriptNotAvailableError(Exception):
+class TranscriptNotAvailableError(WisdomExtractorError):
     """Raised when a transcript is not available for a video."""
 
     pass
 
 
-class AIProcessingError(Exception):
+class AIProcessingError(WisdomExtractorError, RuntimeError):
     """Raised when there is an error during AI processing."""
 
     pass
 
 
-class InvalidVideoURLError(Exception):
+class InvalidVideoURLError(WisdomExtractorError):
     """Raised when the provided video URL is invalid."""
 
     pass
 
 
-class DatabaseConnectionError(Exception):
+class DatabaseConnectionError(WisdomExtractorError):
     """Raised when there is an error connecting to the database."""
 
     pass
 
 
-class StorageError(Exception):
+class StorageError(WisdomExtractorError):
     """Raised when there is an error during file storage operations."""
 
     pass
 
 
-class AuthenticationError(Exception):
+class AuthenticationError(WisdomExtractorError):
     """Raised when there is an error during authentication."""
 
     pass
 
 
-class ConfigurationError(Exception):
+class ConfigurationError(WisdomExtractorError):
     """Raised when there is an error in the configuration."""
 
     pass
 
 
-class APIKeyNotFoundError(Exception):
+class APIKeyNotFoundError(WisdomExtractorError):
     """Raised when an API key is not found or is invalid."""
 
     pass
 
 
-class ConcurrentTaskError(Exception):
+class ConcurrentTaskError(WisdomExtractorError):
     """Raised when there is an error during concurrent task execution."""
 
     pass
 
 
+class DownloadIntegrityError(WisdomExtractorError):
+    """Raised when a downloaded file does not match its expected size or checksum."""
+
+    pass
+
+
+class UpstreamError(WisdomExtractorError):
+    """
+    Raised when a call to an external service (YouTube, the AI provider) fails.
+
+    Attributes:
+        upstream (str): Name of the service that failed.
+        status_code (Optional[int]): HTTP status returned by the service, if any.
+        retryable (bool): Whether repeating the call may succeed. Only retryable
+            errors count against a circuit breaker.
+    """
+
+    retryable = True
+
+    def __init__(
+        self, message: str, upstream: str = "", status_code: Optional[int] = None
+    ):
+        super().__init__(message)
+        self.upstream = upstream
+        self.status_code = status_code
+
+
+class UpstreamTimeoutError(UpstreamError):
+    """Raised when an external service does not answer in time."""
+
+    pass
+
+
+class UpstreamUnavailableError(UpstreamError):
+    """Raised when an external service cannot be reached or returns a 5xx."""
+
+    pass
+
+
+class RateLimitedError(UpstreamError):
+    """Raised when an external service answers 429 Too Many Requests."""
+
+    pass
+
+
+class UpstreamRejectedError(UpstreamError):
+    """
+    Raised when an external service rejects the request itself (a 4xx other than
+    408/429). The service is healthy, so repeating the same call will not help.
+    """
+
+    retryable = False
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling the service while its circuit breaker is open."""
+
+    retryable = False
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(
+            f"{upstream} is temporarily unavailable; retry in {retry_after:.0f}s",
+            upstream=upstream,
+        )
+        self.retry_after = retry_after
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """Read an HTTP status from requests, openai and similar client exceptions."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _has_base_named(exc: BaseException, fragment: str) -> bool:
+    return any(fragment in cls.__name__ for cls in type(exc).__mro__)
+
+
+def classify_exception(exc: BaseException, upstream: str = "") -> BaseException:
+    """
+    Map a client library exception onto the upstream error taxonomy.
+
+    Errors that already belong to the taxonomy, and exceptions that cannot be
+    classified, are returned unchanged. The message of the original exception is
+    kept so that user-facing error strings do not change.
+
+    Args:
+        exc: The exception raised by the client library.
+        upstream: Name of the service that was called.
+
+    Returns:
+        The classified exception, or `exc` itself.
+    """
+    if isinstance(exc, WisdomExtractorError):
+        return exc
+    message = str(exc)
+    status = _status_code(exc)
+    if status is not None:
+        if status == 429:
+            return RateLimitedError(message, upstream, status)
+        if status == 408:
+            return UpstreamTimeoutError(message, upstream, status)
+        if status >= 500:
+            return UpstreamUnavailableError(message, upstream, status)
+        if status >= 400:
+            return UpstreamRejectedError(message, upstream, status)
+    # requests.Timeout and requests.ConnectionError are matched by name, so
+    # classifying errors does not import requests.
+    if isinstance(exc, TimeoutError) or _has_base_named(exc, "Timeout"):
+        return UpstreamTimeoutError(message, upstream)
+    if isinstance(exc, ConnectionError) or _has_base_named(exc, "ConnectionError"):
+        return UpstreamUnavailableError(message, upstream)
+    return exc
+
+
+def is_breaker_failure(exc: BaseException) -> bool:
+    """
+    Decide whether an exception says something about the health of a service.
+
+    Only timeouts, connection errors and 5xx responses count as failures. Rate
+    limiting, rejected requests, domain errors such as
+    `TranscriptNotAvailableError` and unclassified exceptions, e.g. the
+    transcript API's `VideoUnavailable` for a bad video id, are caused by the
+    request rather than the service, so they do not.
+    """
+    return isinstance(exc, (UpstreamTimeoutError, UpstreamUnavailableError))
+
+
+@dataclass
+class BreakerMetrics:
+    """A point-in-time snapshot of a circuit breaker."""
+
+    name: str
+    state: str
+    calls: int = 0
+    failures: int = 0
+    rejected: int = 0
+    window_calls: int = 0
+    window_failures: int = 0
+    transitions: Dict[str, int] = field(default_factory=dict)
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker guarding calls to one external service.
+
+    While CLOSED, calls go through and their outcomes are counted in a sliding
+    time window. Once the window holds at least `minimum_calls` outcomes and the
+    failure rate reaches `failure_rate_threshold`, the breaker trips to OPEN and
+    every call is rejected immediately with `CircuitOpenError`. After
+    `open_seconds` it moves to HALF_OPEN and lets `half_open_max_calls` probe
+    calls through: if they all succeed the breaker closes, and a single failure
+    opens it again. Outcomes of calls admitted before the latest transition
+    only count towards the totals, so a slow call admitted while CLOSED cannot
+    decide a HALF_OPEN probe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 10,
+        window_seconds: float = 60.0,
+        window_buckets: int = 10,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        is_failure: Callable[[BaseException], bool] = is_breaker_failure,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the breaker in the CLOSED state.
+
+        Args:
+            name (str): Name of the guarded service, used in errors and metrics.
+            failure_rate_threshold (float): Failure rate (0-1) that trips the breaker.
+            minimum_calls (int): Outcomes needed in the window before it can trip.
+            window_seconds (float): Length of the sliding window.
+            window_buckets (int): Number of buckets the window is divided into.
+            open_seconds (float): How long to reject calls before probing again.
+            half_open_max_calls (int): Probe calls allowed while HALF_OPEN.
+            is_failure (Callable): Decides whether an exception counts as a failure.
+            clock (Callable): Monotonic time source, injectable for tests.
+        """
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be in (0, 1]")
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = max(1, minimum_calls)
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.is_failure = is_failure
+        self._clock = clock
+        self._bucket_seconds = window_seconds / max(1, window_buckets)
+        # Each bucket is [bucket number, calls, failures].
+        self._buckets: List[List[float]] = [[-1, 0, 0] for _ in range(window_buckets)]
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        # Bumped on every transition; calls are tagged with it on admission.
+        self._generation = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._metrics = BreakerMetrics(name=name, state=self.CLOSED)
+        self._listeners: List[Callable[[str, str, str], None]] = []
+
+    @property
+    def state(self) -> str:
+        """The current state, moving OPEN to HALF_OPEN once the cool-down ends."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def add_listener(self, listener: Callable[[str, str, str], None]) -> None:
+        """
+        Register a callback invoked as `listener(name, old_state, new_state)` on
+        every state transition.
+        """
+        self._listeners.append(listener)
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Call `func` through the breaker.
+
+        Exceptions from `func` are classified with `classify_exception` before
+        being re-raised, so callers can catch the upstream error taxonomy.
+
+        Raises:
+            CircuitOpenError: If the breaker is open; `func` is not called.
+        """
+        admission = self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            classified = classify_exception(e, self.name)
+            self.record(self.is_failure(classified), admission)
+            if classified is e:
+                raise
+            raise classified from e
+        except BaseException:
+            self.record(None, admission)
+            raise
+        self.record(False, admission)
+        return result
+
+    def before_call(self) -> int:
+        """
+        Reserve permission for one call. Each successful `before_call` must be
+        followed by exactly one `record`.
+
+        Returns:
+            int: The admission, to pass to `record` with the call's outcome.
+
+        Raises:
+            CircuitOpenError: If the breaker is open or out of probe calls.
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == self.CLOSED:
+                return self._generation
+            if (
+                self._state == self.HALF_OPEN
+                and self._probes_in_flight < self.half_open_max_calls
+            ):
+                self._probes_in_flight += 1
+                return self._generation
+            self._metrics.rejected += 1
+            retry_after = max(0.0, self._opened_at + self.open_seconds - self._clock())
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, failure: Optional[bool], admission: int) -> None:
+        """
+        Record the outcome of a call admitted by `before_call`.
+
+        Args:
+            failure (Optional[bool]): True for a failure, False for a success, and
+                None when the call was abandoned without an outcome.
+            admission (int): The value `before_call` returned for the call.
+        """
+        with self._lock:
+            if failure is not None:
+                self._metrics.calls += 1
+                self._metrics.failures += int(failure)
+            if admission != self._generation:
+                # Admitted under an earlier state, which its outcome no longer
+                # describes.
+                return
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failure:
+                    self._transition(self.OPEN)
+                elif failure is False:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_max_calls:
+                        self._transition(self.CLOSED)
+                return
+            if self._state == self.CLOSED and failure is not None:
+                bucket = self._current_bucket()
+                bucket[1] += 1
+                bucket[2] += int(failure)
+                calls, failures = self._window_totals()
+                if (
+                    calls >= self.minimum_calls
+                    and failures / calls >= self.failure_rate_threshold
+                ):
+                    self._transition(self.OPEN)
+
+    def reset(self) -> None:
+        """Force the breaker back to CLOSED with an empty window."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def metrics(self) -> BreakerMetrics:
+        """Return a snapshot of the breaker's counters and transition counts."""
+        with self._lock:
+            self._refresh_state()
+            calls, failures = self._window_totals()
+            return BreakerMetrics(
+                name=self.name,
+                state=self._state,
+                calls=self._metrics.calls,
+                failures=self._metrics.failures,
+                rejected=self._metrics.rejected,
+                window_calls=calls,
+                window_failures=failures,
+                transitions=dict(self._metrics.transitions),
+            )
+
+    def _refresh_state(self) -> None:
+        if (
+            self._state == self.OPEN
+            and self._clock() >= self._opened_at + self.open_seconds
+        ):
+            self._transition(self.HALF_OPEN)
+
+    def _transition(self, new_state: str) -> None:
+        old_state = self._state
+        self._state = new_state
+        self._generation += 1
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if new_state == self.OPEN:
+            self._opened_at = self._clock()
+        if new_state == self.CLOSED:
+            for bucket in self._buckets:
+                bucket[:] = [-1, 0, 0]
+        key = f"{old_state}->{new_state}"
+        self._metrics.transitions[key] = self._metrics.transitions.get(key, 0) + 1
+        logger.warning(
+            "Circuit breaker %s changed from %s to %s", self.name, old_state, new_state
+        )
+        for listener in self._listeners:
+            try:
+                listener(self.name, old_state, new_state)
+            except Exception:
+                logger.exception("Circuit breaker listener failed")
+
+    def _current_bucket(self) -> List[float]:
+        number = int(self._clock() // self._bucket_seconds)
+        bucket = self._buckets[number % len(self._buckets)]
+        if bucket[0] != number:
+            bucket[:] = [number, 0, 0]
+        return bucket
+
+    def _window_totals(self) -> tuple[int, int]:
+        oldest = int(self._clock() // self._bucket_seconds) - len(self._buckets) + 1
+        calls = failures = 0
+        for number, bucket_calls, bucket_failures in self._buckets:
+            if number >= oldest:
+                calls += int(bucket_calls)
+                failures += int(bucket_failures)
+        return calls, failures
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Return the shared circuit breaker for an upstream service, creating it from
+    the `BREAKER_*` settings in `Config` on first use.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_rate_threshold=Config.BREAKER_FAILURE_RATE,
+                minimum_calls=Config.BREAKER_MINIMUM_CALLS,
+                window_seconds=Config.BREAKER_WINDOW_SECONDS,
+                open_seconds=Config.BREAKER_OPEN_SECONDS,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_metrics() -> List[BreakerMetrics]:
+    """Return metrics for every shared circuit breaker created so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.metrics() for breaker in breakers]
+
+
 def handle_errors(func):
     """
     Decorator to handle exceptions globally.
-    Logs the error and re-raises it for further handling.
+    Logs the error with its traceback and re-raises it for further handling.
     """
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            # Log the error here if logging is configured
-            print(f"An error occurred: {e}")
+            logger.exception("An error occurred in %s: %s", func.__qualname__, e)
             raise
 
     return wrapper
@@ -0,0 +1,288 @@
+import hashlib
+import re
+import threading
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.config import Config
+from persistence.chunk_store import ChunkResultStore
+from utils.concurrency import run_tasks_ordered
+from utils.tracing import registry, span
+
+_WORD = re.compile(r"\S+")
+_HEADING = re.compile(r"^(#{1,6})\s*(.+?)\s*:?\s*$")
+_LABEL = re.compile(r"^([A-Z][A-Z0-9 -]+):\s*$")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+
+# Average characters per word including the following space, used to turn a
+# target chunk size into a boundary probability.
+_CHARS_PER_WORD = 6
+
+
+@dataclass
+class Chunk:
+    """A slice `text[start:end]` of a transcript and the digest identifying it."""
+
+    index: int
+    start: int
+    end: int
+    digest: str
+    text: str
+
+
+def _digest(text: str) -> str:
+    # Whitespace-only edits, such as re-wrapped caption lines, keep the digest.
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def chunk_transcript(text: str, target_chars: int = 8000) -> List[Chunk]:
+    """
+    Split a transcript into content-defined chunks.
+
+    A chunk ends after a word when the hash of that word and the two before it
+    hits a fixed residue, so boundaries depend only on nearby text: editing a
+    caption changes the chunk it falls in, while chunks elsewhere keep their
+    boundaries and digests. Fixed-size chunks would instead shift every chunk
+    after the edit. Chunks are at least a quarter and at most four times
+    `target_chars` long, except the last, and together cover the whole text.
+
+    Args:
+        text: The transcript.
+        target_chars: Average chunk length to aim for.
+
+    Returns:
+        The chunks in order.
+    """
+    min_chars = target_chars // 4
+    max_chars = target_chars * 4
+    divisor = max(1, (target_chars - min_chars) // _CHARS_PER_WORD)
+    chunks: List[Chunk] = []
+    window: deque = deque(maxlen=3)
+    start = 0
+
+    def cut(end: int) -> None:
+        nonlocal start
+        piece = text[start:end]
+        chunks.append(Chunk(len(chunks), start, end, _digest(piece), piece))
+        start = end
+
+    for match in _WORD.finditer(text):
+        window.append(match.group())
+        size = match.end() - start
+        if size < min_chars:
+            continue
+        boundary = zlib.crc32(" ".join(window).encode("utf-8")) % divisor == 0
+        if boundary or size >= max_chars:
+            cut(match.end())
+    if text[start:].strip() or not chunks:
+        cut(len(text))
+    elif start < len(text):
+        # Trailing whitespace joins the last chunk; its digest ignores it.
+        last = chunks[-1]
+        last.end, last.text = len(text), text[last.start :]
+    return chunks
+
+
+def _parse_sections(markdown: str) -> List[Tuple[str, str, List[str], List[str]]]:
+    """
+    Split an extraction into (name, heading, bullets, paragraphs) per section.
+    Text before the first heading forms a leading section with an empty name
+    and heading.
+    """
+    sections: List[Tuple[str, str, List[str], List[str]]] = [("", "", [], [])]
+    paragraph: List[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            sections[-1][3].append(" ".join(paragraph))
+        paragraph.clear()
+
+    for line in markdown.splitlines():
+        heading = _HEADING.match(line) or _LABEL.match(line.strip())
+        if heading:
+            flush()
+            name = heading.groups()[-1].strip().rstrip(":").upper()
+            marker = heading.group(1) if heading.re is _HEADING else "#"
+            sections.append((name, f"{marker} {name}", [], []))
+            continue
+        bullet = _BULLET.match(line)
+        if bullet:
+            flush()
+            sections[-1][2].append(bullet.group(1).strip())
+        elif line.strip():
+            paragraph.append(line.strip())
+        else:
+            flush()
+    flush()
+    if not sections[0][2] and not sections[0][3]:
+        del sections[0]
+    return sections
+
+
+def _normalize(item: str) -> str:
+    return re.sub(r"[\W_]+", " ", item).strip().lower()
+
+
+def merge_sections(results: Sequence[str], max_items: int = 50) -> str:
+    """
+    Merge per-chunk extractions into one document without another AI call.
+
+    Sections appear in the order they are first seen. Bullets are taken from
+    the chunks round-robin, so every part of the video is represented when a
+    section is capped at `max_items`, and near-identical bullets are dropped.
+    Prose sections such as the summary keep each distinct paragraph, and text
+    before the first heading is kept at the top. Numbered items are merged as
+    bullets. A single result is returned unchanged.
+    """
+    if len(results) == 1:
+        return results[0]
+    merged: Dict[str, Tuple[str, List[List[str]], List[str]]] = {}
+    for result in results:
+        for name, heading, bullets, paragraphs in _parse_sections(result):
+            _, chunk_bullets, prose = merged.setdefault(name, (heading, [], []))
+            chunk_bullets.append(bullets)
+            prose.extend(p for p in paragraphs if p not in prose)
+
+    lines: List[str] = []
+    for heading, chunk_bullets, prose in merged.values():
+        if heading:
+            lines += [heading, ""]
+        for paragraph in prose:
+            lines += [paragraph, ""]
+        seen = set()
+        items: List[str] = []
+        for position in range(max((len(b) for b in chunk_bullets), default=0)):
+            for bullets in chunk_bullets:
+                if position < len(bullets) and len(items) < max_items:
+                    key = _normalize(bullets[position])
+                    if key and key not in seen:
+                        seen.add(key)
+                        items.append(bullets[position])
+        if items:
+            lines += [f"- {item}" for item in items] + [""]
+    return "\n".join(lines).strip() + "\n"
+
+
+@dataclass
+class IncrementalResult:
+    """The merged extraction and how much of it was reused."""
+
+    wisdom: str
+    chunks: int
+    reused: int  # Chunks whose stored result was used
+    processed: int  # Chunks sent to the AI
+    failed: int = 0
+
+    @property
+    def reused_fraction(self) -> float:
+        return self.reused / self.chunks if self.chunks else 0.0
+
+
+class IncrementalExtractor:
+    """
+    Extract wisdom chunk by chunk, reusing stored results for unchanged chunks.
+
+    A transcript is split with `chunk_transcript`. Chunks with a stored result
+    for the same prompt are reused, the others are extracted concurrently and
+    stored, and `reduce` merges all chunk results in order. When captions are
+    edited, only the chunks containing edits cost tokens.
+    """
+
+    def __init__(
+        self,
+        store: ChunkResultStore,
+        target_chars: int = 8000,
+        max_workers: int = 4,
+        reduce: Callable[[Sequence[str]], str] = merge_sections,
+        is_error: Callable[[str], bool] = lambda result: result.startswith("Error"),
+    ):
+        """
+        Args:
+            store: Where chunk results are kept.
+            target_chars: Average chunk length.
+            max_workers: Chunks extracted at once. The AI scheduler still caps
+                concurrent calls across the process.
+            reduce: Merges chunk results, in transcript order, into the output.
+            is_error: Whether a chunk result is an error message, which is
+                neither stored nor merged.
+        """
+        self.store = store
+        self.target_chars = target_chars
+        self.max_workers = max_workers
+        self.reduce = reduce
+        self.is_error = is_error
+
+    def extract(
+        self,
+        video_id: str,
+        transcript: str,
+        extract_chunk: Callable[[str], str],
+        prompt_key: str = "",
+    ) -> IncrementalResult:
+        """
+        Extract wisdom from a transcript, processing only chunks not seen before.
+
+        Args:
+            video_id: Video the transcript belongs to.
+            transcript: The transcript text.
+            extract_chunk: Runs the AI extraction on one chunk's text.
+            prompt_key: Identifies the prompt and model; results stored under a
+                different key are not reused.
+
+        Returns:
+            IncrementalResult: The merged output, or the first error message
+            when a chunk failed. Chunks that succeeded are stored either way,
+            so a retry only repeats the failed ones.
+        """
+        chunks = chunk_transcript(transcript, self.target_chars)
+        known = self.store.get_many((c.digest for c in chunks), prompt_key)
+        todo = list({c.digest: c for c in chunks if c.digest not in known}.values())
+        reused = sum(1 for c in chunks if c.digest in known)
+        results = run_tasks_ordered(
+            [lambda chunk=chunk: extract_chunk(chunk.text) for chunk in todo],
+            max_in_flight=self.max_workers,
+            max_workers=self.max_workers,
+        )
+        errors: List[str] = []
+        for chunk, outcome in zip(todo, results):
+            value = outcome.value if outcome.ok else f"Error: {outcome.error}"
+            if self.is_error(value):
+                errors.append(value)
+                continue
+            self.store.put(chunk.digest, prompt_key, value)
+            known[chunk.digest] = value
+
+        registry.increment("wisdom_incremental_chunks_total", reused, outcome="reused")
+        registry.increment(
+            "wisdom_incremental_chunks_total", len(todo), outcome="processed"
+        )
+        if errors:
+            return IncrementalResult(
+                errors[0], len(chunks), reused, len(todo), failed=len(errors)
+            )
+        self.store.set_video_chunks(video_id, [c.digest for c in chunks])
+        with span("reduce"):
+            wisdom = self.reduce([known[c.digest] for c in chunks])
+        return IncrementalResult(wisdom, len(chunks), reused, len(todo))
+
+
+_extractor: Optional[IncrementalExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_incremental_extractor() -> IncrementalExtractor:
+    """
+    Return the process-wide incremental extractor, storing chunk results at
+    `INCREMENTAL_DB_PATH` and chunking at `INCREMENTAL_CHUNK_CHARS`.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = IncrementalExtractor(
+                ChunkResultStore(Config.INCREMENTAL_DB_PATH),
+                target_chars=Config.INCREMENTAL_CHUNK_CHARS,
+                max_workers=Config.AI_MAX_CONCURRENCY,
+            )
+        return _extractor
@@ -1,9 +1,28 @@
+import logging
+import mmap
 import os
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
 
-import yt_dlp
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
+from persistence.blob_store import TranscriptStore
+from utils.lazy import lazy_imports
+
+if TYPE_CHECKING:
+    import yt_dlp
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from youtube_transcript_api.formatters import TextFormatter
+
+# yt_dlp alone takes longer to import than the rest of the app; callers that
+# only read files should not pay for it.
+__getattr__, _require = lazy_imports(
+    globals(),
+    {
+        "yt_dlp": "yt_dlp",
+        "YouTubeTranscriptApi": "youtube_transcript_api:YouTubeTranscriptApi",
+        "TextFormatter": "youtube_transcript_api.formatters:TextFormatter",
+    },
+)
+
+logger = logging.getLogger(__name__)
 
 
 def download_video(video_url: str, output_path: str = "downloads") -> Optional[str]:
@@ -26,13 +45,14 @@ def download_video(video_url: str, output_path: str = "downloads") -> Optional[s
         "quiet": True,
     }
 
+    _require("yt_dlp")
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info_dict = ydl.extract_info(video_url, download=True)
             video_path = ydl.prepare_filename(info_dict)
             return video_path
     except Exception as e:
-        print(f"Error downloading video: {e}")
+        logger.error("Error downloading video: %s", e)
         return None
 
 
@@ -46,13 +66,14 @@ def get_video_transcript(video_id: str) -> Optional[str]:
     Returns:
         Transcript text as a string, or None if fetching failed.
     """
+    _require("YouTubeTranscriptApi", "TextFormatter")
     try:
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
         formatter = TextFormatter()
         transcript_text = formatter.format_transcript(transcript)
         return transcript_text
     except Exception as e:
-        print(f"Error fetching transcript: {e}")
+        logger.error("Error fetching transcript: %s", e)
         return None
 
 
@@ -72,7 +93,7 @@ def save_transcript_to_file(transcript_text: str, file_path: str) -> bool:
             file.write(transcript_text)
         return True
     except Exception as e:
-        print(f"Error saving transcript to file: {e}")
+        logger.error("Error saving transcript to file: %s", e)
         return False
 
 
@@ -90,7 +111,7 @@ def read_file(file_path: str) -> Optional[str]:
         with open(file_path, "r", encoding="utf-8") as file:
             return file.read()
     except Exception as e:
-        print(f"Error reading file: {e}")
+        logger.error("Error reading file: %s", e)
         return None
 
 
@@ -116,18 +137,21 @@ def download_youtube_video(
         "quiet": True,
     }
 
+    _require("yt_dlp")
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info_dict = ydl.extract_info(video_url, download=True)
             video_path = ydl.prepare_filename(info_dict)
             return video_path
     except Exception as e:
-        print(f"Error downloading video: {e}")
+        logger.error("Error downloading video: %s", e)
         raise
 
 
 def download_transcript(
-    video_id: str, output_path: str = "transcripts"
+    video_id: str,
+    output_path: str = "transcripts",
+    store: Optional[TranscriptStore] = None,
 ) -> Optional[str]:
     """
     Downloads the transcript of a YouTube video and saves it to a file.
@@ -135,17 +159,27 @@ def download_transcript(
     Args:
         video_id: YouTube video ID.
         output_path: Directory to save the transcript file.
+        store: Optional compressed blob store. When given, the transcript is saved
+            there instead of as a flat `{video_id}.txt` file in `output_path`.
 
     Returns:
-        Path to the saved transcript file, or None if the operation failed.
+        Path to the saved transcript file (or blob), or None if the operation failed.
     """
-    if not os.path.exists(output_path):
+    if store is None and not os.path.exists(output_path):
         os.makedirs(output_path)
 
     transcript_text = get_video_transcript(video_id)
     if not transcript_text:
         return None
 
+    if store is not None:
+        try:
+            _ = store.put(video_id, transcript_text)
+            return store.path_for(video_id)
+        except Exception as e:
+            logger.error("Error saving transcript to store: %s", e)
+            return None
+
     file_path = os.path.join(output_path, f"{video_id}.txt")
     if save_transcript_to_file(transcript_text, file_path):
         return file_path
@@ -169,7 +203,7 @@ def save_to_file(file_path: str, content: str) -> bool:
             file.write(content)
         return True
     except Exception as e:
-        print(f"Error saving to file: {e}")
+        logger.error("Error saving to file: %s", e)
         return False
 
 
@@ -187,5 +221,166 @@ def read_from_file(file_path: str) -> Optional[str]:
         with open(file_path, "r", encoding="utf-8") as file:
             return file.read()
     except Exception as e:
-        print(f"Error reading from file: {e}")
+        logger.error("Error reading from file: %s", e)
         return None
+
+
+def _utf8_sequence_length(lead: int) -> int:
+    """Return the length of the UTF-8 sequence introduced by a lead byte."""
+    if lead < 0x80:
+        return 1
+    if lead >> 5 == 0b110:
+        return 2
+    if lead >> 4 == 0b1110:
+        return 3
+    return 4
+
+
+def _utf8_boundary(data: Any, end: int) -> int:
+    """
+    Move `end` back so that `data[:end]` never ends in a partial multi-byte
+    UTF-8 sequence.
+    """
+    end = min(end, len(data))
+    lead = end - 1
+    # Continuation bytes look like 0b10xxxxxx; a character spans at most 4 bytes.
+    while lead > 0 and end - lead < 4 and data[lead] & 0xC0 == 0x80:
+        lead -= 1
+    if lead >= 0 and lead + _utf8_sequence_length(data[lead]) > end:
+        return lead
+    return end
+
+
+def iter_lines(file_path: str) -> Iterator[str]:
+    """
+    Lazily yields the lines of a text file without their trailing newline.
+    Transcripts are written one caption segment per line, so this also yields
+    transcript segments.
+
+    Args:
+        file_path: Path to the file to read.
+
+    Yields:
+        Each line of the file.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            yield line.rstrip("\r\n")
+
+
+def iter_chunks(file_path: str, chunk_size: int = 1024 * 1024) -> Iterator[str]:
+    """
+    Lazily yields a file in chunks of at most `chunk_size` bytes, split only on
+    UTF-8 character boundaries so every chunk decodes on its own.
+
+    Args:
+        file_path: Path to the file to read.
+        chunk_size: Maximum size of each chunk in bytes (at least 4).
+
+    Yields:
+        Decoded text chunks in file order.
+    """
+    if chunk_size < 4:
+        raise ValueError("chunk_size must be at least 4 bytes")
+    with open(file_path, "rb") as file:
+        pending = b""
+        while True:
+            data = pending + file.read(chunk_size - len(pending))
+            if not data:
+                return
+            if len(data) < chunk_size:
+                yield data.decode("utf-8")
+                return
+            end = _utf8_boundary(data, len(data))
+            pending = data[end:]
+            yield data[:end].decode("utf-8")
+
+
+class MappedTextFile:
+    """
+    Random access to a large UTF-8 text file through a read-only memory map.
+
+    Only the pages actually touched are loaded, so slices and line scans over
+    multi-hundred-MB transcript dumps do not materialize the whole file.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Map a file into memory.
+
+        Args:
+            file_path: Path to the file to map.
+        """
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Zero-length files cannot be mapped.
+        self._map = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        )
+
+    def __enter__(self) -> "MappedTextFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Size of the file in bytes."""
+        return len(self._map)
+
+    def close(self) -> None:
+        """Release the memory map and the underlying file."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def read(self, offset: int, size: int) -> str:
+        """
+        Decode roughly `size` bytes starting near `offset`. Both ends are moved
+        back to the nearest UTF-8 character boundary.
+
+        Args:
+            offset: Byte offset to start from.
+            size: Number of bytes to read.
+
+        Returns:
+            The decoded text.
+        """
+        start = min(offset, len(self._map))
+        while 0 < start < len(self._map) and self._map[start] & 0xC0 == 0x80:
+            start -= 1
+        end = _utf8_boundary(self._map, offset + size)
+        return bytes(self._map[start:end]).decode("utf-8")
+
+    def find(self, text: str, start: int = 0) -> int:
+        """
+        Find the byte offset of `text`.
+
+        Args:
+            text: Text to search for.
+            start: Byte offset to start searching from.
+
+        Returns:
+            The byte offset of the first match, or -1 if not found.
+        """
+        return self._map.find(text.encode("utf-8"), start)
+
+    def iter_lines(self, start: int = 0) -> Iterator[str]:
+        """
+        Lazily yields lines from a byte offset onwards.
+
+        Args:
+            start: Byte offset to start from; should be the start of a line.
+
+        Yields:
+            Each line without its trailing newline.
+        """
+        position = start
+        size = len(self._map)
+        while position < size:
+            end = self._map.find(b"\n", position)
+            if end == -1:
+                end = size
+            yield bytes(self._map[position:end]).decode("utf-8").rstrip("\r")
+            position = end + 1
@@ -0,0 +1,346 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from config.config import Config
+from data.schemas import VideoInsights
+from persistence.keyword_store import KeywordStore
+from utils.summarize import textrank_summary
+from utils.tracing import span
+
+_WORD = re.compile(r"[a-z][a-z'-]*[a-z]|[a-z]")
+
+# Function words and filler common in spoken transcripts; they never make
+# useful keywords and would otherwise dominate short texts.
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are aren't as at be
+    because been before being below between both but by can can't cannot could
+    couldn't did didn't do does doesn't doing don't down during each even every
+    few for from further get gets getting go goes going gonna got had hadn't has
+    hasn't have haven't having he he'd he'll he's her here here's hers herself
+    him himself his how how's i i'd i'll i'm i've if in into is isn't it it's its
+    itself just know kind let's like lot maybe me mean more most much mustn't my
+    myself no nor not now of off oh ok okay on once one only or other ought our
+    ours ourselves out over own really right said same say says see shan't she
+    she'd she'll she's should shouldn't so some something such sure than that
+    that's the their theirs them themselves then there there's these they they'd
+    they'll they're they've thing things think this those though through to too
+    um uh under until up us very want was wasn't way we we'd we'll we're we've
+    well were weren't what what's when when's where where's which while who
+    who's whom why why's will with won't would wouldn't yeah yes you you'd
+    you'll you're you've your yours yourself yourselves
+    """.split())
+
+
+def extract_terms(text: str, bigrams: bool = True) -> List[str]:
+    """
+    Return the candidate keywords of a text, in order and with repeats.
+
+    Candidates are lowercased words of at least three letters that are not
+    stopwords and, with `bigrams`, pairs of adjacent such words, e.g.
+    "compound interest".
+    """
+    terms: List[str] = []
+    previous: Optional[str] = None
+    for word in _WORD.findall(text.lower()):
+        if len(word) < 3 or word in STOPWORDS:
+            previous = None
+            continue
+        terms.append(word)
+        if bigrams and previous is not None:
+            terms.append(f"{previous} {word}")
+        previous = word
+    return terms
+
+
+def count_matrix(
+    documents: Sequence[Sequence[str]],
+) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    Build the term count matrix of several documents at once.
+
+    Returns:
+        The (documents x terms) CSR matrix of counts and the vocabulary, sorted
+        so that column order is alphabetical.
+    """
+    vocabulary = sorted({term for terms in documents for term in terms})
+    column = {term: index for index, term in enumerate(vocabulary)}
+    indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(terms) for terms in documents])
+    indices = np.fromiter(
+        (column[term] for terms in documents for term in terms),
+        dtype=np.int64,
+        count=int(indptr[-1]),
+    )
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float64), indices, indptr),
+        shape=(len(documents), len(vocabulary)),
+    )
+    counts.sum_duplicates()
+    return counts, vocabulary
+
+
+def tfidf(counts: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+    """Weight counts by sublinear term frequency and `idf`, then L2-normalize rows."""
+    weights = counts.astype(np.float64, copy=True)
+    weights.data = (1 + np.log(weights.data)) * idf[weights.indices]
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    weights.data /= np.repeat(np.where(norms > 0, norms, 1), np.diff(weights.indptr))
+    return weights
+
+
+def _top_terms(
+    weights: np.ndarray, columns: np.ndarray, vocabulary: List[str], top_k: int
+) -> List[str]:
+    """Pick the highest-weighted terms, skipping terms whose words are all taken."""
+    # Highest weight first; ties go to the alphabetically first term.
+    order = np.lexsort((columns, -weights))
+    chosen: List[str] = []
+    covered: set = set()
+    for position in order:
+        term = vocabulary[columns[position]]
+        words = term.split()
+        if all(word in covered for word in words):
+            continue
+        chosen.append(term)
+        covered.update(words)
+        if len(chosen) == top_k:
+            break
+    return chosen
+
+
+class KeywordExtractor:
+    """
+    Extract keywords locally by TF-IDF against the corpus of processed videos.
+
+    Document frequencies come from a `KeywordStore` and are updated with each
+    batch, so a term common to many videos ("podcast", "episode") ranks below
+    terms specific to the video at hand, and the ranking sharpens as the
+    corpus grows. Batches are vectorized as one sparse matrix.
+    """
+
+    def __init__(self, store: KeywordStore, top_k: int = 10, bigrams: bool = True):
+        """
+        Args:
+            store: Where document frequencies are kept.
+            top_k: Keywords returned per document.
+            bigrams: Consider pairs of adjacent words as well as single words.
+        """
+        self.store = store
+        self.top_k = top_k
+        self.bigrams = bigrams
+
+    def extract_batch(
+        self, documents: Mapping[str, str], update: bool = True
+    ) -> Dict[str, List[str]]:
+        """
+        Extract keywords from several documents at once.
+
+        Args:
+            documents: Document text by id, e.g. transcripts by video id.
+            update: Add the documents to the corpus counts first. Pass False to
+                score documents without recording them.
+
+        Returns:
+            Dict[str, List[str]]: Keywords by document id, best first.
+        """
+        ids = list(documents)
+        with span("keywords"):
+            terms = [extract_terms(documents[doc_id], self.bigrams) for doc_id in ids]
+            if update:
+                self.store.add_documents(dict(zip(ids, terms)))
+            counts, vocabulary = count_matrix(terms)
+            frequencies = self.store.document_frequencies(vocabulary)
+            total = max(self.store.document_count(), len(ids))
+            df = np.array(
+                [frequencies.get(term, 0) for term in vocabulary], dtype=float
+            )
+            weights = tfidf(counts, np.log((1 + total) / (1 + df)) + 1)
+
+            keywords = {}
+            for row, doc_id in enumerate(ids):
+                start, end = weights.indptr[row], weights.indptr[row + 1]
+                keywords[doc_id] = _top_terms(
+                    weights.data[start:end],
+                    weights.indices[start:end],
+                    vocabulary,
+                    self.top_k,
+                )
+        return keywords
+
+    def extract(self, doc_id: str, text: str, update: bool = True) -> List[str]:
+        """Extract the keywords of one document; see `extract_batch`."""
+        return self.extract_batch({doc_id: text}, update)[doc_id]
+
+
+@dataclass
+class Topic:
+    """A cluster of insights about the same subject."""
+
+    terms: List[str]  # Highest-weighted terms of the cluster centre
+    size: int  # Insights in the cluster
+    examples: List[str] = field(default_factory=list)  # Most central insights
+    videos: int = 0  # Distinct videos contributing insights
+
+
+def cluster_topics(
+    texts: Sequence[str],
+    n_topics: int = 8,
+    top_terms: int = 5,
+    examples: int = 3,
+    seed: int = 0,
+    max_iter: int = 50,
+) -> Tuple[List[Topic], np.ndarray]:
+    """
+    Group short texts such as insights into topics with spherical k-means.
+
+    Texts become TF-IDF vectors over their own collection, and clusters are
+    found by cosine similarity, starting from a k-means++ seeding drawn from
+    `seed`, so the same input always gives the same topics.
+
+    Returns:
+        The topics, largest first, and the index of each text's topic in
+        that list.
+    """
+    if not texts:
+        return [], np.empty(0, dtype=np.int64)
+    counts, vocabulary = count_matrix([extract_terms(text) for text in texts])
+    df = np.bincount(counts.indices, minlength=len(vocabulary))
+    vectors = tfidf(counts, np.log((1 + len(texts)) / (1 + df)) + 1)
+    k = max(1, min(n_topics, len(texts)))
+
+    with span("topic_clustering"):
+        centers = _seed_centers(vectors, k, np.random.default_rng(seed))
+        labels = np.full(len(texts), -1)
+        for _ in range(max_iter):
+            similarities = np.asarray(vectors @ centers.T)
+            updated = similarities.argmax(axis=1)
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+            membership = sparse.csr_matrix(
+                (np.ones(len(texts)), (labels, np.arange(len(texts)))),
+                shape=(k, len(texts)),
+            )
+            sums = np.asarray((membership @ vectors).todense())
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # A cluster that lost all its members keeps its previous centre.
+            centers = np.where(norms > 0, sums / np.where(norms > 0, norms, 1), centers)
+
+    sizes = np.bincount(labels, minlength=k)
+    order = np.lexsort((np.arange(k), -sizes))
+    topics = []
+    for cluster in order:
+        members = np.flatnonzero(labels == cluster)
+        if not len(members):
+            continue
+        centre = centers[cluster]
+        term_order = np.lexsort((np.arange(len(centre)), -centre))[:top_terms]
+        closest = members[np.argsort(-similarities[members, cluster], kind="stable")]
+        topics.append(
+            Topic(
+                terms=[vocabulary[i] for i in term_order if centre[i] > 0],
+                size=len(members),
+                examples=[texts[i] for i in closest[:examples]],
+            )
+        )
+    remap = np.full(k, -1)
+    remap[[cluster for cluster in order if sizes[cluster]]] = np.arange(len(topics))
+    return topics, remap[labels]
+
+
+def _seed_centers(
+    vectors: sparse.csr_matrix, k: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Pick `k` rows as initial centres with k-means++ seeding."""
+    n = vectors.shape[0]
+    chosen = [int(rng.integers(n))]
+    distance = 1 - np.asarray(vectors @ vectors[chosen[0]].T.todense()).ravel()
+    for _ in range(1, k):
+        weights = np.clip(distance, 0, None)
+        total = weights.sum()
+        candidate = (
+            int(rng.choice(n, p=weights / total)) if total > 0 else int(rng.integers(n))
+        )
+        chosen.append(candidate)
+        similarity = np.asarray(vectors @ vectors[candidate].T.todense()).ravel()
+        distance = np.minimum(distance, 1 - similarity)
+    return np.asarray(vectors[chosen].todense())
+
+
+def insight_topics(store: KeywordStore, n_topics: int = 8) -> List[Topic]:
+    """Cluster the insights of every stored video into topics."""
+    video_ids, texts = [], []
+    for video_id, text in store.iter_insights():
+        video_ids.append(video_id)
+        texts.append(text)
+    topics, labels = cluster_topics(texts, n_topics)
+    for index, topic in enumerate(topics):
+        topic.videos = len({video_ids[i] for i in np.flatnonzero(labels == index)})
+    return topics
+
+
+def fill_video_insights(
+    video: VideoInsights,
+    transcript: str,
+    extractor: Optional[KeywordExtractor] = None,
+    summary_tokens: int = 200,
+) -> VideoInsights:
+    """
+    Fill the `keywords` and `summary` of a `VideoInsights` locally, without
+    an AI call. Fields that are already set are kept.
+
+    Args:
+        video: The extraction result.
+        transcript: The video's transcript.
+        extractor: Keyword extractor; defaults to `get_keyword_extractor()`.
+        summary_tokens: Approximate length of the extractive summary.
+
+    Returns:
+        VideoInsights: A copy with the missing fields filled.
+    """
+    update: Dict[str, object] = {}
+    if video.keywords is None:
+        extractor = extractor or get_keyword_extractor()
+        update["keywords"] = extractor.extract(
+            video.video_metadata.video_id, transcript
+        )
+    if video.summary is None:
+        update["summary"] = textrank_summary(transcript, summary_tokens)
+    return video.model_copy(update=update)
+
+
+def iter_keyword_batches(
+    documents: Iterable[Tuple[str, str]], extractor: KeywordExtractor, size: int = 64
+) -> Iterable[Dict[str, List[str]]]:
+    """Extract keywords from a stream of `(doc_id, text)` pairs, `size` at a time."""
+    batch: Dict[str, str] = {}
+    for doc_id, text in documents:
+        batch[doc_id] = text
+        if len(batch) == size:
+            yield extractor.extract_batch(batch)
+            batch = {}
+    if batch:
+        yield extractor.extract_batch(batch)
+
+
+_extractor: Optional[KeywordExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_keyword_extractor() -> KeywordExtractor:
+    """
+    Return the process-wide keyword extractor, counting document frequencies
+    in `KEYWORDS_DB_PATH` and returning `KEYWORDS_TOP_K` keywords.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = KeywordExtractor(
+                KeywordStore(Config.KEYWORDS_DB_PATH), top_k=Config.KEYWORDS_TOP_K
+            )
+        return _extractor
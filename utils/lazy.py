@@ -0,0 +1,58 @@
+import importlib
+from typing import Any, Callable, Dict, MutableMapping, Tuple
+
+
+def lazy_imports(
+    module_globals: MutableMapping[str, Any], imports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[..., None]]:
+    """
+    Defer a module's heavy imports until a name is first used.
+
+    `imports` maps a module-level name to what it stands for: `"package.module"`
+    for `import package.module as name`, or `"package.module:attr"` for
+    `from package.module import attr`. Once imported, a name is stored in the
+    module's globals, so it behaves like a top-level import from then on and
+    can be patched with `unittest.mock.patch("module.name")` as before.
+
+    Example:
+        __getattr__, _require = lazy_imports(
+            globals(), {"requests": "requests", "TextFormatter": "pkg.fmt:TextFormatter"}
+        )
+
+        def fetch():
+            _require("requests")
+            return requests.get(...)
+
+    Args:
+        module_globals: The `globals()` of the module declaring the names.
+        imports: Lazily imported names and their sources.
+
+    Returns:
+        A `__getattr__` to assign at module level, which resolves the names for
+        other modules (PEP 562), and a `require(*names)` function the module's
+        own functions call before using the names, since global lookups inside
+        a module bypass its `__getattr__`.
+    """
+
+    def load(name: str) -> Any:
+        if name in module_globals:
+            return module_globals[name]
+        try:
+            source = imports[name]
+        except KeyError:
+            raise AttributeError(
+                f"module {module_globals.get('__name__')!r} has no attribute {name!r}"
+            ) from None
+        module_name, _, attr = source.partition(":")
+        value = importlib.import_module(module_name)
+        if attr:
+            value = getattr(value, attr)
+        module_globals[name] = value
+        return value
+
+    def require(*names: str) -> None:
+        for name in names:
+            if name not in module_globals:
+                load(name)
+
+    return load, require
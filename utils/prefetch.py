@@ -0,0 +1,288 @@
+import concurrent.futures
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from config.config import Config
+from security.auth import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def cache_key(*parts: str) -> str:
+    """Return a stable key for a result computed from `parts`, e.g. a transcript."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache(Generic[T]):
+    """
+    A thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    `on_evict(key, value)` is called for every entry dropped to make room or
+    because it expired, but not for entries removed with `pop`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl: float = 3600,
+        on_evict: Optional[Callable[[str, T], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[T]:
+        """Return the cached value for `key`, or None if absent or expired."""
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                evicted.append((key, self._entries.pop(key)[1]))
+                entry = None
+            elif entry is not None:
+                self._entries.move_to_end(key)
+        self._notify(evicted)
+        return None if entry is None else entry[1]
+
+    def put(self, key: str, value: T) -> None:
+        """Store `value`, evicting expired and then least recently used entries."""
+        evicted = []
+        with self._lock:
+            now = self._clock()
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            for other, (expires, old) in list(self._entries.items()):
+                if expires <= now:
+                    evicted.append((other, old))
+                    del self._entries[other]
+            while len(self._entries) > self.max_entries:
+                other, (_, old) = self._entries.popitem(last=False)
+                evicted.append((other, old))
+        self._notify(evicted)
+
+    def pop(self, key: str) -> Optional[T]:
+        """Remove and return the value for `key`, if cached and not expired."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _notify(self, evicted: list) -> None:
+        if self.on_evict is not None:
+            for key, value in evicted:
+                self.on_evict(key, value)
+
+
+@dataclass
+class PrefetchStats:
+    """Counters describing how speculative calls paid off."""
+
+    started: int = 0  # Speculative calls launched
+    skipped_budget: int = 0  # Not launched: hourly budget spent
+    skipped_busy: int = 0  # Not launched: too many in flight, globally or per tenant
+    failed: int = 0  # Speculative calls that errored; never cached
+    wasted: int = 0  # Speculative results evicted or expired unused
+    hits: int = 0  # Lookups served from the cache
+    joined: int = 0  # Lookups that attached to an in-flight call
+    misses: int = 0  # Lookups that had to make their own call
+    abandoned: int = 0  # Lookups that gave up waiting for an in-flight call
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that did not have to start their own call."""
+        lookups = self.hits + self.joined + self.misses
+        return (self.hits + self.joined) / lookups if lookups else 0.0
+
+
+class SpeculativePrefetcher:
+    """
+    Start expensive calls before the user asks for them and keep the results.
+
+    `prefetch(key, func, tenant)` runs `func` on a background thread and caches
+    its result under `key`. `get_or_compute(key, func)` returns the cached
+    result, waits for an in-flight call for the same key, or calls `func`
+    itself. An in-flight call is waited for at most `join_timeout` seconds, so
+    a speculative call queued behind other work at batch priority delays the
+    caller by no more than that before it makes its own call. Results for
+    which `cacheable(result)` is false, such as error messages, are never
+    cached, so the caller's own call retries them.
+
+    Speculative spend is bounded by `max_in_flight` concurrent calls overall,
+    one per tenant, and a token bucket of `calls_per_hour`.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 2,
+        calls_per_hour: float = 30,
+        cache: Optional[ResultCache] = None,
+        cacheable: Callable[[Any], bool] = lambda result: result is not None,
+        clock: Callable[[], float] = time.monotonic,
+        join_timeout: Optional[float] = 10.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.join_timeout = join_timeout
+        self.cache: ResultCache = (
+            cache if cache is not None else ResultCache(clock=clock)
+        )
+        self.cache.on_evict = self._on_evict
+        self._cacheable = cacheable
+        self._budget = TokenBucket(calls_per_hour / 3600, calls_per_hour, clock)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_in_flight), thread_name_prefix="prefetch"
+        )
+        self._in_flight: Dict[str, concurrent.futures.Future] = {}
+        self._tenants: Dict[str, str] = {}  # Key of each tenant's in-flight call
+        self._unused: set = set()  # Cached speculative results not yet looked up
+        self._stats = PrefetchStats()
+        self._lock = threading.Lock()
+
+    def prefetch(self, key: str, func: Callable[[], Any], tenant: str = "") -> bool:
+        """
+        Start `func` in the background unless its result is cached, already
+        being computed, or the speculative limits are reached.
+
+        Returns:
+            bool: True if a speculative call was started.
+        """
+        # The cache calls back into `_on_evict`, so query it without the lock.
+        if self.cache.get(key) is not None:
+            return False
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            if len(self._in_flight) >= self.max_in_flight or tenant in self._tenants:
+                self._stats.skipped_busy += 1
+                return False
+            if not self._budget.try_consume():
+                self._stats.skipped_budget += 1
+                return False
+            self._stats.started += 1
+            future = self._executor.submit(self._run, key, func)
+            self._in_flight[key] = future
+            self._tenants[tenant] = key
+        # Runs immediately if the call already finished, so outside the lock.
+        future.add_done_callback(lambda _: self._finish(key, tenant))
+        return True
+
+    def get_or_compute(self, key: str, func: Callable[[], T]) -> T:
+        """
+        Return the result for `key`, computing it with `func` if no cached or
+        in-flight result is usable.
+        """
+        # A speculative call caches its result before it leaves `_in_flight`, so
+        # checking in this order cannot miss one that finishes in between.
+        with self._lock:
+            future = self._in_flight.get(key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record_lookup(key, "hits")
+            return cached
+        if future is not None:
+            result = self._join(future)
+            if self._cacheable(result):
+                self._record_lookup(key, "joined")
+                return result
+        self._record_lookup(key, "misses")
+        result = func()
+        if self._cacheable(result):
+            self.cache.put(key, result)
+        return result
+
+    def stats(self) -> PrefetchStats:
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return PrefetchStats(**vars(self._stats))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the background threads, optionally waiting for in-flight calls."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, key: str, func: Callable[[], Any]) -> Any:
+        try:
+            result = func()
+        except Exception as e:
+            logger.warning("Speculative call failed: %s", e)
+            result = None
+        if self._cacheable(result):
+            with self._lock:
+                self._unused.add(key)
+            self.cache.put(key, result)
+        else:
+            with self._lock:
+                self._stats.failed += 1
+        return result
+
+    def _join(self, future: concurrent.futures.Future) -> Any:
+        try:
+            return future.result(timeout=self.join_timeout)
+        except concurrent.futures.TimeoutError:
+            # Left running; its result is still cached when it finishes.
+            with self._lock:
+                self._stats.abandoned += 1
+            return None
+
+    def _finish(self, key: str, tenant: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if self._tenants.get(tenant) == key:
+                del self._tenants[tenant]
+
+    def _record_lookup(self, key: str, outcome: str) -> None:
+        with self._lock:
+            setattr(self._stats, outcome, getattr(self._stats, outcome) + 1)
+            self._unused.discard(key)
+
+    def _on_evict(self, key: str, value: Any) -> None:
+        with self._lock:
+            if key in self._unused:
+                self._unused.discard(key)
+                self._stats.wasted += 1
+
+
+_prefetcher: Optional[SpeculativePrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> SpeculativePrefetcher:
+    """
+    Return the process-wide prefetcher for AI extraction results, configured
+    from the `SPECULATIVE_*` and `RESULT_CACHE_*` settings in `Config`. Error
+    messages returned by the app's AI helpers are not cached.
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = SpeculativePrefetcher(
+                max_in_flight=Config.SPECULATIVE_MAX_IN_FLIGHT,
+                calls_per_hour=Config.SPECULATIVE_CALLS_PER_HOUR,
+                cache=ResultCache(Config.RESULT_CACHE_SIZE, Config.RESULT_CACHE_TTL),
+                cacheable=lambda result: isinstance(result, str)
+                and not result.startswith("Error"),
+                join_timeout=Config.SPECULATIVE_JOIN_TIMEOUT,
+            )
+        return _prefetcher
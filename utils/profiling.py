@@ -0,0 +1,169 @@
+import linecache
+import os
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# Allocations made by the profiler itself and by the import machinery are noise.
+_IGNORED_FILES = (
+    tracemalloc.__file__,
+    __file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+)
+
+
+@dataclass
+class AllocationSite:
+    """Memory still held at the end of a stage, grouped by allocating line."""
+
+    location: str  # "path/to/file.py:123"
+    size_bytes: int
+    count: int
+    line: str = ""
+
+
+@dataclass
+class StageMemory:
+    """
+    Memory used by one pipeline stage.
+
+    Attributes:
+        stage: Stage name.
+        peak_bytes: Highest traced memory during the stage, above its start.
+        retained_bytes: Traced memory still held when the stage ended, above its
+            start. Large values point at copies that outlive the stage.
+        top_sites: Lines that allocated the most retained memory.
+    """
+
+    stage: str
+    peak_bytes: int
+    retained_bytes: int
+    top_sites: List[AllocationSite] = field(default_factory=list)
+
+
+class MemoryProfiler:
+    """
+    Record peak and retained memory per stage with `tracemalloc`.
+
+    Use as a context manager, which starts tracing unless it is already on,
+    and wrap each stage in `stage()`:
+
+        with MemoryProfiler() as profiler:
+            with profiler.stage("transcript_fetch"):
+                transcript = fetch_transcript(video_id)
+        print(format_stages(profiler.stages))
+
+    Tracing slows every allocation down, so timings taken at the same time are
+    not representative. `tracemalloc` is process-wide: allocations by other
+    threads during a stage are counted too.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1):
+        """
+        Args:
+            top: Allocation sites reported per stage.
+            frames: Stack frames stored per allocation; more frames cost more
+                memory but allow attributing allocations to callers.
+        """
+        self.top = top
+        self.frames = frames
+        self.stages: List[StageMemory] = []
+        self._started = False
+
+    def __enter__(self) -> "MemoryProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the memory used by the block under `name`."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("MemoryProfiler.stage() used outside the profiler")
+        before = self._snapshot()
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            after = self._snapshot()
+            self.stages.append(
+                StageMemory(
+                    stage=name,
+                    peak_bytes=max(0, peak - start),
+                    retained_bytes=current - start,
+                    top_sites=self._top_sites(after, before),
+                )
+            )
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Return the recorded stages as JSON-serializable dicts."""
+        return [asdict(stage) for stage in self.stages]
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+        )
+
+    def _top_sites(
+        self, after: tracemalloc.Snapshot, before: tracemalloc.Snapshot
+    ) -> List[AllocationSite]:
+        sites = []
+        for diff in after.compare_to(before, "lineno"):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            sites.append(
+                AllocationSite(
+                    location=f"{_short_path(frame.filename)}:{frame.lineno}",
+                    size_bytes=diff.size_diff,
+                    count=diff.count_diff,
+                    line=linecache.getline(frame.filename, frame.lineno).strip(),
+                )
+            )
+            if len(sites) == self.top:
+                break
+        return sites
+
+
+def _short_path(filename: str) -> str:
+    """Show project files relative to the working directory."""
+    relative = os.path.relpath(filename)
+    return filename if relative.startswith("..") else relative
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "kB", "MB"):
+        if abs(size) < 1000:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} GB"
+
+
+def format_stages(stages: List[StageMemory], sites: Optional[int] = 5) -> str:
+    """Render per-stage memory and the top allocation sites as text."""
+    lines = [f"{'stage':<20} {'peak':>10} {'retained':>10}"]
+    for stage in stages:
+        lines.append(
+            f"{stage.stage:<20} {_format_bytes(stage.peak_bytes):>10} "
+            f"{_format_bytes(stage.retained_bytes):>10}"
+        )
+    for stage in stages:
+        if not stage.top_sites or not sites:
+            continue
+        lines += ["", f"{stage.stage}: top retained allocations"]
+        for site in stage.top_sites[:sites]:
+            lines.append(
+                f"  {_format_bytes(site.size_bytes):>10} {site.count:>7} blocks  "
+                f"{site.location}  {site.line}"
+            )
+    return "\n".join(lines)
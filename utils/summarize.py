@@ -0,0 +1,163 @@
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from config.config import PRESUMMARY_MODES, Config
+from utils.lazy import lazy_imports
+from utils.tracing import span
+
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+# Only the TextRank mode needs NumPy and SciPy; "off" keeps imports cheap.
+__getattr__, _require = lazy_imports(
+    globals(), {"np": "numpy", "sparse": "scipy:sparse"}
+)
+
+MODES = PRESUMMARY_MODES
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+# Rough size of a token in characters for English text.
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text from its length."""
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def split_passages(text: str, min_words: int = 40, max_words: int = 120) -> List[str]:
+    """
+    Split a transcript into passages of roughly `min_words` to `max_words`.
+
+    Sentences are joined until a passage has `min_words`. Auto-generated
+    captions often have no punctuation at all, so word runs longer than
+    `max_words` are cut into `max_words` windows.
+    """
+    passages: List[str] = []
+    current: List[str] = []
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            current += words[start : start + max_words]
+            if len(current) >= min_words:
+                passages.append(" ".join(current))
+                current = []
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def textrank_scores(
+    passages: List[str], damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100
+) -> "np.ndarray":
+    """
+    Score passages by centrality with TextRank.
+
+    Passages become sublinear TF-IDF vectors; their cosine similarities weight
+    the edges of a graph, and PageRank over that graph scores each passage by
+    how much of the rest of the transcript it resembles.
+
+    Returns:
+        np.ndarray: One score per passage, summing to 1.
+    """
+    _require("np", "sparse")
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for row, passage in enumerate(passages):
+        for word in _WORD.findall(passage.lower()):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    n, width = len(passages), max(1, len(vocabulary))
+    # Sparse, since a long transcript has thousands of passages and words but
+    # each passage only uses a few dozen of them. Duplicates are summed.
+    vectors = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(n, width), dtype=np.float64
+    )
+    vectors.sum_duplicates()
+
+    idf = np.log((1 + n) / (1 + np.bincount(vectors.indices, minlength=width))) + 1
+    vectors.data = (1 + np.log(vectors.data)) * idf[vectors.indices]
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    vectors = sparse.diags(1 / np.where(norms > 0, norms, 1)) @ vectors
+
+    weights = (vectors @ vectors.T).toarray()
+    np.fill_diagonal(weights, 0)
+    totals = weights.sum(axis=1, keepdims=True)
+    # A passage sharing no words with any other links to all of them equally.
+    transition = np.where(totals > 0, weights / np.where(totals > 0, totals, 1), 1 / n)
+
+    scores = np.full(n, 1 / n)
+    for _ in range(max_iter):
+        updated = (1 - damping) / n + damping * (scores @ transition)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def textrank_summary(text: str, token_budget: int) -> str:
+    """
+    Keep the most central passages of a text within a token budget.
+
+    Passages are taken by descending TextRank score, ties going to the earlier
+    passage, while they fit in `token_budget`, and are returned in transcript
+    order, one per line. If no passage fits, the best one is cut to the budget.
+    The output is deterministic. Texts within the budget are returned
+    unchanged.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    passages = split_passages(text)
+    if not passages:
+        # The text is only whitespace.
+        return ""
+    _require("np")
+    with span("presummarize", mode="textrank"):
+        scores = textrank_scores(passages)
+        chosen = []
+        remaining = token_budget
+        for index in np.argsort(-scores, kind="stable"):
+            # Passages are joined by newlines, one extra character each.
+            cost = estimate_tokens(passages[index] + "\n")
+            if cost <= remaining:
+                chosen.append(int(index))
+                remaining -= cost
+    if not chosen:
+        # Even the shortest passage is over budget: trim the best one.
+        best = passages[int(np.argmax(scores))]
+        return best[: token_budget * _CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+    return "\n".join(passages[index] for index in sorted(chosen))
+
+
+def presummarize(
+    text: str, mode: Optional[str] = None, token_budget: Optional[int] = None
+) -> str:
+    """
+    Shrink a long transcript before it is sent to the AI.
+
+    Args:
+        text: The transcript.
+        mode: "off" returns the text unchanged; "textrank" keeps the most
+            central passages. Defaults to `Config.PRESUMMARY_MODE`.
+        token_budget: Approximate tokens to keep. Defaults to
+            `Config.PRESUMMARY_TOKEN_BUDGET`.
+
+    Returns:
+        str: The text to send.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    mode = Config.PRESUMMARY_MODE if mode is None else mode
+    if mode == "off":
+        return text
+    if mode == "textrank":
+        budget = (
+            Config.PRESUMMARY_TOKEN_BUDGET if token_budget is None else token_budget
+        )
+        return textrank_summary(text, budget)
+    raise ValueError(f"Unknown pre-summary mode {mode!r}; expected one of {MODES}")
@@ -0,0 +1,499 @@
+import bisect
+import contextvars
+import functools
+import http.server
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from config.config import Config
+
+T = TypeVar("T")
+
+STAGE_METRIC = "wisdom_stage_duration_seconds"
+ERROR_METRIC = "wisdom_stage_errors_total"
+
+# Histogram bucket upper bounds: powers of sqrt(2) from 100us to ~10 minutes.
+# Percentiles interpolated inside a bucket are accurate to within ~20%.
+DEFAULT_BUCKETS: Tuple[float, ...] = tuple(0.0001 * 2 ** (n / 2) for n in range(46))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Sample:
+    """One exported metric value, as produced by a collector."""
+
+    name: str
+    value: float
+    labels: Optional[Dict[str, str]] = None
+    kind: str = "gauge"
+    help: str = ""
+
+
+@dataclass
+class SpanRecord:
+    """A finished span, kept in a small ring buffer for the debug panel."""
+
+    name: str
+    parent: Optional[str]
+    start: float
+    duration: float
+    labels: Dict[str, str]
+    error: bool
+
+
+class Histogram:
+    """A thread-safe fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile by interpolating inside the bucket it falls in.
+
+        Args:
+            q (float): The percentile, from 0 to 100.
+
+        Returns:
+            float: The estimated value, clamped to the observed min and max, or 0.0
+            if nothing was observed.
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100 * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = (
+                        self.buckets[index] if index < len(self.buckets) else self.max
+                    )
+                    estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                    return min(max(estimate, self.min), self.max)
+                seen += bucket_count
+            return self.max
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and label set."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Add an observation to the histogram for `name` and `labels`."""
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Add `value` to the counter for `name` and `labels`."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """Return the histogram for `name` and `labels`, if anything was observed."""
+        return self._histograms.get((name, _label_key(labels)))
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Return the current value of a counter."""
+        return self._counters.get((name, _label_key(labels)), 0.0)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """
+        Register a callable whose samples are read at export time, for values
+        owned by other components (breaker states, queue depths).
+        """
+        self._collectors.append(collector)
+
+    def reset(self) -> None:
+        """Drop all recorded histograms and counters; collectors are kept."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def summary(self, name: str = STAGE_METRIC) -> List[Dict[str, Any]]:
+        """
+        Summarize every label set of a histogram, slowest p95 first.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per label set with its labels, `count`,
+            `mean`, `p50`, `p95` and `p99` (seconds).
+        """
+        with self._lock:
+            items = [(k, h) for k, h in self._histograms.items() if k[0] == name]
+        rows = []
+        for (_, labels), histogram in items:
+            row: Dict[str, Any] = dict(labels)
+            row.update(
+                count=histogram.count,
+                mean=histogram.sum / histogram.count if histogram.count else 0.0,
+                p50=histogram.percentile(50),
+                p95=histogram.percentile(95),
+                p99=histogram.percentile(99),
+            )
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["p95"], reverse=True)
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Samples are grouped by metric family, so each family's `# HELP` and
+        `# TYPE` lines appear once, followed by all of its samples, even when
+        several collectors report the same family.
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        # Metric name -> [kind, help, sample lines], in first-seen order.
+        families: Dict[str, List[Any]] = {}
+
+        def family(name: str, kind: str, help: str = "") -> List[str]:
+            entry = families.setdefault(name, [kind, help, []])
+            entry[1] = entry[1] or help
+            return entry[2]
+
+        for (name, labels), histogram in histograms:
+            lines = family(name, "histogram")
+            with histogram._lock:
+                counts = list(histogram.counts)
+                total, count = histogram.sum, histogram.count
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", f"{bound:.6g}"),)
+                lines.append(
+                    f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            bucket_labels = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.9g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for (name, labels), value in counters:
+            family(name, "counter").append(
+                f"{name}{_format_labels(labels)} {value:.9g}"
+            )
+
+        for collector in list(self._collectors):
+            for sample in collector():
+                labels = _label_key(sample.labels or {})
+                family(sample.name, sample.kind, sample.help).append(
+                    f"{sample.name}{_format_labels(labels)} {sample.value:.9g}"
+                )
+
+        output: List[str] = []
+        for name, (kind, help, lines) in families.items():
+            if help:
+                output.append(f"# HELP {name} {help}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+def _label_key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+registry = MetricsRegistry()
+
+_enabled = Config.TRACING_ENABLED
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_recent_spans: Deque[SpanRecord] = deque(maxlen=200)
+
+
+def enable_tracing(enabled: bool = True) -> None:
+    """Turn span recording on or off at runtime."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Return whether spans are currently recorded."""
+    return _enabled
+
+
+class _NoopSpan:
+    """Returned by `span` while tracing is disabled; entering it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **labels: str) -> Any:
+    """
+    Time a block of code as a pipeline stage.
+
+    The duration is measured with `time.perf_counter` and added to the
+    `wisdom_stage_duration_seconds` histogram with a `stage` label plus any
+    extra labels, such as `upstream`. Exceptions are counted in
+    `wisdom_stage_errors_total` and re-raised. While tracing is disabled this
+    returns a shared no-op context manager.
+
+    Args:
+        name (str): Stage name.
+        **labels: Extra metric labels.
+
+    Returns:
+        A context manager.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _span(name, labels)
+
+
+@contextmanager
+def _span(name: str, labels: Dict[str, str]) -> Iterator[None]:
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        registry.increment(ERROR_METRIC, stage=name, **labels)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        registry.observe(STAGE_METRIC, duration, stage=name, **labels)
+        _recent_spans.append(
+            SpanRecord(name, parent, time.time() - duration, duration, labels, error)
+        )
+
+
+def traced(
+    name: Optional[str] = None, **labels: str
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorator form of `span`. The stage name defaults to the function's
+    qualified name. While tracing is disabled the wrapper only checks a flag.
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        stage = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _span(stage, labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def recent_spans(limit: int = 50) -> List[SpanRecord]:
+    """Return the most recently finished spans, newest first."""
+    return list(reversed(_recent_spans))[:limit]
+
+
+def stage_summary() -> List[Dict[str, Any]]:
+    """Return p50/p95/p99 per stage and label set; see `MetricsRegistry.summary`."""
+    return registry.summary(STAGE_METRIC)
+
+
+def render_prometheus() -> str:
+    """Render the shared registry in the Prometheus text format."""
+    return registry.render_prometheus()
+
+
+def _collect_breakers() -> Iterable[Sample]:
+    from utils.error_handler import CircuitBreaker, circuit_breaker_metrics
+
+    states = (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN)
+    for metrics in circuit_breaker_metrics():
+        yield Sample(
+            "wisdom_circuit_breaker_state",
+            states.index(metrics.state),
+            {"upstream": metrics.name},
+            help="0 = closed, 1 = half-open, 2 = open",
+        )
+        yield Sample(
+            "wisdom_circuit_breaker_rejected_total",
+            metrics.rejected,
+            {"upstream": metrics.name},
+            kind="counter",
+        )
+        for transition, count in metrics.transitions.items():
+            yield Sample(
+                "wisdom_circuit_breaker_transitions_total",
+                count,
+                {"upstream": metrics.name, "transition": transition},
+                kind="counter",
+            )
+
+
+def _collect_scheduler() -> Iterable[Sample]:
+    from utils import concurrency
+
+    scheduler = concurrency._ai_scheduler
+    if scheduler is None:
+        return
+    stats = scheduler.stats()
+    yield Sample("wisdom_ai_in_flight", stats.in_flight)
+    for priority, queued in stats.queued.items():
+        yield Sample("wisdom_ai_queued", queued, {"priority": str(priority)})
+
+
+def _collect_prefetch() -> Iterable[Sample]:
+    from utils import prefetch
+
+    prefetcher = prefetch._prefetcher
+    if prefetcher is None:
+        return
+    stats = prefetcher.stats()
+    yield Sample("wisdom_prefetch_started_total", stats.started, kind="counter")
+    for reason, count in (
+        ("budget", stats.skipped_budget),
+        ("busy", stats.skipped_busy),
+    ):
+        yield Sample(
+            "wisdom_prefetch_skipped_total", count, {"reason": reason}, kind="counter"
+        )
+    yield Sample("wisdom_prefetch_failed_total", stats.failed, kind="counter")
+    yield Sample("wisdom_prefetch_wasted_total", stats.wasted, kind="counter")
+    yield Sample("wisdom_prefetch_abandoned_total", stats.abandoned, kind="counter")
+    for outcome in ("hits", "joined", "misses"):
+        yield Sample(
+            "wisdom_prefetch_lookups_total",
+            getattr(stats, outcome),
+            {"outcome": outcome},
+            kind="counter",
+        )
+    yield Sample(
+        "wisdom_prefetch_hit_rate",
+        stats.hit_rate,
+        help="Share of extractions served by a cached or in-flight result",
+    )
+
+
+registry.add_collector(_collect_breakers)
+registry.add_collector(_collect_scheduler)
+registry.add_collector(_collect_prefetch)
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+_server: Optional[http.server.ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(
+    port: Optional[int] = None, host: str = "127.0.0.1"
+) -> http.server.ThreadingHTTPServer:
+    """
+    Serve `/metrics` in the Prometheus text format from a daemon thread.
+
+    Calling it again returns the already running server, which makes it safe to
+    call from a Streamlit script that is re-executed on every interaction.
+
+    Args:
+        port (int): Port to listen on; defaults to `Config.METRICS_PORT`. Use 0 to
+            pick a free port.
+        host (str): Interface to bind; local only by default.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = http.server.ThreadingHTTPServer(
+                (host, Config.METRICS_PORT if port is None else port),
+                _MetricsHandler,
+            )
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+        return _server
+
+
+def stop_metrics_server() -> None:
+    """Stop the server started by `start_metrics_server`, if any."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None